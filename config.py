@@ -14,7 +14,18 @@ APP_CONFIG = {
     'DATABASE_NAME': 'chviet_store.db',
     'BACKUP_DIR': 'backups',
     'REPORTS_DIR': 'reports',
-    'TEMP_DIR': 'temp'
+    'TEMP_DIR': 'temp',
+    'STARTUP_PROFILE_FILE': os.path.join('temp', 'startup_profile.json'),
+    'ANALYTICS_DIR': os.path.join('temp', 'analytics'),  # Column files of utils.analytics_snapshot
+    'STARTUP_BUDGET_MS': {  # Cold start budget per phase; login waits for the user and is not checked
+        'imports': 250,
+        'tk_root': 300,
+        'db_connect': 50,
+        'schema_check': 100,
+        'main_interface': 1000,
+        'tab': 500,  # Each tab build
+        'first_frame': 1500
+    }
 }
 
 # Database Configuration
@@ -24,7 +35,16 @@ DATABASE_CONFIG = {
         'PRAGMA journal_mode = WAL',
         'PRAGMA synchronous = NORMAL',
         'PRAGMA cache_size = 10000'
-    ]
+    ],
+    'READER_PRAGMA_SETTINGS': [
+        'PRAGMA query_only = ON',
+        'PRAGMA cache_size = 10000'
+    ],
+    'QUERY_LOG_FILE': os.path.join('temp', 'query_log.json'),
+    'SEARCH_LIMIT': 500,  # Most rows a search box returns
+    'PAGE_SIZE': 100,  # Rows per page of the history lists
+    'FETCH_CHUNK_SIZE': 1000,  # Rows per fetch when streaming a query
+    'WARM_TABLES': ['products', 'product_stock', 'categories', 'inventory', 'customers', 'staff', 'sales']  # Read while the login dialog is open
 }
 
 # Business Configuration
@@ -53,7 +73,20 @@ GUI_CONFIG = {
         'HEADING': ('Arial', 12, 'bold'),
         'LARGE': ('Arial', 14),
         'SMALL': ('Arial', 8)
-    }
+    },
+    'QUERY_WORKERS': 2,  # Background SQL threads
+    'QUERY_POLL_MS': 20,  # How often the Tk thread collects results
+    'SEARCH_DELAY_MS': 250,  # Quiet period before a search box queries
+    'SEARCH_MIN_LENGTH': 2,  # Shorter search terms are ignored
+    'SCAN_KEY_GAP_MS': 30,  # Keys closer than this come from a scanner
+    'SCAN_MIN_LENGTH': 8,  # Shortest burst treated as a scan
+    'SCAN_IDLE_MS': 80,  # Ends a burst when the scanner sends no terminator
+    'VIRTUAL_PAGE_SIZE': 200,  # Rows per page read by virtual lists
+    'VIRTUAL_CACHE_PAGES': 6,  # Pages a virtual list keeps in memory
+    'TAB_PREFETCH': True,  # Build the other tabs in the background after startup
+    'TAB_PREFETCH_ORDER': ['sales', 'inventory', 'repair', 'warranty', 'pawn', 'financial', 'staff', 'reports'],
+    'TAB_PREFETCH_DELAY_MS': 500,  # Pause between two background tab builds
+    'TAB_RELEASE_MINUTES': 15  # Tabs hidden this long drop their loaded lists (0 keeps them)
 }
 
 # Create necessary directories
@@ -68,6 +101,3 @@ def create_directories():
     for directory in dirs:
         if not os.path.exists(directory):
             os.makedirs(directory)
-
-# Initialize directories on import
-create_directories()
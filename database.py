@@ -6,13 +6,33 @@ Database management for ChViet Mobile Store Management System
 
 import sqlite3
 import os
-from datetime import datetime
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, date
 from config import APP_CONFIG, DATABASE_CONFIG
 
 class DatabaseManager:
     def __init__(self, db_path=None):
         self.db_path = db_path or APP_CONFIG['DATABASE_NAME']
         self.connection = None
+        self._transaction_depth = 0
+        self._transaction_owner = None
+        self._commits = 0
+        
+        # One writer connection guarded by a lock, one reader per thread
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        
+        # Optional log of issued statements for the index advisor
+        self._query_log = None
+        self._query_log_lock = threading.Lock()
+        
+        # Entities whose full-text index exists, filled on first search
+        self._search_indexes = None
         
     def connect(self):
         """Establish database connection"""
@@ -29,45 +49,392 @@ class DatabaseManager:
             print(f"Database connection error: {e}")
             raise
     
+    def get_reader(self):
+        """Get the read-only connection for the calling thread"""
+        reader = getattr(self._local, 'reader', None)
+        if reader is not None:
+            return reader
+        
+        # In-memory databases cannot be shared, fall back to the writer
+        if self.db_path == ':memory:' or not os.path.exists(self.db_path):
+            return None
+        
+        try:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            reader = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                     isolation_level=None)
+            reader.row_factory = sqlite3.Row
+            
+            for pragma in DATABASE_CONFIG['READER_PRAGMA_SETTINGS']:
+                reader.execute(pragma)
+        except Exception as e:
+            print(f"Database reader connection error: {e}")
+            return None
+        
+        self._local.reader = reader
+        with self._readers_lock:
+            self._readers.append(reader)
+        return reader
+    
     def close_connection(self):
         """Close database connection"""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
+        if self._query_log:
+            self.save_query_log()
+        
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for reader in readers:
+            try:
+                reader.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+        
+        with self._write_lock:
+            if self.connection:
+                self.connection.close()
+                self.connection = None
     
     def execute_query(self, query, params=None):
         """Execute a query and return results"""
-        if not self.connection:
-            self.connect()
+        with self._write_lock:
+            if not self.connection:
+                self.connect()
+            
+            try:
+                started = time.perf_counter()
+                cursor = self.connection.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                
+                if self._query_log is not None:
+                    self._record_query(query, params, time.perf_counter() - started)
+                
+                # Inside a unit of work the commit is deferred to transaction()
+                if not self._transaction_depth:
+                    self.connection.commit()
+                    self._commits += 1
+                return cursor
+            except Exception as e:
+                if not self._transaction_depth:
+                    self.connection.rollback()
+                print(f"Query execution error: {e}")
+                raise
+    
+    @contextmanager
+    def transaction(self):
+        """Run a block of statements as one unit of work
+        
+        The outermost block commits once on success and rolls back everything
+        on error. Nested blocks use savepoints so an inner failure can be
+        handled without discarding the outer work. The writer stays locked
+        for the whole block.
+        """
+        with self._write_lock:
+            if not self.connection:
+                self.connect()
+            
+            savepoint = None
+            if self._transaction_depth == 0:
+                if not self.connection.in_transaction:
+                    self.connection.execute("BEGIN")
+                self._transaction_owner = threading.get_ident()
+            else:
+                savepoint = f"sp_{self._transaction_depth}"
+                self.connection.execute(f"SAVEPOINT {savepoint}")
+            
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                if savepoint:
+                    self.connection.execute(f"ROLLBACK TO {savepoint}")
+                    self.connection.execute(f"RELEASE {savepoint}")
+                else:
+                    self._transaction_owner = None
+                    self.connection.rollback()
+                raise
+            else:
+                self._transaction_depth -= 1
+                if savepoint:
+                    self.connection.execute(f"RELEASE {savepoint}")
+                else:
+                    self._transaction_owner = None
+                    self.connection.commit()
+                    self._commits += 1
+    
+    def _read(self, query, params=None):
+        """Run a read-only query on the calling thread's reader"""
+        # Reads inside our own unit of work must see its uncommitted rows
+        if self._transaction_owner == threading.get_ident():
+            return None
+        
+        reader = self.get_reader()
+        if reader is None:
+            return None
         
         try:
-            cursor = self.connection.cursor()
+            started = time.perf_counter()
             if params:
-                cursor.execute(query, params)
+                cursor = reader.execute(query, params)
             else:
-                cursor.execute(query)
+                cursor = reader.execute(query)
             
-            self.connection.commit()
+            if self._query_log is not None:
+                self._record_query(query, params, time.perf_counter() - started)
             return cursor
-        except Exception as e:
-            self.connection.rollback()
+        except sqlite3.OperationalError as e:
+            # Writes or schema changes issued through fetch_* go to the writer
+            if 'readonly' in str(e) or 'read-only' in str(e):
+                return None
             print(f"Query execution error: {e}")
             raise
     
+    def enable_query_log(self):
+        """Start recording the statements issued through this manager"""
+        with self._query_log_lock:
+            if self._query_log is None:
+                self._query_log = {}
+    
+    def _record_query(self, query, params, elapsed):
+        """Add one execution of a statement to the query log"""
+        key = ' '.join(query.split())
+        with self._query_log_lock:
+            entry = self._query_log.setdefault(key, {'query': key, 'count': 0, 'total_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += elapsed * 1000
+            entry['params'] = list(params) if params else []
+    
+    def get_query_log(self):
+        """Get recorded statements, slowest first"""
+        with self._query_log_lock:
+            entries = [dict(entry) for entry in (self._query_log or {}).values()]
+        return sorted(entries, key=lambda entry: entry['total_ms'], reverse=True)
+    
+    def save_query_log(self, path=None):
+        """Write recorded statements to a JSON file for the index advisor"""
+        path = path or DATABASE_CONFIG['QUERY_LOG_FILE']
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.get_query_log(), f, ensure_ascii=False, indent=2, default=str)
+        except Exception as e:
+            print(f"Error saving query log: {e}")
+    
     def fetch_all(self, query, params=None):
         """Fetch all results from a query"""
-        cursor = self.execute_query(query, params)
+        cursor = self._read(query, params)
+        if cursor is None:
+            cursor = self.execute_query(query, params)
         return cursor.fetchall()
     
     def fetch_one(self, query, params=None):
         """Fetch one result from a query"""
-        cursor = self.execute_query(query, params)
+        cursor = self._read(query, params)
+        if cursor is None:
+            cursor = self.execute_query(query, params)
         return cursor.fetchone()
     
+    def iterate(self, query, params=None):
+        """Yield the results of a query, fetching FETCH_CHUNK_SIZE rows at a time"""
+        cursor = self._read(query, params)
+        if cursor is None:
+            cursor = self.execute_query(query, params)
+        while True:
+            rows = cursor.fetchmany(DATABASE_CONFIG['FETCH_CHUNK_SIZE'])
+            if not rows:
+                return
+            yield from rows
+    
+    def warm_cache(self, table):
+        """Read every page of a table on this thread's reader connection
+        
+        Fills the reader's page cache and the OS file cache, so the first
+        queries on the table do not wait for the disk.
+        """
+        # In-memory and not yet created databases have no reader and nothing on disk to warm
+        reader = self.get_reader()
+        if reader is None:
+            return
+        reader.execute(f"SELECT COUNT(*) FROM {table} NOT INDEXED").fetchone()
+    
+    @staticmethod
+    def keyset_conditions(order_key, id_column, descending, cursor, inclusive=False):
+        """
+        Build the conditions for rows that come after a cursor in keyset order
+        
+        NULLs sort first ascending and last descending and never compare
+        equal, so the NULL block gets its own condition. Each condition is
+        a plain range on the sort index; an OR across them could use none.
+        
+        Args:
+            order_key: Column or expression the rows are sorted by
+            id_column: Unique column breaking ties in order_key
+            descending: Sort direction
+            cursor: (order_key value, id) of a row
+            inclusive: Include the cursor row itself
+        
+        Returns:
+            list: (condition, params) to read in order until a page is full
+        """
+        value, row_id = cursor
+        op = ('<' if descending else '>') + ('=' if inclusive else '')
+        if order_key == id_column:
+            return [(f"{id_column} {op} ?", [row_id])]
+        if value is None:
+            conditions = [(f"{order_key} IS NULL AND {id_column} {op} ?", [row_id])]
+            return conditions if descending else conditions + [(f"{order_key} IS NOT NULL", [])]
+        conditions = [(f"({order_key}, {id_column}) {op} (?, ?)", [value, row_id])]
+        return conditions + [(f"{order_key} IS NULL", [])] if descending else conditions
+    
+    def paginate(self, query, order_key, page_size=None, params=None, after=None, before=None,
+                 at=None, descending=False, id_column='id'):
+        """
+        Read one page of a query with keyset (seek) pagination
+        
+        The page is found by seeking on the index of order_key from a
+        cursor, the (order_key, id) of a row on a neighbouring page, so
+        every page costs the same however deep it is, unlike OFFSET.
+        
+        Args:
+            query: SELECT without ORDER BY or LIMIT; order_key and
+                   id_column must be columns of its result
+            order_key: Result column to sort by
+            page_size: Most rows to return
+            params: Parameters of query
+            after: Cursor of the row just before the page
+            before: Cursor of the row just after the page
+            at: Cursor of the first row of the page
+            descending: Sort direction
+            id_column: Unique result column breaking ties in order_key
+        
+        Returns:
+            list: Rows in sort order; the cursor of a row is
+                  (row[order_key], row[id_column])
+        """
+        page_size = page_size or DATABASE_CONFIG['PAGE_SIZE']
+        
+        # A page before a cursor is read backwards from it
+        reverse = before is not None
+        if reverse:
+            descending = not descending
+            conditions = self.keyset_conditions(order_key, id_column, descending, before)
+        elif at is not None:
+            conditions = self.keyset_conditions(order_key, id_column, descending, at, inclusive=True)
+        elif after is not None:
+            conditions = self.keyset_conditions(order_key, id_column, descending, after)
+        else:
+            conditions = [("1", [])]
+        
+        direction = 'DESC' if descending else 'ASC'
+        order_by = f"{order_key} {direction}"
+        if order_key != id_column:
+            order_by += f", {id_column} {direction}"
+        
+        rows = []
+        for condition, condition_params in conditions:
+            page_query = f"""
+            SELECT * FROM ({query})
+            WHERE {condition}
+            ORDER BY {order_by}
+            LIMIT ?
+            """
+            page_params = list(params or []) + condition_params + [page_size - len(rows)]
+            rows.extend(self.fetch_all(page_query, page_params))
+            if len(rows) >= page_size:
+                break
+        return rows[::-1] if reverse else rows
+    
+    # Ordered schema migrations: (user_version after the step, method name).
+    # Steps must be idempotent so databases created before versioning upgrade cleanly.
+    MIGRATIONS = [
+        (1, 'migrate_base_schema'),
+        (2, 'migrate_index_pack'),
+        (3, 'migrate_day_keys'),
+        (4, 'migrate_product_stock'),
+        (5, 'migrate_staff_performance_indexes'),
+        (6, 'migrate_daily_rollup'),
+        (7, 'migrate_search_indexes'),
+        (8, 'migrate_list_indexes'),
+        (9, 'migrate_history_indexes'),
+        (10, 'migrate_table_edits'),
+        (11, 'migrate_sales_cube'),
+        (12, 'migrate_repairs_history_index'),
+    ]
+    
+    # Integer YYYYMMDD keys derived from timestamp columns: (table, key column, source column).
+    # Filtering on the key instead of DATE(column) lets SQLite use an index.
+    DAY_KEY_COLUMNS = [
+        ('sales', 'sale_day', 'sale_date'),
+        ('transactions', 'transaction_day', 'transaction_date'),
+        ('repairs', 'created_day', 'created_at'),
+        ('warranties', 'end_day', 'end_date'),
+        ('pawn_contracts', 'due_day', 'due_date'),
+    ]
+    
+    @staticmethod
+    def day_key(value=None):
+        """Convert a date, datetime or 'YYYY-MM-DD...' string to a YYYYMMDD day key
+        
+        Defaults to today. Returns None for values that are not dates, so the
+        filter matches nothing just like DATE() on an invalid string.
+        """
+        if value is None:
+            value = date.today()
+        if isinstance(value, (date, datetime)):
+            return value.year * 10000 + value.month * 100 + value.day
+        try:
+            parsed = datetime.strptime(str(value).strip()[:10], '%Y-%m-%d')
+        except ValueError:
+            return None
+        return parsed.year * 10000 + parsed.month * 100 + parsed.day
+    
+    def data_version(self):
+        """Get a value that changes whenever committed data may have changed
+        
+        Counts the commits made through this manager and adds SQLite's
+        data_version, which moves when another connection or process commits.
+        """
+        with self._write_lock:
+            if not self.connection:
+                self.connect()
+            return (self._commits, self.connection.execute("PRAGMA data_version").fetchone()[0])
+    
+    def get_schema_version(self):
+        """Get the schema version stored in PRAGMA user_version"""
+        with self._write_lock:
+            if not self.connection:
+                self.connect()
+            return self.connection.execute("PRAGMA user_version").fetchone()[0]
+    
     def initialize_database(self):
         """Initialize database with all required tables"""
-        self.connect()
+        if self.connection is None:
+            self.connect()
+        
+        # Fast path: schema is current, skip all DDL
+        current_version = self.get_schema_version()
+        if current_version >= self.MIGRATIONS[-1][0]:
+            return
         
+        self.run_migrations(current_version)
+    
+    def run_migrations(self, current_version):
+        """Apply pending migrations in a single transaction"""
+        with self.transaction():
+            for version, step in self.MIGRATIONS:
+                if version <= current_version:
+                    continue
+                
+                print(f"Applying schema migration {version}: {step}")
+                getattr(self, step)()
+                self.connection.execute(f"PRAGMA user_version = {int(version)}")
+    
+    def migrate_base_schema(self):
+        """Migration 1: base tables and default data"""
         # Create tables in order (respecting foreign key dependencies)
         self.create_categories_table()
         self.create_suppliers_table()
@@ -89,6 +456,130 @@ class DatabaseManager:
         # Insert default data
         self.insert_default_data()
     
+    def migrate_index_pack(self):
+        """Migration 2: secondary indexes for the hot list, filter and report queries"""
+        indexes = [
+            "CREATE INDEX IF NOT EXISTS idx_inventory_product_status ON inventory (product_id, status)",
+            "CREATE INDEX IF NOT EXISTS idx_inventory_status_product ON inventory (status, product_id)",
+            "CREATE INDEX IF NOT EXISTS idx_sales_sale_date ON sales (sale_date)",
+            "CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales (customer_id)",
+            "CREATE INDEX IF NOT EXISTS idx_sales_staff_date ON sales (staff_id, sale_date)",
+            "CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items (sale_id)",
+            "CREATE INDEX IF NOT EXISTS idx_sale_items_product ON sale_items (product_id)",
+            "CREATE INDEX IF NOT EXISTS idx_transactions_type_date ON transactions (transaction_type, transaction_date, amount)",
+            "CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (transaction_date)",
+            "CREATE INDEX IF NOT EXISTS idx_warranties_end_status ON warranties (end_date, status)",
+            "CREATE INDEX IF NOT EXISTS idx_debts_debtor ON debts (debtor_type, debtor_id, status)",
+            "CREATE INDEX IF NOT EXISTS idx_pawn_contracts_status_due ON pawn_contracts (status, due_date)",
+            "CREATE INDEX IF NOT EXISTS idx_repairs_created ON repairs (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_repairs_staff_created ON repairs (staff_id, created_at)",
+        ]
+        
+        for query in indexes:
+            self.execute_query(query)
+        
+        # Refresh planner statistics for the new indexes
+        self.execute_query("ANALYZE")
+    
+    def migrate_day_keys(self):
+        """Migration 3: indexed integer day keys for date range filters"""
+        # Generated columns are computed by SQLite itself, so they never drift from the source
+        for table, key_column, source_column in self.DAY_KEY_COLUMNS:
+            columns = [row['name'] for row in self.connection.execute(f"PRAGMA table_xinfo({table})")]
+            if key_column not in columns:
+                self.execute_query(
+                    f"""ALTER TABLE {table} ADD COLUMN {key_column} INTEGER
+                       GENERATED ALWAYS AS (CAST(strftime('%Y%m%d', {source_column}) AS INTEGER)) VIRTUAL"""
+                )
+        
+        # Replace the migration 2 indexes on raw timestamps that the day keys supersede
+        for index in ['idx_sales_staff_date', 'idx_transactions_type_date', 'idx_warranties_end_status',
+                      'idx_pawn_contracts_status_due', 'idx_repairs_created', 'idx_repairs_staff_created']:
+            self.execute_query(f"DROP INDEX IF EXISTS {index}")
+        
+        indexes = [
+            "CREATE INDEX IF NOT EXISTS idx_sales_sale_day ON sales (sale_day)",
+            "CREATE INDEX IF NOT EXISTS idx_sales_staff_day ON sales (staff_id, sale_day)",
+            "CREATE INDEX IF NOT EXISTS idx_transactions_day ON transactions (transaction_day)",
+            "CREATE INDEX IF NOT EXISTS idx_transactions_type_day ON transactions (transaction_type, transaction_day, amount)",
+            "CREATE INDEX IF NOT EXISTS idx_repairs_created_day ON repairs (created_day)",
+            "CREATE INDEX IF NOT EXISTS idx_repairs_staff_day ON repairs (staff_id, created_day)",
+            "CREATE INDEX IF NOT EXISTS idx_warranties_end_day ON warranties (end_day)",
+            "CREATE INDEX IF NOT EXISTS idx_warranties_status_end_day ON warranties (status, end_day)",
+            "CREATE INDEX IF NOT EXISTS idx_pawn_contracts_status_due_day ON pawn_contracts (status, due_day)",
+        ]
+        
+        for query in indexes:
+            self.execute_query(query)
+        
+        self.execute_query("ANALYZE")
+    
+    def migrate_product_stock(self):
+        """Migration 4: per-product stock counters maintained by triggers"""
+        self.create_product_stock_table()
+        self.create_product_stock_triggers()
+        self.rebuild_product_stock()
+    
+    def migrate_staff_performance_indexes(self):
+        """Migration 5: covering indexes for the grouped staff performance query"""
+        self.execute_query("DROP INDEX IF EXISTS idx_sales_staff_day")
+        self.execute_query("DROP INDEX IF EXISTS idx_repairs_staff_day")
+        self.execute_query(
+            "CREATE INDEX IF NOT EXISTS idx_sales_staff_day_amount ON sales (staff_id, sale_day, total_amount)"
+        )
+        self.execute_query(
+            """CREATE INDEX IF NOT EXISTS idx_repairs_staff_day_completion
+               ON repairs (staff_id, created_day, actual_completion, estimated_completion)"""
+        )
+        self.execute_query("ANALYZE")
+    
+    def migrate_daily_rollup(self):
+        """Migration 6: per-day sales and cash totals with prefix sums"""
+        self.create_daily_rollup_tables()
+        self.create_daily_rollup_triggers()
+        self.rebuild_daily_rollup()
+    
+    def migrate_search_indexes(self):
+        """Migration 7: trigram full-text indexes for the search boxes"""
+        # Customer name matches are joined back through these foreign keys
+        for table in ('repairs', 'warranties', 'pawn_contracts'):
+            self.execute_query(f"CREATE INDEX IF NOT EXISTS idx_{table}_customer ON {table} (customer_id)")
+        
+        self.create_search_indexes()
+    
+    def migrate_list_indexes(self):
+        """Migration 8: sort-order indexes for the paged inventory and warranty lists"""
+        indexes = [
+            "CREATE INDEX IF NOT EXISTS idx_inventory_created ON inventory (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_inventory_status_created ON inventory (status, created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_warranties_created ON warranties (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_warranties_status_created ON warranties (status, created_at)",
+        ]
+        
+        for query in indexes:
+            self.execute_query(query)
+        self.execute_query("ANALYZE")
+    
+    def migrate_history_indexes(self):
+        """Migration 9: sort-order index for paging pawn contracts by date"""
+        self.execute_query("CREATE INDEX IF NOT EXISTS idx_pawn_contracts_created ON pawn_contracts (created_at)")
+    
+    def migrate_table_edits(self):
+        """Migration 10: count updates and deletes of the sales history tables"""
+        self.create_table_edits_table()
+        self.create_table_edits_triggers()
+    
+    def migrate_sales_cube(self):
+        """Migration 11: sale item totals per day, product, staff and payment method"""
+        self.create_sales_cube_table()
+        self.create_sales_cube_triggers()
+        self.rebuild_sales_cube()
+    
+    def migrate_repairs_history_index(self):
+        """Migration 12: sort-order index for paging repairs by date"""
+        # Migration 3 dropped the migration 2 index on created_at in favour of the day key
+        self.execute_query("CREATE INDEX IF NOT EXISTS idx_repairs_created ON repairs (created_at)")
+    
     def create_categories_table(self):
         """Create product categories table"""
         query = """
@@ -435,6 +926,492 @@ class DatabaseManager:
         """
         self.execute_query(query)
     
+    # product_stock counters: (column, value contributed by one inventory row).
+    # {row} is 'NEW.' / 'OLD.' inside triggers and '' when rebuilding from inventory.
+    PRODUCT_STOCK_COUNTERS = [
+        ('on_hand', "{row}status IS NOT 'sold'"),
+        ('available', "{row}status IS 'available'"),
+        ('sold', "{row}status IS 'sold'"),
+        ('reserved', "{row}status IS 'reserved'"),
+        ('available_cost', "CASE WHEN {row}status IS 'available' THEN COALESCE({row}cost_price, 0) ELSE 0 END"),
+        ('available_value', "CASE WHEN {row}status IS 'available' THEN COALESCE({row}selling_price, 0) ELSE 0 END"),
+    ]
+    
+    def create_product_stock_table(self):
+        """Create per-product stock counters table"""
+        query = """
+        CREATE TABLE IF NOT EXISTS product_stock (
+            product_id INTEGER PRIMARY KEY,
+            on_hand INTEGER NOT NULL DEFAULT 0,
+            available INTEGER NOT NULL DEFAULT 0,
+            sold INTEGER NOT NULL DEFAULT 0,
+            reserved INTEGER NOT NULL DEFAULT 0,
+            available_cost REAL NOT NULL DEFAULT 0,
+            available_value REAL NOT NULL DEFAULT 0
+        )
+        """
+        self.execute_query(query)
+    
+    def create_product_stock_triggers(self):
+        """Create inventory triggers that keep product_stock in step"""
+        def apply(row, sign):
+            assignments = ', '.join(f"{column} = {column} {sign} ({expression.format(row=row)})"
+                                    for column, expression in self.PRODUCT_STOCK_COUNTERS)
+            return f"UPDATE product_stock SET {assignments} WHERE product_id = {row}product_id;"
+        
+        def ensure(row):
+            return f"INSERT OR IGNORE INTO product_stock (product_id) VALUES ({row}product_id);"
+        
+        triggers = {
+            'trg_inventory_stock_insert': ("AFTER INSERT ON inventory",
+                                           [ensure('NEW.'), apply('NEW.', '+')]),
+            'trg_inventory_stock_update': ("AFTER UPDATE OF product_id, status, cost_price, selling_price ON inventory",
+                                           [apply('OLD.', '-'), ensure('NEW.'), apply('NEW.', '+')]),
+            'trg_inventory_stock_delete': ("AFTER DELETE ON inventory",
+                                           [apply('OLD.', '-')]),
+        }
+        
+        for name, (event, statements) in triggers.items():
+            self.execute_query(f"DROP TRIGGER IF EXISTS {name}")
+            self.execute_query(f"CREATE TRIGGER {name} {event} BEGIN {' '.join(statements)} END")
+    
+    def _expected_product_stock_query(self):
+        """Build the query that recomputes product_stock from inventory"""
+        totals = ', '.join(f"SUM({expression.format(row='')}) as {column}"
+                           for column, expression in self.PRODUCT_STOCK_COUNTERS)
+        return f"SELECT product_id, {totals} FROM inventory GROUP BY product_id"
+    
+    def rebuild_product_stock(self):
+        """Recompute every product_stock row from inventory"""
+        columns = ', '.join(column for column, _ in self.PRODUCT_STOCK_COUNTERS)
+        with self.transaction():
+            self.execute_query("DELETE FROM product_stock")
+            self.execute_query(
+                f"INSERT INTO product_stock (product_id, {columns}) {self._expected_product_stock_query()}"
+            )
+    
+    def verify_product_stock(self):
+        """
+        Compare product_stock with a fresh count of inventory
+        
+        Returns:
+            list: (product_id, column, stored, expected) for every drifted counter
+        """
+        columns = [column for column, _ in self.PRODUCT_STOCK_COUNTERS]
+        expected = {row['product_id']: row for row in self.fetch_all(self._expected_product_stock_query())}
+        stored = {row['product_id']: row for row in self.fetch_all("SELECT * FROM product_stock")}
+        
+        mismatches = []
+        for product_id in sorted(set(expected) | set(stored)):
+            for column in columns:
+                stored_value = stored[product_id][column] if product_id in stored else 0
+                expected_value = expected[product_id][column] if product_id in expected else 0
+                if round(stored_value or 0, 2) != round(expected_value or 0, 2):
+                    mismatches.append((product_id, column, stored_value, expected_value))
+        return mismatches
+    
+    # daily_rollup sources: (table, day key column, columns the update trigger watches,
+    # [(rollup column, value contributed by one row)]). {row} works as in PRODUCT_STOCK_COUNTERS.
+    DAILY_ROLLUP_SOURCES = [
+        ('sales', 'sale_day', 'sale_date, total_amount, paid_amount, tax_amount, discount_amount, payment_method', [
+            ('sale_count', "1"),
+            ('revenue', "COALESCE({row}total_amount, 0)"),
+            ('paid', "COALESCE({row}paid_amount, 0)"),
+            ('tax', "COALESCE({row}tax_amount, 0)"),
+            ('discount', "COALESCE({row}discount_amount, 0)"),
+        ]),
+        ('transactions', 'transaction_day', 'transaction_type, amount, transaction_date', [
+            ('income', "CASE WHEN {row}transaction_type = 'income' THEN COALESCE({row}amount, 0) ELSE 0 END"),
+            ('expense', "CASE WHEN {row}transaction_type = 'expense' THEN COALESCE({row}amount, 0) ELSE 0 END"),
+        ]),
+    ]
+    
+    @property
+    def daily_rollup_columns(self):
+        """Get the per-day total columns of daily_rollup"""
+        return [column for _, _, _, counters in self.DAILY_ROLLUP_SOURCES for column, _ in counters]
+    
+    def create_daily_rollup_tables(self):
+        """Create daily rollup tables"""
+        totals = ',\n            '.join(
+            f"{prefix}{column} {'INTEGER' if column == 'sale_count' else 'REAL'} NOT NULL DEFAULT 0"
+            for prefix in ('', 'cum_') for column in self.daily_rollup_columns
+        )
+        
+        # One row per day; cum_* hold running totals up to and including that day
+        query = f"""
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            day INTEGER PRIMARY KEY,
+            {totals}
+        )
+        """
+        self.execute_query(query)
+        
+        query = """
+        CREATE TABLE IF NOT EXISTS daily_payment_rollup (
+            day INTEGER NOT NULL,
+            payment_method TEXT NOT NULL,
+            sale_count INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, payment_method)
+        )
+        """
+        self.execute_query(query)
+    
+    # Tables whose updates and deletes are counted in table_edits. Copies that only
+    # append new rows by id (utils.analytics_snapshot) compare the count to know
+    # when rows they already copied have changed.
+    EDIT_COUNTED_TABLES = ['sales', 'sale_items', 'transactions']
+    
+    def create_table_edits_table(self):
+        """Create the per-table edit counter table"""
+        query = """
+        CREATE TABLE IF NOT EXISTS table_edits (
+            table_name TEXT PRIMARY KEY,
+            edits INTEGER NOT NULL DEFAULT 0
+        )
+        """
+        self.execute_query(query)
+    
+    def create_table_edits_triggers(self):
+        """Create triggers that bump table_edits on every update and delete"""
+        for table in self.EDIT_COUNTED_TABLES:
+            bump = (f"INSERT INTO table_edits (table_name, edits) VALUES ('{table}', 1) "
+                    f"ON CONFLICT (table_name) DO UPDATE SET edits = edits + 1;")
+            for event in ('UPDATE', 'DELETE'):
+                name = f"trg_{table}_edits_{event.lower()}"
+                self.execute_query(f"DROP TRIGGER IF EXISTS {name}")
+                self.execute_query(f"CREATE TRIGGER {name} AFTER {event} ON {table} BEGIN {bump} END")
+    
+    def get_table_edits(self, table):
+        """Get how many times rows of an EDIT_COUNTED_TABLES table were updated or deleted"""
+        row = self.fetch_one("SELECT edits FROM table_edits WHERE table_name = ?", (table,))
+        return row[0] if row else 0
+    
+    def create_daily_rollup_triggers(self):
+        """Create sales and transactions triggers that keep the daily rollup in step"""
+        cum_columns = [f"cum_{column}" for column in self.daily_rollup_columns]
+        
+        def apply(table, day_column, counters, row, sign):
+            day = f"{row}{day_column}"
+            # Start a new day from the running totals of the closest earlier day
+            statements = [
+                f"""INSERT OR IGNORE INTO daily_rollup (day, {', '.join(cum_columns)})
+                   SELECT {day}, {', '.join(f'COALESCE(prev.{column}, 0)' for column in cum_columns)}
+                   FROM (SELECT 1) LEFT JOIN (SELECT * FROM daily_rollup WHERE day < {day}
+                                              ORDER BY day DESC LIMIT 1) prev ON 1
+                   WHERE {day} IS NOT NULL;"""
+            ]
+            
+            assignments = ', '.join(
+                f"{column} = {column} + CASE WHEN day = {day} THEN {sign}({expression.format(row=row)}) ELSE 0 END, "
+                f"cum_{column} = cum_{column} {sign} ({expression.format(row=row)})"
+                for column, expression in counters
+            )
+            statements.append(f"UPDATE daily_rollup SET {assignments} WHERE day >= {day};")
+            
+            if table == 'sales':
+                method = f"COALESCE({row}payment_method, '')"
+                statements.append(
+                    f"""INSERT OR IGNORE INTO daily_payment_rollup (day, payment_method)
+                       SELECT {day}, {method} WHERE {day} IS NOT NULL;"""
+                )
+                statements.append(
+                    f"""UPDATE daily_payment_rollup
+                       SET sale_count = sale_count {sign} 1, revenue = revenue {sign} COALESCE({row}total_amount, 0)
+                       WHERE day = {day} AND payment_method = {method};"""
+                )
+            return statements
+        
+        for table, day_column, watched, counters in self.DAILY_ROLLUP_SOURCES:
+            triggers = {
+                f'trg_{table}_rollup_insert': (f"AFTER INSERT ON {table}",
+                                               apply(table, day_column, counters, 'NEW.', '+')),
+                f'trg_{table}_rollup_update': (f"AFTER UPDATE OF {watched} ON {table}",
+                                               apply(table, day_column, counters, 'OLD.', '-') +
+                                               apply(table, day_column, counters, 'NEW.', '+')),
+                f'trg_{table}_rollup_delete': (f"AFTER DELETE ON {table}",
+                                               apply(table, day_column, counters, 'OLD.', '-')),
+            }
+            
+            for name, (event, statements) in triggers.items():
+                self.execute_query(f"DROP TRIGGER IF EXISTS {name}")
+                self.execute_query(f"CREATE TRIGGER {name} {event} BEGIN {' '.join(statements)} END")
+    
+    def _expected_daily_rollup_query(self):
+        """Build the query that recomputes per-day totals from sales and transactions"""
+        columns = self.daily_rollup_columns
+        parts = []
+        for table, day_column, _, counters in self.DAILY_ROLLUP_SOURCES:
+            expressions = dict((column, expression.format(row='')) for column, expression in counters)
+            values = ', '.join(f"{expressions.get(column, '0')} as {column}" for column in columns)
+            parts.append(f"SELECT {day_column} as day, {values} FROM {table} WHERE {day_column} IS NOT NULL")
+        
+        totals = ', '.join(f"SUM({column}) as {column}" for column in columns)
+        return f"SELECT day, {totals} FROM ({' UNION ALL '.join(parts)}) GROUP BY day"
+    
+    def rebuild_daily_rollup(self):
+        """Recompute the daily rollup tables from sales and transactions"""
+        columns = self.daily_rollup_columns
+        running = ', '.join(f"SUM({column}) OVER (ORDER BY day) as cum_{column}" for column in columns)
+        with self.transaction():
+            self.execute_query("DELETE FROM daily_rollup")
+            self.execute_query(
+                f"""INSERT INTO daily_rollup (day, {', '.join(columns)}, {', '.join(f'cum_{c}' for c in columns)})
+                   SELECT day, {', '.join(columns)}, {running}
+                   FROM ({self._expected_daily_rollup_query()})"""
+            )
+            
+            self.execute_query("DELETE FROM daily_payment_rollup")
+            self.execute_query(
+                """INSERT INTO daily_payment_rollup (day, payment_method, sale_count, revenue)
+                   SELECT sale_day, COALESCE(payment_method, ''), COUNT(*), SUM(COALESCE(total_amount, 0))
+                   FROM sales
+                   WHERE sale_day IS NOT NULL
+                   GROUP BY sale_day, COALESCE(payment_method, '')"""
+            )
+    
+    def verify_daily_rollup(self):
+        """
+        Compare daily_rollup with a fresh aggregation of sales and transactions
+        
+        Returns:
+            list: (day, column, stored, expected) for every drifted total
+        """
+        columns = self.daily_rollup_columns
+        expected = {row['day']: row for row in self.fetch_all(self._expected_daily_rollup_query())}
+        stored = {row['day']: row for row in self.fetch_all("SELECT * FROM daily_rollup")}
+        
+        mismatches = []
+        running = dict((column, 0) for column in columns)
+        for day in sorted(set(expected) | set(stored)):
+            for column in columns:
+                expected_value = (expected[day][column] if day in expected else 0) or 0
+                running[column] += expected_value
+                
+                checks = [(column, expected_value)]
+                if day in stored:
+                    checks.append((f"cum_{column}", running[column]))
+                for name, value in checks:
+                    stored_value = stored[day][name] if day in stored else 0
+                    if round(stored_value or 0, 2) != round(value, 2):
+                        mismatches.append((day, name, stored_value, value))
+        return mismatches
+    
+    # sales_cube: the dimensions making up its key and its additive measures.
+    # Products roll up to categories through products.category_id at query time.
+    SALES_CUBE_DIMENSIONS = ['day', 'product_id', 'staff_id', 'payment_method']
+    SALES_CUBE_MEASURES = ['item_count', 'quantity', 'revenue']
+    
+    def create_sales_cube_table(self):
+        """Create the sales cube table"""
+        query = """
+        CREATE TABLE IF NOT EXISTS sales_cube (
+            day INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            staff_id INTEGER NOT NULL DEFAULT 0,
+            payment_method TEXT NOT NULL DEFAULT '',
+            item_count INTEGER NOT NULL DEFAULT 0,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, product_id, staff_id, payment_method)
+        )
+        """
+        self.execute_query(query)
+    
+    def _sales_cube_source(self, item=None, sale=None, sign='+'):
+        """Build the SELECT of cube keys and measures for one sale item or all items of one sale
+        
+        item / sale is the trigger row prefix ('NEW.' or 'OLD.'); with neither,
+        every sale item is aggregated. sign negates the measures to take rows out.
+        """
+        if item is not None:
+            sales, items = 's.', item
+            source = f"FROM sales s WHERE s.id = {item}sale_id AND s.sale_day IS NOT NULL"
+        elif sale is not None:
+            sales, items = sale, 'si.'
+            source = f"FROM sale_items si WHERE si.sale_id = {sale}id AND {sale}sale_day IS NOT NULL"
+        else:
+            sales, items = 's.', 'si.'
+            source = "FROM sale_items si JOIN sales s ON si.sale_id = s.id WHERE s.sale_day IS NOT NULL"
+        
+        keys = (f"{sales}sale_day, {items}product_id, COALESCE({sales}staff_id, 0), "
+                f"COALESCE({sales}payment_method, '')")
+        measures = (f"{sign}COUNT(*), {sign}SUM(COALESCE({items}quantity, 0)), "
+                    f"{sign}SUM(COALESCE({items}total_price, 0))")
+        return f"SELECT {keys}, {measures} {source} GROUP BY {keys}"
+    
+    def _sales_cube_upsert(self, source):
+        """Build the statement adding the rows of a _sales_cube_source() SELECT to sales_cube"""
+        dimensions = ', '.join(self.SALES_CUBE_DIMENSIONS)
+        measures = ', '.join(self.SALES_CUBE_MEASURES)
+        assignments = ', '.join(f"{column} = {column} + excluded.{column}" for column in self.SALES_CUBE_MEASURES)
+        return (f"INSERT INTO sales_cube ({dimensions}, {measures}) {source} "
+                f"ON CONFLICT ({dimensions}) DO UPDATE SET {assignments};")
+    
+    def create_sales_cube_triggers(self):
+        """Create sales and sale_items triggers that keep the sales cube in step"""
+        add, remove = '+', '-'
+        triggers = {
+            'trg_sale_items_cube_insert': ("AFTER INSERT ON sale_items",
+                                           [self._sales_cube_source(item='NEW.', sign=add)]),
+            'trg_sale_items_cube_update': ("AFTER UPDATE OF sale_id, product_id, quantity, total_price ON sale_items",
+                                           [self._sales_cube_source(item='OLD.', sign=remove),
+                                            self._sales_cube_source(item='NEW.', sign=add)]),
+            'trg_sale_items_cube_delete': ("AFTER DELETE ON sale_items",
+                                           [self._sales_cube_source(item='OLD.', sign=remove)]),
+            'trg_sales_cube_update': ("AFTER UPDATE OF sale_date, staff_id, payment_method ON sales",
+                                      [self._sales_cube_source(sale='OLD.', sign=remove),
+                                       self._sales_cube_source(sale='NEW.', sign=add)]),
+            'trg_sales_cube_delete': ("AFTER DELETE ON sales",
+                                      [self._sales_cube_source(sale='OLD.', sign=remove)]),
+        }
+        
+        for name, (event, sources) in triggers.items():
+            statements = ' '.join(self._sales_cube_upsert(source) for source in sources)
+            self.execute_query(f"DROP TRIGGER IF EXISTS {name}")
+            self.execute_query(f"CREATE TRIGGER {name} {event} BEGIN {statements} END")
+    
+    def rebuild_sales_cube(self):
+        """Recompute the sales cube from sales and sale items"""
+        with self.transaction():
+            self.execute_query("DELETE FROM sales_cube")
+            self.execute_query(self._sales_cube_upsert(self._sales_cube_source()))
+    
+    def verify_sales_cube(self):
+        """
+        Compare sales_cube with a fresh aggregation of sales and sale items
+        
+        Returns:
+            list: (key, column, stored, expected) for every drifted total
+        """
+        width = len(self.SALES_CUBE_DIMENSIONS)
+        expected = dict((tuple(row[:width]), row[width:])
+                        for row in self.fetch_all(self._sales_cube_source()))
+        stored = dict((tuple(row[:width]), row[width:]) for row in self.fetch_all(
+            f"SELECT {', '.join(self.SALES_CUBE_DIMENSIONS + self.SALES_CUBE_MEASURES)} FROM sales_cube"
+        ))
+        
+        mismatches = []
+        for key in sorted(set(expected) | set(stored)):
+            for index, column in enumerate(self.SALES_CUBE_MEASURES):
+                expected_value = expected[key][index] if key in expected else 0
+                stored_value = stored[key][index] if key in stored else 0
+                if round(stored_value or 0, 2) != round(expected_value or 0, 2):
+                    mismatches.append((key, column, stored_value, expected_value))
+        return mismatches
+    
+    # Full-text search indexes: entity table -> (indexed columns, customer foreign key or None).
+    # Entities with a customer key also match on the customer's name.
+    SEARCH_INDEXES = {
+        'products': (['name', 'brand', 'model', 'barcode', 'sku'], None),
+        'inventory': (['imei', 'serial_number'], None),
+        'customers': (['name', 'phone'], None),
+        'repairs': (['repair_number', 'imei', 'device_info'], 'customer_id'),
+        'warranties': (['warranty_number', 'imei'], 'customer_id'),
+        'pawn_contracts': (['contract_number', 'item_description'], 'customer_id'),
+    }
+    
+    def fts5_available(self):
+        """Check whether this SQLite build has FTS5 with the trigram tokenizer"""
+        try:
+            self.connection.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(value, tokenize='trigram')")
+            self.connection.execute("DROP TABLE temp.fts5_probe")
+            return True
+        except sqlite3.OperationalError:
+            return False
+    
+    def create_search_indexes(self):
+        """Create external-content FTS5 tables and the triggers that keep them in step"""
+        if not self.fts5_available():
+            print("FTS5 trigram tokenizer not available, search falls back to LIKE")
+            return
+        
+        self._search_indexes = None
+        for table, (columns, _) in self.SEARCH_INDEXES.items():
+            fts = f"{table}_fts"
+            self.execute_query(
+                f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+                   USING fts5({', '.join(columns)}, content='{table}', content_rowid='id', tokenize='trigram')"""
+            )
+            
+            names = ', '.join(columns)
+            new_values = ', '.join(f"NEW.{column}" for column in columns)
+            old_values = ', '.join(f"OLD.{column}" for column in columns)
+            insert = f"INSERT INTO {fts} (rowid, {names}) VALUES (NEW.id, {new_values});"
+            delete = f"INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.id, {old_values});"
+            
+            triggers = {
+                f'trg_{table}_fts_insert': (f"AFTER INSERT ON {table}", insert),
+                f'trg_{table}_fts_update': (f"AFTER UPDATE OF {names} ON {table}", f"{delete} {insert}"),
+                f'trg_{table}_fts_delete': (f"AFTER DELETE ON {table}", delete),
+            }
+            
+            for name, (event, body) in triggers.items():
+                self.execute_query(f"DROP TRIGGER IF EXISTS {name}")
+                self.execute_query(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+        
+        self.rebuild_search_indexes()
+    
+    def rebuild_search_indexes(self):
+        """Re-index every full-text table from its content table"""
+        for table in self.SEARCH_INDEXES:
+            if self.has_search_index(table):
+                self.execute_query(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+    
+    def has_search_index(self, entity):
+        """Check whether the full-text table of an entity exists"""
+        if self._search_indexes is None:
+            rows = self.fetch_all("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%!_fts' ESCAPE '!'")
+            self._search_indexes = {row['name'][:-len('_fts')] for row in rows}
+        return entity in self._search_indexes
+    
+    def search(self, entity, text, limit=None):
+        """
+        Find rows of an entity whose indexed columns contain a text
+        
+        Args:
+            entity: Key of SEARCH_INDEXES, e.g. 'products'
+            text: Substring to look for, case-insensitive
+            limit: Maximum number of ids, defaults to DATABASE_CONFIG['SEARCH_LIMIT']
+        
+        Returns:
+            list: Matching row ids, best match first
+        """
+        columns, customer_column = self.SEARCH_INDEXES[entity]
+        text = (text or '').strip()
+        limit = limit or DATABASE_CONFIG['SEARCH_LIMIT']
+        if not text:
+            return []
+        
+        # Trigrams need at least three characters; shorter terms scan with LIKE
+        if len(text) >= 3 and self.has_search_index(entity):
+            phrase = '"' + text.replace('"', '""') + '"'
+            matches = f"SELECT rowid as id, rank FROM {entity}_fts WHERE {entity}_fts MATCH ?"
+            params = [phrase]
+            
+            if customer_column and self.has_search_index('customers'):
+                # Customer name hits rank after direct hits
+                matches += f"""
+                UNION ALL
+                SELECT e.id, 0 as rank
+                FROM customers_fts
+                JOIN {entity} e ON e.{customer_column} = customers_fts.rowid
+                WHERE customers_fts MATCH ?"""
+                params.append(f"name : {phrase}")
+            
+            query = f"SELECT id FROM ({matches}) GROUP BY id ORDER BY MIN(rank), id DESC LIMIT ?"
+        else:
+            conditions = [f"LOWER({column}) LIKE ?" for column in columns]
+            if customer_column:
+                conditions.append(f"{customer_column} IN (SELECT id FROM customers WHERE LOWER(name) LIKE ?)")
+            
+            query = f"SELECT id FROM {entity} WHERE {' OR '.join(conditions)} ORDER BY id DESC LIMIT ?"
+            params = [f"%{text.lower()}%"] * len(conditions)
+        
+        params.append(limit)
+        return [row['id'] for row in self.fetch_all(query, params)]
+    
     def insert_default_data(self):
         """Insert default data into tables"""
         try:
@@ -9,8 +9,11 @@ from tkinter import ttk, messagebox
 from datetime import datetime, date, timedelta
 import calendar
 
-from models import Transaction
 from config import BUSINESS_RULES
+from gui.query_executor import QueryExecutor, LoadingIndicator
+from gui.tree_binder import TreeBinder
+from gui.history_pager import HistoryPager
+from utils.rollup_utils import get_rollup_totals
 
 class FinancialTab:
     def __init__(self, parent, db_manager, current_user):
@@ -19,6 +22,8 @@ class FinancialTab:
         self.current_user = current_user
         
         self.frame = ttk.Frame(parent)
+        self.query_executor = QueryExecutor.for_widget(self.frame, db_manager)
+        self.loading_indicator = LoadingIndicator(self.frame)
         self.setup_ui()
         self.load_data()
     
@@ -253,6 +258,7 @@ class FinancialTab:
                                             show='headings',
                                             yscrollcommand=v_scrollbar.set,
                                             xscrollcommand=h_scrollbar.set)
+        self.transactions_binder = TreeBinder(self.transactions_tree)
         
         # Configure scrollbars
         v_scrollbar.config(command=self.transactions_tree.yview)
@@ -281,6 +287,12 @@ class FinancialTab:
         
         # Bind double-click
         self.transactions_tree.bind('<Double-1>', lambda e: self.edit_transaction())
+        
+        # Newer / older pages instead of a fixed LIMIT
+        self.transactions_pager = HistoryPager(transactions_frame, self.query_executor, 'financial.transactions',
+                                               'transaction_date', self.populate_transactions,
+                                               indicator=self.loading_indicator)
+        self.transactions_pager.frame.pack(fill=tk.X, padx=10, pady=(0, 10))
     
     def setup_debts_tab(self):
         """Setup debts management tab"""
@@ -419,32 +431,27 @@ class FinancialTab:
         self.refresh_debts()
         self.refresh_cash_sources()
     
+    def release_data(self):
+        """Drop the loaded lists while the tab is hidden; load_data() reads them again"""
+        self.transactions_binder.clear()
+        for tree in (self.customer_debts_tree, self.supplier_debts_tree, self.cash_sources_tree):
+            tree.delete(*tree.get_children())
+    
     def refresh_dashboard(self):
         """Refresh dashboard data"""
         try:
             # Today's data
-            today = date.today().strftime('%Y-%m-%d')
+            today = date.today()
+            today_totals = get_rollup_totals(self.db_manager, today, today)
             
             # Today's revenue
-            today_revenue = self.db_manager.fetch_one(
-                """SELECT COALESCE(SUM(amount), 0) as total 
-                   FROM transactions 
-                   WHERE transaction_type = 'income' AND DATE(transaction_date) = ?""",
-                (today,)
-            )
-            self.today_revenue_label.config(text=f"{today_revenue['total']:,.0f} VNĐ")
+            self.today_revenue_label.config(text=f"{today_totals['income']:,.0f} VNĐ")
             
             # Today's expenses
-            today_expenses = self.db_manager.fetch_one(
-                """SELECT COALESCE(SUM(amount), 0) as total 
-                   FROM transactions 
-                   WHERE transaction_type = 'expense' AND DATE(transaction_date) = ?""",
-                (today,)
-            )
-            self.today_expenses_label.config(text=f"{today_expenses['total']:,.0f} VNĐ")
+            self.today_expenses_label.config(text=f"{today_totals['expense']:,.0f} VNĐ")
             
             # Today's profit
-            today_profit = today_revenue['total'] - today_expenses['total']
+            today_profit = today_totals['income'] - today_totals['expense']
             self.today_profit_label.config(text=f"{today_profit:,.0f} VNĐ")
             
             # Set profit color
@@ -504,28 +511,15 @@ class FinancialTab:
             else:
                 this_month_end = date(selected_year, selected_month + 1, 1) - timedelta(days=1)
             
-            # This month revenue
-            this_month_revenue = self.db_manager.fetch_one(
-                """SELECT COALESCE(SUM(amount), 0) as total 
-                   FROM transactions 
-                   WHERE transaction_type = 'income' 
-                   AND DATE(transaction_date) BETWEEN ? AND ?""",
-                (this_month_start.strftime('%Y-%m-%d'), this_month_end.strftime('%Y-%m-%d'))
-            )
+            # This month revenue and expenses
+            this_month = get_rollup_totals(self.db_manager, this_month_start, this_month_end)
+            this_month_revenue = this_month['income']
+            this_month_expenses = this_month['expense']
             
-            # This month expenses
-            this_month_expenses = self.db_manager.fetch_one(
-                """SELECT COALESCE(SUM(amount), 0) as total 
-                   FROM transactions 
-                   WHERE transaction_type = 'expense' 
-                   AND DATE(transaction_date) BETWEEN ? AND ?""",
-                (this_month_start.strftime('%Y-%m-%d'), this_month_end.strftime('%Y-%m-%d'))
-            )
+            this_month_profit = this_month_revenue - this_month_expenses
             
-            this_month_profit = this_month_revenue['total'] - this_month_expenses['total']
-            
-            self.this_month_revenue_label.config(text=f"Doanh thu: {this_month_revenue['total']:,.0f} VNĐ")
-            self.this_month_expenses_label.config(text=f"Chi phí: {this_month_expenses['total']:,.0f} VNĐ")
+            self.this_month_revenue_label.config(text=f"Doanh thu: {this_month_revenue:,.0f} VNĐ")
+            self.this_month_expenses_label.config(text=f"Chi phí: {this_month_expenses:,.0f} VNĐ")
             self.this_month_profit_label.config(text=f"Lợi nhuận: {this_month_profit:,.0f} VNĐ")
             
             # Last month
@@ -539,36 +533,23 @@ class FinancialTab:
             last_month_start = date(last_year, last_month, 1)
             last_month_end = date(selected_year, selected_month, 1) - timedelta(days=1)
             
-            # Last month revenue
-            last_month_revenue = self.db_manager.fetch_one(
-                """SELECT COALESCE(SUM(amount), 0) as total 
-                   FROM transactions 
-                   WHERE transaction_type = 'income' 
-                   AND DATE(transaction_date) BETWEEN ? AND ?""",
-                (last_month_start.strftime('%Y-%m-%d'), last_month_end.strftime('%Y-%m-%d'))
-            )
-            
-            # Last month expenses
-            last_month_expenses = self.db_manager.fetch_one(
-                """SELECT COALESCE(SUM(amount), 0) as total 
-                   FROM transactions 
-                   WHERE transaction_type = 'expense' 
-                   AND DATE(transaction_date) BETWEEN ? AND ?""",
-                (last_month_start.strftime('%Y-%m-%d'), last_month_end.strftime('%Y-%m-%d'))
-            )
+            # Last month revenue and expenses
+            last_month = get_rollup_totals(self.db_manager, last_month_start, last_month_end)
+            last_month_revenue = last_month['income']
+            last_month_expenses = last_month['expense']
             
-            last_month_profit = last_month_revenue['total'] - last_month_expenses['total']
+            last_month_profit = last_month_revenue - last_month_expenses
             
-            self.last_month_revenue_label.config(text=f"Doanh thu: {last_month_revenue['total']:,.0f} VNĐ")
-            self.last_month_expenses_label.config(text=f"Chi phí: {last_month_expenses['total']:,.0f} VNĐ")
+            self.last_month_revenue_label.config(text=f"Doanh thu: {last_month_revenue:,.0f} VNĐ")
+            self.last_month_expenses_label.config(text=f"Chi phí: {last_month_expenses:,.0f} VNĐ")
             self.last_month_profit_label.config(text=f"Lợi nhuận: {last_month_profit:,.0f} VNĐ")
             
             # Calculate growth
             revenue_growth = 0
             profit_growth = 0
             
-            if last_month_revenue['total'] > 0:
-                revenue_growth = ((this_month_revenue['total'] - last_month_revenue['total']) / last_month_revenue['total']) * 100
+            if last_month_revenue > 0:
+                revenue_growth = ((this_month_revenue - last_month_revenue) / last_month_revenue) * 100
             
             if last_month_profit != 0:
                 profit_growth = ((this_month_profit - last_month_profit) / abs(last_month_profit)) * 100
@@ -597,20 +578,19 @@ class FinancialTab:
     
     def refresh_transactions(self):
         """Refresh transactions list"""
-        # Clear existing items
-        for item in self.transactions_tree.get_children():
-            self.transactions_tree.delete(item)
-        
         # Load transactions
         query = """
         SELECT t.*, s.full_name as staff_name
         FROM transactions t
         LEFT JOIN staff s ON t.staff_id = s.id
-        ORDER BY t.transaction_date DESC
-        LIMIT 1000
         """
         
-        transactions = self.db_manager.fetch_all(query)
+        self.transactions_pager.set_query(query)
+    
+    def populate_transactions(self, transactions):
+        """Fill transactions tree with query results"""
+        # Collected rows go through the binder, which only applies the differences
+        rows = []
         
         for trans in transactions:
             trans_date = datetime.fromisoformat(trans['transaction_date']).strftime('%d/%m/%Y %H:%M')
@@ -621,7 +601,7 @@ class FinancialTab:
             if trans['reference_type'] and trans['reference_id']:
                 reference = f"{trans['reference_type']}#{trans['reference_id']}"
             
-            self.transactions_tree.insert('', 'end', values=(
+            rows.append((trans['id'], (
                 trans['id'],
                 trans_date,
                 trans_type,
@@ -630,7 +610,9 @@ class FinancialTab:
                 trans['payment_method'] or '',
                 reference,
                 trans['staff_name'] or ''
-            ))
+            )))
+        
+        self.transactions_binder.update(rows)
     
     def filter_transactions(self):
         """Filter transactions by date and type"""
@@ -642,50 +624,25 @@ class FinancialTab:
             messagebox.showwarning("Cảnh báo", "Vui lòng nhập đầy đủ khoảng thời gian!")
             return
         
-        # Clear existing items
-        for item in self.transactions_tree.get_children():
-            self.transactions_tree.delete(item)
-        
         # Build query
         if trans_type == "all":
             query = """
             SELECT t.*, s.full_name as staff_name
             FROM transactions t
             LEFT JOIN staff s ON t.staff_id = s.id
-            WHERE DATE(t.transaction_date) BETWEEN ? AND ?
-            ORDER BY t.transaction_date DESC
+            WHERE t.transaction_day BETWEEN ? AND ?
             """
-            params = (from_date, to_date)
+            params = (self.db_manager.day_key(from_date), self.db_manager.day_key(to_date))
         else:
             query = """
             SELECT t.*, s.full_name as staff_name
             FROM transactions t
             LEFT JOIN staff s ON t.staff_id = s.id
-            WHERE DATE(t.transaction_date) BETWEEN ? AND ? AND t.transaction_type = ?
-            ORDER BY t.transaction_date DESC
+            WHERE t.transaction_day BETWEEN ? AND ? AND t.transaction_type = ?
             """
-            params = (from_date, to_date, trans_type)
+            params = (self.db_manager.day_key(from_date), self.db_manager.day_key(to_date), trans_type)
         
-        transactions = self.db_manager.fetch_all(query, params)
-        
-        for trans in transactions:
-            trans_date = datetime.fromisoformat(trans['transaction_date']).strftime('%d/%m/%Y %H:%M')
-            trans_type_display = "Thu" if trans['transaction_type'] == 'income' else "Chi"
-            
-            reference = ""
-            if trans['reference_type'] and trans['reference_id']:
-                reference = f"{trans['reference_type']}#{trans['reference_id']}"
-            
-            self.transactions_tree.insert('', 'end', values=(
-                trans['id'],
-                trans_date,
-                trans_type_display,
-                f"{trans['amount']:,.0f}",
-                trans['description'] or '',
-                trans['payment_method'] or '',
-                reference,
-                trans['staff_name'] or ''
-            ))
+        self.transactions_pager.set_query(query, params)
     
     def add_income(self):
         """Add income transaction"""
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+History list paging controls for ChViet Mobile Store Management System
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime, timedelta
+
+from config import DATABASE_CONFIG
+
+class HistoryPager:
+    """Newest-first paging with newer / older / jump-to-date buttons
+    
+    Pages come from DatabaseManager.paginate(), so moving through years
+    of history costs the same per page as the first one. Each page reads
+    one extra row to know whether there is anything older.
+    """
+    
+    def __init__(self, parent, executor, key, order_key, on_rows, indicator=None, page_size=None):
+        self.executor = executor
+        self.key = key
+        self.order_key = order_key
+        self.on_rows = on_rows
+        self.indicator = indicator
+        self.page_size = page_size or DATABASE_CONFIG['PAGE_SIZE']
+        
+        self.query = None
+        self.params = ()
+        self._rows = []
+        
+        self.frame = ttk.Frame(parent)
+        
+        self.first_button = ttk.Button(self.frame, text="⏮ Mới nhất", command=self.first)
+        self.first_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.newer_button = ttk.Button(self.frame, text="◀ Mới hơn", command=self.newer)
+        self.newer_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.older_button = ttk.Button(self.frame, text="Cũ hơn ▶", command=self.older)
+        self.older_button.pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.range_label = ttk.Label(self.frame, text="")
+        self.range_label.pack(side=tk.LEFT, padx=10)
+        
+        ttk.Button(self.frame, text="Đi", command=self.jump_to_date).pack(side=tk.RIGHT)
+        self.date_var = tk.StringVar()
+        date_entry = ttk.Entry(self.frame, textvariable=self.date_var, width=12)
+        date_entry.pack(side=tk.RIGHT, padx=5)
+        date_entry.bind('<Return>', lambda e: self.jump_to_date())
+        ttk.Label(self.frame, text="Đến ngày (YYYY-MM-DD):").pack(side=tk.RIGHT)
+    
+    def set_query(self, query, params=()):
+        """Page through a new query, starting with the newest rows
+        
+        Args:
+            query: SELECT without ORDER BY or LIMIT, with order_key and id columns
+            params: Parameters of query
+        """
+        self.query = query
+        self.params = params
+        self.first()
+    
+    def first(self):
+        """Show the newest rows"""
+        self._load()
+    
+    def older(self):
+        """Show the page after the last row shown"""
+        if self._rows:
+            self._load(after=self._cursor(self._rows[-1]))
+    
+    def newer(self):
+        """Show the page before the first row shown"""
+        if self._rows:
+            self._load(before=self._cursor(self._rows[0]))
+    
+    def jump_to_date(self):
+        """Show the newest rows on or before the entered date"""
+        try:
+            day = datetime.strptime(self.date_var.get().strip(), '%Y-%m-%d').date()
+        except ValueError:
+            messagebox.showerror("Lỗi", "Ngày không hợp lệ! Định dạng: YYYY-MM-DD")
+            return
+        
+        # Everything dated before the next day, ties included
+        self._load(after=((day + timedelta(days=1)).isoformat(), 0))
+    
+    def _cursor(self, row):
+        """Get the keyset cursor of a row"""
+        return (row[self.order_key], row['id'])
+    
+    def _load(self, after=None, before=None):
+        """Read a page on the query executor"""
+        if self.query is None:
+            return
+        
+        db_manager = self.executor.db_manager
+        query, params, order_key, size = self.query, self.params, self.order_key, self.page_size + 1
+        
+        def read():
+            return db_manager.paginate(query, order_key, size, params,
+                                       after=after, before=before, descending=True)
+        
+        self.executor.submit_call(read, on_done=lambda rows: self.on_page(rows, after, before),
+                                  key=self.key, indicator=self.indicator)
+    
+    def on_page(self, rows, after, before):
+        """Show a page and update the buttons"""
+        more = len(rows) > self.page_size
+        if before is not None:
+            # A short page of newer rows means we reached the top
+            if not more:
+                self.first()
+                return
+            rows = rows[1:]
+            has_newer, has_older = True, True
+        else:
+            rows = rows[:self.page_size]
+            has_newer, has_older = after is not None, more
+        
+        self._rows = rows
+        self.newer_button.state(['!disabled'] if has_newer else ['disabled'])
+        self.first_button.state(['!disabled'] if has_newer else ['disabled'])
+        self.older_button.state(['!disabled'] if has_older else ['disabled'])
+        if rows:
+            newest, oldest = str(rows[0][self.order_key])[:10], str(rows[-1][self.order_key])[:10]
+            self.range_label.config(text=f"{newest} → {oldest} ({len(rows)} dòng)")
+        else:
+            self.range_label.config(text="Không có dữ liệu")
+        
+        self.on_rows(rows)
@@ -7,11 +7,17 @@ Inventory management tab for ChViet Mobile Store Management System
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date
+import json
 import uuid
 
-from models import Product, InventoryItem
 from utils.barcode_utils import generate_barcode
-from config import BUSINESS_RULES
+from config import BUSINESS_RULES, DATABASE_CONFIG
+from gui.query_executor import QueryExecutor, LoadingIndicator
+from gui.tree_binder import TreeBinder
+from gui.virtual_tree import VirtualTree, KeysetSource
+from gui.search_controller import SearchController
+from utils.catalog_cache import CatalogCache
+from utils.lookup_cache import LookupCache
 
 class InventoryTab:
     def __init__(self, parent, db_manager, current_user):
@@ -20,6 +26,10 @@ class InventoryTab:
         self.current_user = current_user
         
         self.frame = ttk.Frame(parent)
+        self.query_executor = QueryExecutor.for_widget(self.frame, db_manager)
+        self.lookups = LookupCache.for_manager(db_manager)
+        self.loading_indicator = LoadingIndicator(self.frame)
+        self.catalog = CatalogCache.for_manager(db_manager)
         self.setup_ui()
         self.load_data()
     
@@ -57,7 +67,11 @@ class InventoryTab:
         
         ttk.Label(search_frame, text="Tìm kiếm:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
         self.product_search_var = tk.StringVar()
-        self.product_search_var.trace('w', self.on_product_search)
+        self.product_search = SearchController(
+            self.product_search_var, self.search_products, self.populate_products, self.refresh_products,
+            self.query_executor, 'inventory.products', ('name', 'brand', 'model', 'barcode', 'sku'),
+            indicator=self.loading_indicator
+        )
         search_entry = ttk.Entry(search_frame, textvariable=self.product_search_var, width=50)
         search_entry.grid(row=0, column=1, sticky=tk.W, padx=(0, 10))
         
@@ -89,6 +103,7 @@ class InventoryTab:
                                          show='headings',
                                          yscrollcommand=v_scrollbar.set,
                                          xscrollcommand=h_scrollbar.set)
+        self.products_binder = TreeBinder(self.products_tree)
         
         # Configure scrollbars
         v_scrollbar.config(command=self.products_tree.yview)
@@ -134,10 +149,22 @@ class InventoryTab:
         
         ttk.Label(search_frame, text="IMEI/Serial:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
         self.inventory_search_var = tk.StringVar()
-        self.inventory_search_var.trace('w', self.on_inventory_search)
+        self.inventory_search = SearchController(
+            self.inventory_search_var, self.search_inventory, self.show_inventory_matches, self.clear_inventory_search,
+            self.query_executor, 'inventory.inventory', ('imei', 'serial_number'),
+            indicator=self.loading_indicator
+        )
         search_entry = ttk.Entry(search_frame, textvariable=self.inventory_search_var, width=50)
         search_entry.grid(row=0, column=1, sticky=tk.W, padx=(0, 10))
         
+        ttk.Label(search_frame, text="Trạng thái:").grid(row=0, column=2, sticky=tk.W, padx=(0, 5))
+        self.inventory_status_var = tk.StringVar(value="Tất cả")
+        status_combo = ttk.Combobox(search_frame, textvariable=self.inventory_status_var, width=15,
+                                    values=['Tất cả', 'available', 'sold', 'reserved', 'repair', 'damaged'],
+                                    state="readonly")
+        status_combo.grid(row=0, column=3, sticky=tk.W)
+        status_combo.bind('<<ComboboxSelected>>', lambda e: self.filter_inventory())
+        
         # Control buttons
         btn_frame = ttk.Frame(top_frame)
         btn_frame.pack(fill=tk.X)
@@ -166,11 +193,9 @@ class InventoryTab:
                                           columns=('id', 'product', 'imei', 'serial', 'condition',
                                                  'status', 'cost_price', 'selling_price', 'location'),
                                           show='headings',
-                                          yscrollcommand=v_scrollbar.set,
                                           xscrollcommand=h_scrollbar.set)
         
         # Configure scrollbars
-        v_scrollbar.config(command=self.inventory_tree.yview)
         h_scrollbar.config(command=self.inventory_tree.xview)
         
         # Column headings
@@ -190,6 +215,18 @@ class InventoryTab:
             self.inventory_tree.heading(col, text=heading)
             self.inventory_tree.column(col, width=width, minwidth=50)
         
+        # Only the visible rows exist in the tree; pages are read as it scrolls
+        self.inventory_view = VirtualTree(
+            self.inventory_tree, v_scrollbar, self.query_executor, 'inventory.list',
+            KeysetSource(self.db_manager, "i.*, p.name as product_name, p.brand, p.model",
+                         "inventory i LEFT JOIN products p ON i.product_id = p.id", 'i.id',
+                         count_tables="inventory i"),
+            self.format_inventory_row,
+            {'id': 'i.id', 'imei': 'i.imei'},
+            ('i.created_at', True),
+            indicator=self.loading_indicator
+        )
+        
         # Pack treeview and scrollbars
         self.inventory_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -242,26 +279,34 @@ class InventoryTab:
         self.refresh_inventory()
         self.refresh_categories()
     
+    def release_data(self):
+        """Drop the loaded lists while the tab is hidden; load_data() reads them again"""
+        self.product_search.clear_cache()
+        self.inventory_search.clear_cache()
+        self.products_binder.clear()
+        self.inventory_view.release()
+    
     def refresh_products(self):
         """Refresh products list"""
-        # Clear existing items
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-        
         # Load products with stock information
         query = """
         SELECT p.*, c.name as category_name,
-               COUNT(i.id) as stock_count,
-               COUNT(CASE WHEN i.status = 'available' THEN 1 END) as available_count
+               COALESCE(ps.on_hand + ps.sold, 0) as stock_count,
+               COALESCE(ps.available, 0) as available_count
         FROM products p
         LEFT JOIN categories c ON p.category_id = c.id
-        LEFT JOIN inventory i ON p.id = i.product_id
+        LEFT JOIN product_stock ps ON p.id = ps.product_id
         WHERE p.is_active = 1
-        GROUP BY p.id
         ORDER BY p.name
         """
         
-        products = self.db_manager.fetch_all(query)
+        self.query_executor.submit(query, on_done=self.populate_products,
+                                   key='inventory.products', indicator=self.loading_indicator)
+    
+    def populate_products(self, products):
+        """Fill products tree with query results"""
+        # Collected rows go through the binder, which only applies the differences
+        rows = []
         
         for product in products:
             stock_text = f"{product['available_count']}/{product['stock_count']}"
@@ -271,7 +316,7 @@ class InventoryTab:
             if product['available_count'] <= BUSINESS_RULES['LOW_STOCK_THRESHOLD']:
                 status = "⚠️ Sắp hết hàng"
             
-            self.products_tree.insert('', 'end', values=(
+            rows.append((product['id'], (
                 product['id'],
                 product['name'],
                 product['brand'] or '',
@@ -281,40 +326,49 @@ class InventoryTab:
                 f"{product['selling_price']:,.0f}",
                 stock_text,
                 status
-            ))
+            )))
+        
+        self.products_binder.update(rows)
     
     def refresh_inventory(self):
         """Refresh inventory list"""
-        # Clear existing items
-        for item in self.inventory_tree.get_children():
-            self.inventory_tree.delete(item)
-        
-        # Load inventory with product information
-        query = """
-        SELECT i.*, p.name as product_name, p.brand, p.model
-        FROM inventory i
-        JOIN products p ON i.product_id = p.id
-        ORDER BY i.created_at DESC
-        """
-        
-        inventory_items = self.db_manager.fetch_all(query)
-        
-        for item in inventory_items:
-            product_display = f"{item['product_name']}"
-            if item['brand']:
-                product_display += f" ({item['brand']})"
+        self.inventory_search.clear_cache()
+        self.inventory_view.refresh()
+    
+    def filter_inventory(self):
+        """Filter inventory items by status"""
+        status = self.inventory_status_var.get()
+        if status == "Tất cả":
+            self.inventory_view.set_filter('status', None)
+        else:
+            self.inventory_view.set_filter('status', "i.status = ?", (status,))
+    
+    def show_inventory_matches(self, inventory_items):
+        """Limit the inventory list to search results"""
+        ids = [item['id'] for item in inventory_items]
+        self.inventory_view.set_filter('search', "i.id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))
+    
+    def clear_inventory_search(self):
+        """Show all inventory items again"""
+        self.inventory_view.set_filter('search', None)
             
-            self.inventory_tree.insert('', 'end', values=(
-                item['id'],
-                product_display,
-                item['imei'] or '',
-                item['serial_number'] or '',
-                item['condition'] or 'new',
-                item['status'] or 'available',
-                f"{(item['cost_price'] or 0):,.0f}",
-                f"{(item['selling_price'] or 0):,.0f}",
-                item['location'] or ''
-            ))
+    def format_inventory_row(self, item):
+        """Build the tree values of an inventory item"""
+        product_display = f"{item['product_name']}"
+        if item['brand']:
+            product_display += f" ({item['brand']})"
+        
+        return (
+            item['id'],
+            product_display,
+            item['imei'] or '',
+            item['serial_number'] or '',
+            item['condition'] or 'new',
+            item['status'] or 'available',
+            f"{(item['cost_price'] or 0):,.0f}",
+            f"{(item['selling_price'] or 0):,.0f}",
+            item['location'] or ''
+        )
     
     def refresh_categories(self):
         """Refresh categories list"""
@@ -341,101 +395,37 @@ class InventoryTab:
                 category['product_count']
             ))
     
-    def on_product_search(self, *args):
-        """Handle product search"""
-        search_term = self.product_search_var.get().lower()
-        
-        # If search is empty, show all products
-        if not search_term:
-            self.refresh_products()
-            return
-        
-        # Clear existing items
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-        
-        # Search products
+    def search_products(self, search_term):
+        """Search products, best match first"""
         query = """
         SELECT p.*, c.name as category_name,
-               COUNT(i.id) as stock_count,
-               COUNT(CASE WHEN i.status = 'available' THEN 1 END) as available_count
-        FROM products p
+               COALESCE(ps.on_hand + ps.sold, 0) as stock_count,
+               COALESCE(ps.available, 0) as available_count
+        FROM json_each(?) m
+        JOIN products p ON p.id = m.value
         LEFT JOIN categories c ON p.category_id = c.id
-        LEFT JOIN inventory i ON p.id = i.product_id
-        WHERE p.is_active = 1 AND (
-            LOWER(p.name) LIKE ? OR
-            LOWER(p.brand) LIKE ? OR
-            LOWER(p.model) LIKE ? OR
-            p.barcode LIKE ? OR
-            p.sku LIKE ?
-        )
-        GROUP BY p.id
-        ORDER BY p.name
+        LEFT JOIN product_stock ps ON p.id = ps.product_id
+        WHERE p.is_active = 1
+        ORDER BY m.key
         """
         
-        search_pattern = f"%{search_term}%"
-        products = self.db_manager.fetch_all(query, (search_pattern, search_pattern, 
-                                                    search_pattern, search_pattern, search_pattern))
+        ids = self.db_manager.search('products', search_term)
+        rows = self.db_manager.fetch_all(query, (json.dumps(ids),))
+        return rows, len(ids) < DATABASE_CONFIG['SEARCH_LIMIT']
         
-        for product in products:
-            stock_text = f"{product['available_count']}/{product['stock_count']}"
-            status = "Hoạt động" if product['is_active'] else "Tạm dừng"
-            
-            if product['available_count'] <= BUSINESS_RULES['LOW_STOCK_THRESHOLD']:
-                status = "⚠️ Sắp hết hàng"
-            
-            self.products_tree.insert('', 'end', values=(
-                product['id'],
-                product['name'],
-                product['brand'] or '',
-                product['model'] or '',
-                product['category_name'] or '',
-                f"{product['cost_price']:,.0f}",
-                f"{product['selling_price']:,.0f}",
-                stock_text,
-                status
-            ))
-    
-    def on_inventory_search(self, *args):
-        """Handle inventory search by IMEI/Serial"""
-        search_term = self.inventory_search_var.get().lower()
-        
-        if not search_term:
-            self.refresh_inventory()
-            return
-        
-        # Clear existing items
-        for item in self.inventory_tree.get_children():
-            self.inventory_tree.delete(item)
-        
-        # Search inventory
+    def search_inventory(self, search_term):
+        """Search inventory items by IMEI/Serial"""
         query = """
         SELECT i.*, p.name as product_name, p.brand, p.model
-        FROM inventory i
+        FROM json_each(?) m
+        JOIN inventory i ON i.id = m.value
         JOIN products p ON i.product_id = p.id
-        WHERE LOWER(i.imei) LIKE ? OR LOWER(i.serial_number) LIKE ?
-        ORDER BY i.created_at DESC
+        ORDER BY m.key
         """
         
-        search_pattern = f"%{search_term}%"
-        inventory_items = self.db_manager.fetch_all(query, (search_pattern, search_pattern))
-        
-        for item in inventory_items:
-            product_display = f"{item['product_name']}"
-            if item['brand']:
-                product_display += f" ({item['brand']})"
-            
-            self.inventory_tree.insert('', 'end', values=(
-                item['id'],
-                product_display,
-                item['imei'] or '',
-                item['serial_number'] or '',
-                item['condition'] or 'new',
-                item['status'] or 'available',
-                f"{(item['cost_price'] or 0):,.0f}",
-                f"{(item['selling_price'] or 0):,.0f}",
-                item['location'] or ''
-            ))
+        ids = self.db_manager.search('inventory', search_term)
+        rows = self.db_manager.fetch_all(query, (json.dumps(ids),))
+        return rows, len(ids) < DATABASE_CONFIG['SEARCH_LIMIT']
     
     def add_product(self):
         """Add new product"""
@@ -515,7 +505,7 @@ class InventoryTab:
         category_combo = ttk.Combobox(main_frame, textvariable=category_var, width=37)
         
         # Load categories
-        categories = self.db_manager.fetch_all("SELECT id, name FROM categories ORDER BY name")
+        categories = self.lookups.get('categories')
         category_combo['values'] = [f"{cat['id']} - {cat['name']}" for cat in categories]
         
         if product_data.get('category_id'):
@@ -646,6 +636,8 @@ class InventoryTab:
                     params = list(product_data.values())
                 
                 self.db_manager.execute_query(query, params)
+                if product_id:
+                    self.catalog.refresh_product(product_id)
                 
                 messagebox.showinfo("Thành công", 
                                    "Đã cập nhật sản phẩm!" if product_id else "Đã thêm sản phẩm!")
@@ -839,7 +831,8 @@ class InventoryTab:
                     query = f"INSERT INTO inventory ({columns}) VALUES ({placeholders})"
                     params = list(data.values())
                 
-                self.db_manager.execute_query(query, params)
+                cursor = self.db_manager.execute_query(query, params)
+                self.catalog.refresh_units([inventory_id or cursor.lastrowid])
                 
                 messagebox.showinfo("Thành công", 
                                    "Đã cập nhật kho!" if inventory_id else "Đã nhập kho!")
@@ -881,12 +874,10 @@ class InventoryTab:
         """Show low stock alert"""
         query = """
         SELECT p.name, p.brand, p.model, 
-               COUNT(CASE WHEN i.status = 'available' THEN 1 END) as available_count
+               COALESCE(ps.available, 0) as available_count
         FROM products p
-        LEFT JOIN inventory i ON p.id = i.product_id
-        WHERE p.is_active = 1
-        GROUP BY p.id
-        HAVING available_count <= ?
+        LEFT JOIN product_stock ps ON p.id = ps.product_id
+        WHERE p.is_active = 1 AND COALESCE(ps.available, 0) <= ?
         ORDER BY available_count ASC
         """
         
@@ -962,6 +953,7 @@ class InventoryTab:
         if messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa danh mục này?"):
             try:
                 self.db_manager.execute_query("DELETE FROM categories WHERE id = ?", (category_id,))
+                self.lookups.invalidate('categories')
                 messagebox.showinfo("Thành công", "Đã xóa danh mục!")
                 self.refresh_categories()
             except Exception as e:
@@ -1027,6 +1019,7 @@ class InventoryTab:
                         "INSERT INTO categories (name, description, created_at, updated_at) VALUES (?, ?, ?, ?)",
                         (data['name'], data['description'], datetime.now().isoformat(), data['updated_at'])
                     )
+                self.lookups.invalidate('categories')
                 
                 messagebox.showinfo("Thành công", 
                                    "Đã cập nhật danh mục!" if category_id else "Đã thêm danh mục!")
@@ -7,30 +7,66 @@ Main window for ChViet Mobile Store Management System
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
+import time
+import importlib
 
-from gui.inventory_tab import InventoryTab
-from gui.sales_tab import SalesTab
-from gui.repair_tab import RepairTab
-from gui.warranty_tab import WarrantyTab
-from gui.pawn_tab import PawnTab
-from gui.financial_tab import FinancialTab
-from gui.staff_tab import StaffTab
-from gui.reports_tab import ReportsTab
-from config import APP_CONFIG, GUI_CONFIG
+from config import APP_CONFIG, DATABASE_CONFIG, GUI_CONFIG
+from gui.query_executor import QueryExecutor
+from utils.catalog_cache import CatalogCache
+from utils.lookup_cache import LookupCache
+
+# Notebook tabs in display order; a tab's module is imported when it is first built
+TABS = [
+    ('inventory', 'gui.inventory_tab', 'InventoryTab', "📦 Kho Hàng"),
+    ('sales', 'gui.sales_tab', 'SalesTab', "💰 Bán Hàng"),
+    ('repair', 'gui.repair_tab', 'RepairTab', "🔧 Sửa Chữa"),
+    ('warranty', 'gui.warranty_tab', 'WarrantyTab', "🛡️ Bảo Hành"),
+    ('pawn', 'gui.pawn_tab', 'PawnTab', "💎 Cầm Đồ"),
+    ('financial', 'gui.financial_tab', 'FinancialTab', "💼 Tài Chính"),
+    ('staff', 'gui.staff_tab', 'StaffTab', "👥 Nhân Viên"),
+    ('reports', 'gui.reports_tab', 'ReportsTab', "📊 Báo Cáo"),
+]
 
 class MainWindow:
-    def __init__(self, root, db_manager):
+    def __init__(self, root, db_manager, profile=None):
         self.root = root
         self.db_manager = db_manager
+        self.profile = profile
         self.current_user = None
-        
-        # Login first
-        if not self.show_login():
+        self.first_frame_ms = None
+        
+        # Login first, loading caches while the user types
+        self.prefetch_during_login()
+        started = time.perf_counter()
+        logged_in = self.show_login()
+        self.stop_login_prefetch()
+        if not logged_in:
             self.root.quit()
             return
+        if self.profile:
+            self.profile.record('login', started)
         
         self.setup_main_interface()
     
+    def prefetch_during_login(self):
+        """Load the catalog and lookup tables and warm the page cache in the background"""
+        self.query_executor = QueryExecutor.for_widget(self.root, self.db_manager)
+        
+        catalog = CatalogCache.for_manager(self.db_manager)
+        if not catalog.loaded:
+            self.query_executor.submit_call(catalog.load, key='sales.catalog')
+        self.query_executor.submit_call(LookupCache.for_manager(self.db_manager).load, key='login.lookups')
+        
+        # One job per table so whatever is still queued can be dropped after login
+        for table in DATABASE_CONFIG['WARM_TABLES']:
+            self.query_executor.submit_call(lambda table=table: self.db_manager.warm_cache(table),
+                                            key=f"login.warm.{table}")
+    
+    def stop_login_prefetch(self):
+        """Drop page cache warming that has not started, so tab queries go first"""
+        for table in DATABASE_CONFIG['WARM_TABLES']:
+            self.query_executor.cancel(f"login.warm.{table}")
+    
     def show_login(self):
         """Show login dialog"""
         login_window = tk.Toplevel(self.root)
@@ -111,6 +147,8 @@ class MainWindow:
     
     def setup_main_interface(self):
         """Setup the main application interface"""
+        started = time.perf_counter()
+        
         # Main container
         main_container = ttk.Frame(self.root)
         main_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -123,6 +161,25 @@ class MainWindow:
         
         # Status bar
         self.create_status_bar(main_container)
+        
+        if self.profile:
+            self.profile.record('main_interface', started)
+        
+        # Idle callbacks run once the window has been drawn
+        self.root.after_idle(lambda: self.on_first_frame(started))
+    
+    def on_first_frame(self, started):
+        """Record time to the first interactive frame, then start background work"""
+        self.first_frame_ms = (time.perf_counter() - started) * 1000
+        if self.profile:
+            self.profile.record('first_frame', started)
+            self.profile.save()
+        
+        if GUI_CONFIG['TAB_PREFETCH']:
+            self.prefetch_queue = [name for name in GUI_CONFIG['TAB_PREFETCH_ORDER'] if name in self.tab_pages]
+            self.root.after(GUI_CONFIG['TAB_PREFETCH_DELAY_MS'], self.prefetch_next_tab)
+        if GUI_CONFIG['TAB_RELEASE_MINUTES']:
+            self.root.after(60000, self.release_hidden_tabs)
     
     def create_header(self, parent):
         """Create application header"""
@@ -148,41 +205,90 @@ class MainWindow:
         self.notebook = ttk.Notebook(parent)
         self.notebook.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
         
-        # Initialize tabs
+        # Every tab gets an empty page now and is built the first time it is shown
         self.tabs = {}
+        self.tab_pages = {}
+        self.tab_hidden_since = {}
+        self.released_tabs = set()
+        
+        for name, _, _, title in TABS:
+            # Staff tab (admin only)
+            if name == 'staff' and self.current_user['role'] != 'admin':
+                continue
+            
+            page = ttk.Frame(self.notebook)
+            self.notebook.add(page, text=title)
+            self.tab_pages[name] = page
         
-        # Inventory tab
-        self.tabs['inventory'] = InventoryTab(self.notebook, self.db_manager, self.current_user)
-        self.notebook.add(self.tabs['inventory'].frame, text="📦 Kho Hàng")
-        
-        # Sales tab
-        self.tabs['sales'] = SalesTab(self.notebook, self.db_manager, self.current_user)
-        self.notebook.add(self.tabs['sales'].frame, text="💰 Bán Hàng")
-        
-        # Repair tab
-        self.tabs['repair'] = RepairTab(self.notebook, self.db_manager, self.current_user)
-        self.notebook.add(self.tabs['repair'].frame, text="🔧 Sửa Chữa")
-        
-        # Warranty tab
-        self.tabs['warranty'] = WarrantyTab(self.notebook, self.db_manager, self.current_user)
-        self.notebook.add(self.tabs['warranty'].frame, text="🛡️ Bảo Hành")
-        
-        # Pawn tab
-        self.tabs['pawn'] = PawnTab(self.notebook, self.db_manager, self.current_user)
-        self.notebook.add(self.tabs['pawn'].frame, text="💎 Cầm Đồ")
-        
-        # Financial tab
-        self.tabs['financial'] = FinancialTab(self.notebook, self.db_manager, self.current_user)
-        self.notebook.add(self.tabs['financial'].frame, text="💼 Tài Chính")
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        self.on_tab_changed()
+    
+    def selected_tab(self):
+        """Get the name of the selected tab"""
+        selected = self.notebook.select()
+        return next((name for name, page in self.tab_pages.items() if str(page) == selected), None)
+    
+    def build_tab(self, name):
+        """Import and construct a tab inside its notebook page"""
+        started = time.perf_counter()
+        module_name, class_name = next((module_name, class_name) for tab_name, module_name, class_name, _ in TABS
+                                       if tab_name == name)
+        tab_class = getattr(importlib.import_module(module_name), class_name)
+        tab = tab_class(self.tab_pages[name], self.db_manager, self.current_user)
+        tab.frame.pack(fill=tk.BOTH, expand=True)
+        self.tabs[name] = tab
+        
+        if self.profile:
+            self.profile.record(f"tab.{name}", started)
+            # Tabs built after the first frame are added to the saved profile
+            if self.first_frame_ms is not None:
+                self.profile.save()
+        return tab
+    
+    def on_tab_changed(self, event=None):
+        """Build the shown tab on first view and reload it if its data was released"""
+        name = self.selected_tab()
+        if name is None:
+            return
         
-        # Staff tab (admin only)
-        if self.current_user['role'] == 'admin':
-            self.tabs['staff'] = StaffTab(self.notebook, self.db_manager, self.current_user)
-            self.notebook.add(self.tabs['staff'].frame, text="👥 Nhân Viên")
+        now = time.monotonic()
+        for other in self.tabs:
+            if other != name:
+                self.tab_hidden_since.setdefault(other, now)
+        self.tab_hidden_since.pop(name, None)
+        
+        if name not in self.tabs:
+            self.build_tab(name)
+        elif name in self.released_tabs:
+            self.released_tabs.discard(name)
+            self.tabs[name].load_data()
+    
+    def prefetch_next_tab(self):
+        """Build the next unbuilt tab in prefetch order, one per pause"""
+        while self.prefetch_queue and self.prefetch_queue[0] in self.tabs:
+            self.prefetch_queue.pop(0)
+        if not self.prefetch_queue:
+            return
         
-        # Reports tab
-        self.tabs['reports'] = ReportsTab(self.notebook, self.db_manager, self.current_user)
-        self.notebook.add(self.tabs['reports'].frame, text="📊 Báo Cáo")
+        name = self.prefetch_queue.pop(0)
+        self.build_tab(name)
+        self.tab_hidden_since[name] = time.monotonic()
+        self.root.after(GUI_CONFIG['TAB_PREFETCH_DELAY_MS'], self.prefetch_next_tab)
+    
+    def release_hidden_tabs(self):
+        """Drop the loaded lists of tabs hidden longer than TAB_RELEASE_MINUTES"""
+        limit = GUI_CONFIG['TAB_RELEASE_MINUTES'] * 60
+        now = time.monotonic()
+        
+        for name, hidden_since in self.tab_hidden_since.items():
+            tab = self.tabs[name]
+            if name in self.released_tabs or not hasattr(tab, 'release_data'):
+                continue
+            if now - hidden_since >= limit:
+                tab.release_data()
+                self.released_tabs.add(name)
+        
+        self.root.after(60000, self.release_hidden_tabs)
     
     def create_status_bar(self, parent):
         """Create status bar"""
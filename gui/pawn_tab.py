@@ -7,10 +7,15 @@ Pawn shop management tab for ChViet Mobile Store Management System
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date, timedelta
+import json
 import uuid
 
-from models import PawnContract, Customer
-from config import BUSINESS_RULES
+from config import BUSINESS_RULES, DATABASE_CONFIG
+from gui.query_executor import QueryExecutor, LoadingIndicator
+from gui.tree_binder import TreeBinder
+from gui.history_pager import HistoryPager
+from gui.search_controller import SearchController
+from utils.lookup_cache import LookupCache
 
 class PawnTab:
     def __init__(self, parent, db_manager, current_user):
@@ -19,6 +24,9 @@ class PawnTab:
         self.current_user = current_user
         
         self.frame = ttk.Frame(parent)
+        self.query_executor = QueryExecutor.for_widget(self.frame, db_manager)
+        self.lookups = LookupCache.for_manager(db_manager)
+        self.loading_indicator = LoadingIndicator(self.frame)
         self.setup_ui()
         self.load_data()
     
@@ -184,7 +192,11 @@ class PawnTab:
         
         ttk.Label(search_frame, text="Số HĐ / Khách hàng:").pack(anchor=tk.W)
         self.contract_search_var = tk.StringVar()
-        self.contract_search_var.trace('w', self.on_contract_search)
+        self.contract_search = SearchController(
+            self.contract_search_var, self.search_contracts, self.populate_contracts, self.refresh_contracts,
+            self.query_executor, 'pawn.contracts', ('contract_number', 'customer_name', 'item_description'),
+            indicator=self.loading_indicator
+        )
         search_entry = ttk.Entry(search_frame, textvariable=self.contract_search_var, width=40)
         search_entry.pack(pady=5, fill=tk.X)
         
@@ -239,6 +251,7 @@ class PawnTab:
                                           show='headings',
                                           yscrollcommand=v_scrollbar.set,
                                           xscrollcommand=h_scrollbar.set)
+        self.contracts_binder = TreeBinder(self.contracts_tree)
         
         # Configure scrollbars
         v_scrollbar.config(command=self.contracts_tree.yview)
@@ -269,6 +282,11 @@ class PawnTab:
         
         # Bind double-click
         self.contracts_tree.bind('<Double-1>', lambda e: self.view_contract_details())
+        
+        # Newer / older pages instead of loading the whole history
+        self.contracts_pager = HistoryPager(contract_list_frame, self.query_executor, 'pawn.contracts', 'created_at',
+                                            self.populate_contracts, indicator=self.loading_indicator)
+        self.contracts_pager.frame.pack(fill=tk.X, padx=10, pady=(0, 10))
     
     def setup_payments_tab(self):
         """Setup payments management tab"""
@@ -388,9 +406,15 @@ class PawnTab:
         self.refresh_contracts()
         self.load_payment_history()
     
+    def release_data(self):
+        """Drop the loaded lists while the tab is hidden; load_data() reads them again"""
+        self.contract_search.clear_cache()
+        self.contracts_binder.clear()
+        self.payments_tree.delete(*self.payments_tree.get_children())
+    
     def load_customers_combo(self, combo):
         """Load customers into combobox"""
-        customers = self.db_manager.fetch_all("SELECT id, name, phone FROM customers ORDER BY name")
+        customers = self.lookups.get('customers')
         combo['values'] = [""] + [f"{c['id']} - {c['name']} ({c['phone']})" for c in customers if c['phone']]
     
     def load_active_contracts_combo(self, combo):
@@ -512,6 +536,7 @@ class PawnTab:
                 placeholders = ', '.join(['?' for _ in data])
                 query = f"INSERT INTO customers ({columns}) VALUES ({placeholders})"
                 self.db_manager.execute_query(query, list(data.values()))
+                self.lookups.invalidate('customers')
                 
                 messagebox.showinfo("Thành công", "Đã thêm khách hàng!")
                 dialog.destroy()
@@ -573,30 +598,32 @@ class PawnTab:
                 'updated_at': datetime.now().isoformat()
             }
             
-            # Insert contract record
-            columns = ', '.join(contract_data.keys())
-            placeholders = ', '.join(['?' for _ in contract_data])
-            query = f"INSERT INTO pawn_contracts ({columns}) VALUES ({placeholders})"
-            cursor = self.db_manager.execute_query(query, list(contract_data.values()))
-            contract_id = cursor.lastrowid
-            
-            # Create transaction record for loan disbursement
-            transaction_data = {
-                'transaction_type': 'expense',
-                'amount': loan_amount,
-                'description': f'Cho vay cầm đồ - {self.contract_number_var.get()}',
-                'reference_id': contract_id,
-                'reference_type': 'pawn_loan',
-                'payment_method': 'cash',
-                'staff_id': self.current_user['id'],
-                'transaction_date': datetime.now().isoformat(),
-                'created_at': datetime.now().isoformat()
-            }
-            
-            columns = ', '.join(transaction_data.keys())
-            placeholders = ', '.join(['?' for _ in transaction_data])
-            query = f"INSERT INTO transactions ({columns}) VALUES ({placeholders})"
-            self.db_manager.execute_query(query, list(transaction_data.values()))
+            # Save contract and loan disbursement together
+            with self.db_manager.transaction():
+                # Insert contract record
+                columns = ', '.join(contract_data.keys())
+                placeholders = ', '.join(['?' for _ in contract_data])
+                query = f"INSERT INTO pawn_contracts ({columns}) VALUES ({placeholders})"
+                cursor = self.db_manager.execute_query(query, list(contract_data.values()))
+                contract_id = cursor.lastrowid
+                
+                # Create transaction record for loan disbursement
+                transaction_data = {
+                    'transaction_type': 'expense',
+                    'amount': loan_amount,
+                    'description': f'Cho vay cầm đồ - {self.contract_number_var.get()}',
+                    'reference_id': contract_id,
+                    'reference_type': 'pawn_loan',
+                    'payment_method': 'cash',
+                    'staff_id': self.current_user['id'],
+                    'transaction_date': datetime.now().isoformat(),
+                    'created_at': datetime.now().isoformat()
+                }
+                
+                columns = ', '.join(transaction_data.keys())
+                placeholders = ', '.join(['?' for _ in transaction_data])
+                query = f"INSERT INTO transactions ({columns}) VALUES ({placeholders})"
+                self.db_manager.execute_query(query, list(transaction_data.values()))
             
             messagebox.showinfo("Thành công", f"Đã tạo hợp đồng cầm đồ {self.contract_number_var.get()}!")
             
@@ -654,19 +681,19 @@ class PawnTab:
     
     def refresh_contracts(self):
         """Refresh contracts list"""
-        # Clear existing items
-        for item in self.contracts_tree.get_children():
-            self.contracts_tree.delete(item)
-        
         # Load contracts
         query = """
         SELECT pc.*, c.name as customer_name
         FROM pawn_contracts pc
         LEFT JOIN customers c ON pc.customer_id = c.id
-        ORDER BY pc.created_at DESC
         """
         
-        contracts = self.db_manager.fetch_all(query)
+        self.contracts_pager.set_query(query)
+    
+    def populate_contracts(self, contracts):
+        """Fill contracts tree with query results"""
+        # Collected rows go through the binder, which only applies the differences
+        rows = []
         
         for contract in contracts:
             contract_date = datetime.fromisoformat(contract['created_at']).strftime('%d/%m/%Y')
@@ -694,7 +721,7 @@ class PawnTab:
             if contract['status'] == 'active' and overdue_days > 0:
                 status_text = "Quá hạn"
             
-            self.contracts_tree.insert('', 'end', values=(
+            rows.append((contract['id'], (
                 contract['id'],
                 contract['contract_number'],
                 contract_date,
@@ -705,85 +732,34 @@ class PawnTab:
                 contract['due_date'],
                 status_text,
                 overdue_text
-            ))
-    
-    def on_contract_search(self, *args):
-        """Handle contract search"""
-        search_term = self.contract_search_var.get().lower()
-        
-        if not search_term:
-            self.refresh_contracts()
-            return
-        
-        # Clear existing items
-        for item in self.contracts_tree.get_children():
-            self.contracts_tree.delete(item)
+            )))
         
-        # Search contracts
+        self.contracts_binder.update(rows)
+    
+    def search_contracts(self, search_term):
+        """Search contracts, best match first"""
         query = """
         SELECT pc.*, c.name as customer_name
-        FROM pawn_contracts pc
+        FROM json_each(?) m
+        JOIN pawn_contracts pc ON pc.id = m.value
         LEFT JOIN customers c ON pc.customer_id = c.id
-        WHERE LOWER(pc.contract_number) LIKE ? OR
-              LOWER(c.name) LIKE ? OR
-              LOWER(pc.item_description) LIKE ?
-        ORDER BY pc.created_at DESC
+        ORDER BY m.key
         """
         
-        search_pattern = f"%{search_term}%"
-        contracts = self.db_manager.fetch_all(query, (search_pattern, search_pattern, search_pattern))
-        
-        for contract in contracts:
-            contract_date = datetime.fromisoformat(contract['created_at']).strftime('%d/%m/%Y')
-            
-            try:
-                due_date = datetime.strptime(contract['due_date'], '%Y-%m-%d').date()
-                overdue_days = (date.today() - due_date).days
-                overdue_text = f"{overdue_days} ngày" if overdue_days > 0 else ""
-            except:
-                overdue_text = ""
-            
-            status_map = {
-                'active': 'Đang hiệu lực',
-                'overdue': 'Quá hạn',
-                'redeemed': 'Đã chuộc',
-                'liquidated': 'Đã thanh lý',
-                'extended': 'Đã gia hạn'
-            }
-            
-            status_text = status_map.get(contract['status'], contract['status'])
-            
-            if contract['status'] == 'active' and overdue_days > 0:
-                status_text = "Quá hạn"
-            
-            self.contracts_tree.insert('', 'end', values=(
-                contract['id'],
-                contract['contract_number'],
-                contract_date,
-                contract['customer_name'] or '',
-                contract['item_description'][:50] + "..." if len(contract['item_description']) > 50 else contract['item_description'],
-                f"{contract['item_value']:,.0f}",
-                f"{contract['loan_amount']:,.0f}",
-                contract['due_date'],
-                status_text,
-                overdue_text
-            ))
+        ids = self.db_manager.search('pawn_contracts', search_term)
+        rows = self.db_manager.fetch_all(query, (json.dumps(ids),))
+        return rows, len(ids) < DATABASE_CONFIG['SEARCH_LIMIT']
     
     def filter_contracts(self):
         """Filter contracts by status"""
         status_filter = self.status_filter_var.get()
         
-        # Clear existing items
-        for item in self.contracts_tree.get_children():
-            self.contracts_tree.delete(item)
-        
         # Build query based on filter
         if status_filter == "all":
             query = """
             SELECT pc.*, c.name as customer_name
             FROM pawn_contracts pc
             LEFT JOIN customers c ON pc.customer_id = c.id
-            ORDER BY pc.created_at DESC
             """
             params = ()
         elif status_filter == "overdue":
@@ -791,57 +767,19 @@ class PawnTab:
             SELECT pc.*, c.name as customer_name
             FROM pawn_contracts pc
             LEFT JOIN customers c ON pc.customer_id = c.id
-            WHERE pc.status = 'active' AND DATE(pc.due_date) < DATE('now')
-            ORDER BY pc.created_at DESC
+            WHERE pc.status = 'active' AND pc.due_day < ?
             """
-            params = ()
+            params = (self.db_manager.day_key(),)
         else:
             query = """
             SELECT pc.*, c.name as customer_name
             FROM pawn_contracts pc
             LEFT JOIN customers c ON pc.customer_id = c.id
             WHERE pc.status = ?
-            ORDER BY pc.created_at DESC
             """
             params = (status_filter,)
         
-        contracts = self.db_manager.fetch_all(query, params)
-        
-        for contract in contracts:
-            contract_date = datetime.fromisoformat(contract['created_at']).strftime('%d/%m/%Y')
-            
-            try:
-                due_date = datetime.strptime(contract['due_date'], '%Y-%m-%d').date()
-                overdue_days = (date.today() - due_date).days
-                overdue_text = f"{overdue_days} ngày" if overdue_days > 0 else ""
-            except:
-                overdue_text = ""
-            
-            status_map = {
-                'active': 'Đang hiệu lực',
-                'overdue': 'Quá hạn',
-                'redeemed': 'Đã chuộc',
-                'liquidated': 'Đã thanh lý',
-                'extended': 'Đã gia hạn'
-            }
-            
-            status_text = status_map.get(contract['status'], contract['status'])
-            
-            if contract['status'] == 'active' and overdue_days > 0:
-                status_text = "Quá hạn"
-            
-            self.contracts_tree.insert('', 'end', values=(
-                contract['id'],
-                contract['contract_number'],
-                contract_date,
-                contract['customer_name'] or '',
-                contract['item_description'][:50] + "..." if len(contract['item_description']) > 50 else contract['item_description'],
-                f"{contract['item_value']:,.0f}",
-                f"{contract['loan_amount']:,.0f}",
-                contract['due_date'],
-                status_text,
-                overdue_text
-            ))
+        self.contracts_pager.set_query(query, params)
     
     def view_contract_details(self):
         """View contract details"""
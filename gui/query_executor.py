@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Background query executor for ChViet Mobile Store Management System
+"""
+
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from config import GUI_CONFIG
+
+class LoadingIndicator:
+    """Small "loading" badge shown in the corner of a tab while queries run"""
+    
+    def __init__(self, parent, text="⏳ Đang tải..."):
+        self.label = ttk.Label(parent, text=text, style="Warning.TLabel")
+        self.active = 0
+    
+    def start(self):
+        """Show the indicator"""
+        self.active += 1
+        if self.active == 1:
+            self.label.place(relx=1.0, x=-15, y=2, anchor=tk.NE)
+            self.label.lift()
+    
+    def stop(self):
+        """Hide the indicator once every pending query has finished"""
+        self.active = max(0, self.active - 1)
+        if not self.active:
+            self.label.place_forget()
+
+class QueryExecutor:
+    """Run SQL on worker threads and hand results back to the Tk thread"""
+    
+    def __init__(self, root, db_manager, workers=None):
+        self.root = root
+        self.db_manager = db_manager
+        
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._generations = {}
+        self._pending = 0
+        self._polling = False
+        self._running = True
+        
+        workers = workers or GUI_CONFIG['QUERY_WORKERS']
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"query-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    @classmethod
+    def for_widget(cls, widget, db_manager):
+        """Get the executor shared by every tab of the widget's root window"""
+        root = widget._root()
+        executor = getattr(root, 'query_executor', None)
+        if executor is None or executor.db_manager is not db_manager:
+            executor = cls(root, db_manager)
+            root.query_executor = executor
+        return executor
+    
+    def submit(self, query, params=None, on_done=None, key=None, indicator=None,
+               fetch='all', on_error=None):
+        """Queue a query; on_done receives the rows on the Tk thread
+        
+        Submitting again with the same key supersedes the previous request,
+        whose result is then dropped.
+        """
+        def job():
+            if fetch == 'one':
+                return self.db_manager.fetch_one(query, params)
+            return self.db_manager.fetch_all(query, params)
+        
+        return self.submit_call(job, on_done, key=key, indicator=indicator, on_error=on_error)
+    
+    def submit_call(self, func, on_done=None, key=None, indicator=None, on_error=None):
+        """Queue func() to run on a worker thread, like submit()"""
+        generation = None
+        if key is not None:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+        
+        if indicator:
+            indicator.start()
+        
+        self._pending += 1
+        self._jobs.put((func, on_done, on_error, key, generation, indicator))
+        self._schedule_poll()
+        return generation
+    
+    def cancel(self, key):
+        """Drop any in-flight result for key"""
+        if key in self._generations:
+            self._generations[key] += 1
+    
+    def generation(self, key):
+        """Get the number of requests made so far for key"""
+        return self._generations.get(key, 0)
+    
+    def is_current(self, key, generation):
+        """Check whether a request has not been superseded"""
+        return key is None or self._generations.get(key) == generation
+    
+    def shutdown(self):
+        """Stop the worker threads"""
+        self._running = False
+        for _ in self._threads:
+            self._jobs.put(None)
+    
+    def _worker(self):
+        """Worker thread loop"""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            
+            func, on_done, on_error, key, generation, indicator = job
+            
+            # Skip work that was superseded while waiting in the queue
+            if not self.is_current(key, generation):
+                self._results.put((None, None, None, key, generation, indicator, None))
+                continue
+            
+            try:
+                result, error = func(), None
+            except Exception as e:
+                result, error = None, e
+            
+            self._results.put((on_done, on_error, result, key, generation, indicator, error))
+    
+    def _schedule_poll(self):
+        """Start polling for results if not already doing so"""
+        if not self._polling and self._running:
+            self._polling = True
+            self.root.after(GUI_CONFIG['QUERY_POLL_MS'], self._poll)
+    
+    def _poll(self):
+        """Deliver finished results on the Tk thread"""
+        self._polling = False
+        
+        while True:
+            try:
+                on_done, on_error, result, key, generation, indicator, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            
+            self._pending -= 1
+            if indicator:
+                indicator.stop()
+            
+            if not self.is_current(key, generation):
+                continue
+            
+            try:
+                if error is not None:
+                    if on_error:
+                        on_error(error)
+                    else:
+                        print(f"Background query error: {error}")
+                elif on_done:
+                    on_done(result)
+            except tk.TclError:
+                # Widget was destroyed while the query was running
+                pass
+            except Exception as e:
+                print(f"Background query callback error: {e}")
+        
+        if self._pending > 0:
+            self._schedule_poll()
@@ -7,11 +7,16 @@ Repair management tab for ChViet Mobile Store Management System
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date
+import json
 import uuid
 
-from models import Repair, Customer
 from utils.qr_utils import generate_qr_code
-from config import BUSINESS_RULES
+from config import BUSINESS_RULES, DATABASE_CONFIG
+from gui.query_executor import QueryExecutor, LoadingIndicator
+from gui.tree_binder import TreeBinder
+from gui.history_pager import HistoryPager
+from gui.search_controller import SearchController
+from utils.lookup_cache import LookupCache
 
 class RepairTab:
     def __init__(self, parent, db_manager, current_user):
@@ -20,6 +25,9 @@ class RepairTab:
         self.current_user = current_user
         
         self.frame = ttk.Frame(parent)
+        self.query_executor = QueryExecutor.for_widget(self.frame, db_manager)
+        self.lookups = LookupCache.for_manager(db_manager)
+        self.loading_indicator = LoadingIndicator(self.frame)
         self.setup_ui()
         self.load_data()
     
@@ -188,7 +196,11 @@ class RepairTab:
         
         ttk.Label(search_frame, text="Số biên nhận / IMEI / KH:").pack(anchor=tk.W)
         self.repair_search_var = tk.StringVar()
-        self.repair_search_var.trace('w', self.on_repair_search)
+        self.repair_search = SearchController(
+            self.repair_search_var, self.search_repairs, self.populate_repairs, self.refresh_repairs,
+            self.query_executor, 'repair.repairs', ('repair_number', 'imei', 'customer_name', 'device_info'),
+            indicator=self.loading_indicator
+        )
         search_entry = ttk.Entry(search_frame, textvariable=self.repair_search_var, width=40)
         search_entry.pack(pady=5, fill=tk.X)
         
@@ -244,6 +256,7 @@ class RepairTab:
                                         show='headings',
                                         yscrollcommand=v_scrollbar.set,
                                         xscrollcommand=h_scrollbar.set)
+        self.repairs_binder = TreeBinder(self.repairs_tree)
         
         # Configure scrollbars
         v_scrollbar.config(command=self.repairs_tree.yview)
@@ -274,6 +287,11 @@ class RepairTab:
         
         # Bind double-click
         self.repairs_tree.bind('<Double-1>', lambda e: self.view_repair_details())
+        
+        # Newer / older pages instead of loading the whole history
+        self.repairs_pager = HistoryPager(repair_list_frame, self.query_executor, 'repair.repairs', 'created_at',
+                                          self.populate_repairs, indicator=self.loading_indicator)
+        self.repairs_pager.frame.pack(fill=tk.X, padx=10, pady=(0, 10))
     
     def setup_repair_status_tab(self):
         """Setup repair status tracking tab"""
@@ -314,9 +332,14 @@ class RepairTab:
         """Load all data"""
         self.refresh_repairs()
     
+    def release_data(self):
+        """Drop the loaded lists while the tab is hidden; load_data() reads them again"""
+        self.repair_search.clear_cache()
+        self.repairs_binder.clear()
+    
     def load_customers_combo(self, combo):
         """Load customers into combobox"""
-        customers = self.db_manager.fetch_all("SELECT id, name, phone FROM customers ORDER BY name")
+        customers = self.lookups.get('customers')
         combo['values'] = [""] + [f"{c['id']} - {c['name']} ({c['phone']})" for c in customers if c['phone']]
     
     def generate_repair_number(self):
@@ -402,6 +425,7 @@ class RepairTab:
                 placeholders = ', '.join(['?' for _ in data])
                 query = f"INSERT INTO customers ({columns}) VALUES ({placeholders})"
                 self.db_manager.execute_query(query, list(data.values()))
+                self.lookups.invalidate('customers')
                 
                 messagebox.showinfo("Thành công", "Đã thêm khách hàng!")
                 dialog.destroy()
@@ -476,30 +500,32 @@ class RepairTab:
                 'updated_at': datetime.now().isoformat()
             }
             
-            # Insert repair record
-            columns = ', '.join(repair_data.keys())
-            placeholders = ', '.join(['?' for _ in repair_data])
-            query = f"INSERT INTO repairs ({columns}) VALUES ({placeholders})"
-            cursor = self.db_manager.execute_query(query, list(repair_data.values()))
-            repair_id = cursor.lastrowid
-            
-            # Create transaction record
-            transaction_data = {
-                'transaction_type': 'expense',
-                'amount': 0,  # No payment yet
-                'description': f'Tiếp nhận sửa chữa - {self.repair_number_var.get()}',
-                'reference_id': repair_id,
-                'reference_type': 'repair',
-                'payment_method': 'cash',
-                'staff_id': self.current_user['id'],
-                'transaction_date': datetime.now().isoformat(),
-                'created_at': datetime.now().isoformat()
-            }
-            
-            columns = ', '.join(transaction_data.keys())
-            placeholders = ', '.join(['?' for _ in transaction_data])
-            query = f"INSERT INTO transactions ({columns}) VALUES ({placeholders})"
-            self.db_manager.execute_query(query, list(transaction_data.values()))
+            # Save repair and its ledger entry together
+            with self.db_manager.transaction():
+                # Insert repair record
+                columns = ', '.join(repair_data.keys())
+                placeholders = ', '.join(['?' for _ in repair_data])
+                query = f"INSERT INTO repairs ({columns}) VALUES ({placeholders})"
+                cursor = self.db_manager.execute_query(query, list(repair_data.values()))
+                repair_id = cursor.lastrowid
+                
+                # Create transaction record
+                transaction_data = {
+                    'transaction_type': 'expense',
+                    'amount': 0,  # No payment yet
+                    'description': f'Tiếp nhận sửa chữa - {self.repair_number_var.get()}',
+                    'reference_id': repair_id,
+                    'reference_type': 'repair',
+                    'payment_method': 'cash',
+                    'staff_id': self.current_user['id'],
+                    'transaction_date': datetime.now().isoformat(),
+                    'created_at': datetime.now().isoformat()
+                }
+                
+                columns = ', '.join(transaction_data.keys())
+                placeholders = ', '.join(['?' for _ in transaction_data])
+                query = f"INSERT INTO transactions ({columns}) VALUES ({placeholders})"
+                self.db_manager.execute_query(query, list(transaction_data.values()))
             
             messagebox.showinfo("Thành công", f"Đã tạo biên nhận sửa chữa {self.repair_number_var.get()}!")
             
@@ -559,19 +585,19 @@ class RepairTab:
     
     def refresh_repairs(self):
         """Refresh repairs list"""
-        # Clear existing items
-        for item in self.repairs_tree.get_children():
-            self.repairs_tree.delete(item)
-        
         # Load repairs
         query = """
         SELECT r.*, c.name as customer_name, c.phone as customer_phone
         FROM repairs r
         LEFT JOIN customers c ON r.customer_id = c.id
-        ORDER BY r.created_at DESC
         """
         
-        repairs = self.db_manager.fetch_all(query)
+        self.repairs_pager.set_query(query)
+    
+    def populate_repairs(self, repairs):
+        """Fill repairs tree with query results"""
+        # Collected rows go through the binder, which only applies the differences
+        rows = []
         
         for repair in repairs:
             repair_date = datetime.fromisoformat(repair['created_at']).strftime('%d/%m/%Y')
@@ -595,7 +621,7 @@ class RepairTab:
             
             status_text = status_map.get(repair['repair_status'], repair['repair_status'])
             
-            self.repairs_tree.insert('', 'end', values=(
+            rows.append((repair['id'], (
                 repair['id'],
                 repair['repair_number'],
                 repair_date,
@@ -606,85 +632,34 @@ class RepairTab:
                 status_text,
                 f"{repair['total_cost']:,.0f}",
                 completion_date
-            ))
-    
-    def on_repair_search(self, *args):
-        """Handle repair search"""
-        search_term = self.repair_search_var.get().lower()
-        
-        if not search_term:
-            self.refresh_repairs()
-            return
+            )))
         
-        # Clear existing items
-        for item in self.repairs_tree.get_children():
-            self.repairs_tree.delete(item)
-        
-        # Search repairs
+        self.repairs_binder.update(rows)
+    
+    def search_repairs(self, search_term):
+        """Search repairs, best match first"""
         query = """
         SELECT r.*, c.name as customer_name, c.phone as customer_phone
-        FROM repairs r
+        FROM json_each(?) m
+        JOIN repairs r ON r.id = m.value
         LEFT JOIN customers c ON r.customer_id = c.id
-        WHERE LOWER(r.repair_number) LIKE ? OR
-              LOWER(r.imei) LIKE ? OR
-              LOWER(c.name) LIKE ? OR
-              LOWER(r.device_info) LIKE ?
-        ORDER BY r.created_at DESC
+        ORDER BY m.key
         """
         
-        search_pattern = f"%{search_term}%"
-        repairs = self.db_manager.fetch_all(query, (search_pattern, search_pattern, 
-                                                   search_pattern, search_pattern))
-        
-        for repair in repairs:
-            repair_date = datetime.fromisoformat(repair['created_at']).strftime('%d/%m/%Y')
-            completion_date = ""
-            if repair['actual_completion']:
-                completion_date = datetime.fromisoformat(repair['actual_completion']).strftime('%d/%m/%Y')
-            elif repair['estimated_completion']:
-                completion_date = f"DK: {repair['estimated_completion']}"
-            
-            status_map = {
-                'received': 'Đã tiếp nhận',
-                'diagnosing': 'Đang chẩn đoán',
-                'repairing': 'Đang sửa chữa',
-                'waiting_parts': 'Chờ linh kiện',
-                'completed': 'Hoàn thành',
-                'customer_notified': 'Đã báo khách',
-                'delivered': 'Đã giao',
-                'cancelled': 'Hủy bỏ'
-            }
-            
-            status_text = status_map.get(repair['repair_status'], repair['repair_status'])
-            
-            self.repairs_tree.insert('', 'end', values=(
-                repair['id'],
-                repair['repair_number'],
-                repair_date,
-                repair['customer_name'] or '',
-                repair['device_info'][:30] + "..." if len(repair['device_info']) > 30 else repair['device_info'],
-                repair['imei'] or '',
-                repair['problem_description'][:50] + "..." if len(repair['problem_description']) > 50 else repair['problem_description'],
-                status_text,
-                f"{repair['total_cost']:,.0f}",
-                completion_date
-            ))
+        ids = self.db_manager.search('repairs', search_term)
+        rows = self.db_manager.fetch_all(query, (json.dumps(ids),))
+        return rows, len(ids) < DATABASE_CONFIG['SEARCH_LIMIT']
     
     def filter_repairs(self):
         """Filter repairs by status"""
         status_filter = self.status_filter_var.get()
         
-        # Clear existing items
-        for item in self.repairs_tree.get_children():
-            self.repairs_tree.delete(item)
-        
         # Build query based on filter
         if status_filter == "all":
             query = """
             SELECT r.*, c.name as customer_name, c.phone as customer_phone
             FROM repairs r
             LEFT JOIN customers c ON r.customer_id = c.id
-            ORDER BY r.created_at DESC
             """
             params = ()
         else:
@@ -693,45 +668,10 @@ class RepairTab:
             FROM repairs r
             LEFT JOIN customers c ON r.customer_id = c.id
             WHERE r.repair_status = ?
-            ORDER BY r.created_at DESC
             """
             params = (status_filter,)
         
-        repairs = self.db_manager.fetch_all(query, params)
-        
-        for repair in repairs:
-            repair_date = datetime.fromisoformat(repair['created_at']).strftime('%d/%m/%Y')
-            completion_date = ""
-            if repair['actual_completion']:
-                completion_date = datetime.fromisoformat(repair['actual_completion']).strftime('%d/%m/%Y')
-            elif repair['estimated_completion']:
-                completion_date = f"DK: {repair['estimated_completion']}"
-            
-            status_map = {
-                'received': 'Đã tiếp nhận',
-                'diagnosing': 'Đang chẩn đoán',
-                'repairing': 'Đang sửa chữa',
-                'waiting_parts': 'Chờ linh kiện',
-                'completed': 'Hoàn thành',
-                'customer_notified': 'Đã báo khách',
-                'delivered': 'Đã giao',
-                'cancelled': 'Hủy bỏ'
-            }
-            
-            status_text = status_map.get(repair['repair_status'], repair['repair_status'])
-            
-            self.repairs_tree.insert('', 'end', values=(
-                repair['id'],
-                repair['repair_number'],
-                repair_date,
-                repair['customer_name'] or '',
-                repair['device_info'][:30] + "..." if len(repair['device_info']) > 30 else repair['device_info'],
-                repair['imei'] or '',
-                repair['problem_description'][:50] + "..." if len(repair['problem_description']) > 50 else repair['problem_description'],
-                status_text,
-                f"{repair['total_cost']:,.0f}",
-                completion_date
-            ))
+        self.repairs_pager.set_query(query, params)
     
     def view_repair_details(self):
         """View repair details"""
@@ -6,18 +6,45 @@ Reports and analytics tab for ChViet Mobile Store Management System
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+import os
 from datetime import datetime, date, timedelta
-import calendar
 
-from config import BUSINESS_RULES
+from gui.query_executor import QueryExecutor, LoadingIndicator
+from utils.lookup_cache import LookupCache
+from utils.report_engine import (ReportEngine, render_text, render_text_widget, render_treeview,
+                                 render_file, render_csv, render_xlsx)
 
 class ReportsTab:
+    # Report shown for each report type; types without a report yet show the first one
+    REPORT_NAMES = {
+        'sales': {'summary': 'sales_summary', 'daily': 'sales_daily', 'monthly': 'sales_monthly',
+                  'by_product': 'sales_by_product', 'by_staff': 'sales_by_staff',
+                  'by_customer': 'sales_by_customer'},
+        'inventory': {'current_stock': 'inventory_current_stock', 'low_stock': 'inventory_low_stock',
+                      'stock_movement': 'inventory_stock_movement'},
+        'financial': {'profit_loss': 'financial_profit_loss', 'cash_flow': 'financial_cash_flow',
+                      'revenue_analysis': 'financial_revenue_analysis'},
+        'customer': {'customer_list': 'customer_list', 'top_customers': 'customer_top',
+                     'debt_customers': 'customer_debt'},
+        'performance': {'overall': 'performance_overall', 'sales_performance': 'performance_sales',
+                        'staff_performance': 'performance_staff'},
+    }
+    
+    # Reports built without a date range
+    UNDATED_REPORTS = {'inventory_current_stock', 'inventory_low_stock', 'inventory_stock_movement',
+                       'customer_list', 'customer_debt'}
+    
     def __init__(self, parent, db_manager, current_user):
         self.parent = parent
         self.db_manager = db_manager
         self.current_user = current_user
         
         self.frame = ttk.Frame(parent)
+        self.query_executor = QueryExecutor.for_widget(self.frame, db_manager)
+        self.lookups = LookupCache.for_manager(db_manager)
+        self.reports = ReportEngine.for_manager(db_manager)
+        self.results = {}  # Report shown in each category
+        self.loading_indicator = LoadingIndicator(self.frame)
         self.setup_ui()
         self.load_data()
     
@@ -99,6 +126,7 @@ class ReportsTab:
                   command=self.print_sales_report).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="📄 Xuất Excel", 
                   command=self.export_sales_excel).pack(side=tk.LEFT, padx=5)
+        self.add_save_buttons(btn_frame, 'sales')
         ttk.Button(btn_frame, text="📈 Biểu đồ", 
                   command=self.show_sales_chart).pack(side=tk.LEFT, padx=5)
         
@@ -188,6 +216,7 @@ class ReportsTab:
                   command=self.print_inventory_report).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="📄 Xuất Excel", 
                   command=self.export_inventory_excel).pack(side=tk.LEFT, padx=5)
+        self.add_save_buttons(btn_frame, 'inventory')
         ttk.Button(btn_frame, text="⚠️ Cảnh báo hết hàng", 
                   command=self.show_stock_alerts).pack(side=tk.LEFT, padx=5)
         
@@ -257,6 +286,7 @@ class ReportsTab:
                   command=self.print_financial_report).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="📄 Xuất Excel", 
                   command=self.export_financial_excel).pack(side=tk.LEFT, padx=5)
+        self.add_save_buttons(btn_frame, 'financial')
         ttk.Button(btn_frame, text="📈 Biểu đồ", 
                   command=self.show_financial_chart).pack(side=tk.LEFT, padx=5)
         
@@ -326,6 +356,7 @@ class ReportsTab:
                   command=self.print_customer_report).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="📄 Xuất Excel", 
                   command=self.export_customer_excel).pack(side=tk.LEFT, padx=5)
+        self.add_save_buttons(btn_frame, 'customer')
         ttk.Button(btn_frame, text="📧 Gửi email", 
                   command=self.send_customer_email).pack(side=tk.LEFT, padx=5)
         
@@ -414,6 +445,7 @@ class ReportsTab:
                   command=self.print_performance_report).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="📄 Xuất Excel", 
                   command=self.export_performance_excel).pack(side=tk.LEFT, padx=5)
+        self.add_save_buttons(btn_frame, 'performance')
         ttk.Button(btn_frame, text="📈 Dashboard", 
                   command=self.show_performance_dashboard).pack(side=tk.LEFT, padx=5)
         
@@ -432,790 +464,171 @@ class ReportsTab:
     
     def load_categories_combo(self, combo):
         """Load categories into combobox"""
-        categories = self.db_manager.fetch_all("SELECT id, name FROM categories ORDER BY name")
+        categories = self.lookups.get('categories')
         combo['values'] = ["Tất cả"] + [f"{c['id']} - {c['name']}" for c in categories]
         combo.set("Tất cả")
     
+    def day_range(self, from_date, to_date):
+        """Convert a from/to date filter to day key parameters"""
+        return (self.db_manager.day_key(from_date), self.db_manager.day_key(to_date))
+    
+    def report_name(self, category):
+        """Get the report selected in a report category"""
+        names = self.REPORT_NAMES[category]
+        report_type = getattr(self, f"{category}_report_type_var").get()
+        return names.get(report_type, next(iter(names.values())))
+    
+    def run_report(self, category, from_date=None, to_date=None):
+        """Build the selected report of a category on the query executor and show it"""
+        name = self.report_name(category)
+        params = {} if name in self.UNDATED_REPORTS else {'from_date': from_date, 'to_date': to_date}
+        
+        # Clear previous report and drop any report still loading, so print and
+        # export never output the old report while the new one builds or fails
+        self.results.pop(category, None)
+        getattr(self, f"{category}_report_text").delete('1.0', tk.END)
+        if category == 'sales':
+            self.sales_report_tree.delete(*self.sales_report_tree.get_children())
+        key = f'reports.{category}'
+        self.query_executor.cancel(key)
+        
+        self.query_executor.submit_call(
+            lambda: self.reports.get(name, **params),
+            on_done=lambda result: self.show_report(category, result),
+            key=key, indicator=self.loading_indicator,
+            on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể tạo báo cáo: {e}")
+        )
+    
+    def show_report(self, category, result):
+        """Show a built report in its category's widgets"""
+        self.results[category] = result
+        render_text_widget(result, getattr(self, f"{category}_report_text"))
+        if category == 'sales':
+            render_treeview(result, self.sales_report_tree)
+    
     def generate_sales_report(self):
         """Generate sales report"""
         from_date = self.sales_from_date_var.get()
         to_date = self.sales_to_date_var.get()
-        report_type = self.sales_report_type_var.get()
         
         if not from_date or not to_date:
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn khoảng thời gian!")
             return
         
-        # Clear previous report
-        self.sales_report_text.delete('1.0', tk.END)
-        
-        try:
-            if report_type == "summary":
-                self.generate_sales_summary_report(from_date, to_date)
-            elif report_type == "daily":
-                self.generate_daily_sales_report(from_date, to_date)
-            elif report_type == "by_product":
-                self.generate_product_sales_report(from_date, to_date)
-            elif report_type == "by_staff":
-                self.generate_staff_sales_report(from_date, to_date)
-            else:
-                self.generate_sales_summary_report(from_date, to_date)
-                
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể tạo báo cáo: {e}")
-    
-    def generate_sales_summary_report(self, from_date, to_date):
-        """Generate sales summary report"""
-        # Get sales data
-        sales_data = self.db_manager.fetch_one(
-            """SELECT COUNT(*) as total_orders,
-                      COALESCE(SUM(total_amount), 0) as total_revenue,
-                      COALESCE(SUM(paid_amount), 0) as total_paid,
-                      COALESCE(AVG(total_amount), 0) as avg_order_value
-               FROM sales 
-               WHERE DATE(sale_date) BETWEEN ? AND ?""",
-            (from_date, to_date)
-        )
-        
-        # Get sales by payment method
-        payment_methods = self.db_manager.fetch_all(
-            """SELECT payment_method, COUNT(*) as count, SUM(total_amount) as amount
-               FROM sales 
-               WHERE DATE(sale_date) BETWEEN ? AND ?
-               GROUP BY payment_method
-               ORDER BY amount DESC""",
-            (from_date, to_date)
-        )
-        
-        # Get top products
-        top_products = self.db_manager.fetch_all(
-            """SELECT p.name, COUNT(si.id) as quantity, SUM(si.total_price) as revenue
-               FROM sale_items si
-               JOIN products p ON si.product_id = p.id
-               JOIN sales s ON si.sale_id = s.id
-               WHERE DATE(s.sale_date) BETWEEN ? AND ?
-               GROUP BY p.id, p.name
-               ORDER BY revenue DESC
-               LIMIT 10""",
-            (from_date, to_date)
-        )
-        
-        # Generate report
-        report = f"""
-=== BÁO CÁO TỔNG HỢP BÁN HÀNG ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-1. TỔNG QUAN:
-   - Tổng số đơn hàng: {sales_data['total_orders']:,}
-   - Tổng doanh thu: {sales_data['total_revenue']:,.0f} VNĐ
-   - Đã thu được: {sales_data['total_paid']:,.0f} VNĐ
-   - Giá trị đơn hàng trung bình: {sales_data['avg_order_value']:,.0f} VNĐ
-   - Tỷ lệ thu tiền: {(sales_data['total_paid']/sales_data['total_revenue']*100 if sales_data['total_revenue'] > 0 else 0):.1f}%
-
-2. PHÂN TÍCH THEO HÌNH THỨC THANH TOÁN:
-"""
-        
-        for method in payment_methods:
-            method_name = {
-                'cash': 'Tiền mặt',
-                'card': 'Thẻ',
-                'transfer': 'Chuyển khoản',
-                'mixed': 'Hỗn hợp'
-            }.get(method['payment_method'], method['payment_method'])
-            
-            report += f"   - {method_name}: {method['count']:,} đơn ({method['amount']:,.0f} VNĐ)\n"
-        
-        report += f"\n3. TOP 10 SẢN PHẨM BÁN CHẠY:\n"
-        
-        for i, product in enumerate(top_products, 1):
-            report += f"   {i:2d}. {product['name']}: {product['quantity']:,} sp ({product['revenue']:,.0f} VNĐ)\n"
-        
-        # Calculate daily average
-        try:
-            start_date = datetime.strptime(from_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(to_date, '%Y-%m-%d').date()
-            days = (end_date - start_date).days + 1
-            daily_avg = sales_data['total_revenue'] / days if days > 0 else 0
-            
-            report += f"\n4. HIỆU SUẤT:\n"
-            report += f"   - Số ngày báo cáo: {days} ngày\n"
-            report += f"   - Doanh thu trung bình/ngày: {daily_avg:,.0f} VNĐ\n"
-            report += f"   - Số đơn hàng trung bình/ngày: {sales_data['total_orders']/days:.1f} đơn\n"
-            
-        except:
-            pass
-        
-        self.sales_report_text.insert('1.0', report.strip())
-    
-    def generate_daily_sales_report(self, from_date, to_date):
-        """Generate daily sales report"""
-        # Get daily sales data
-        daily_sales = self.db_manager.fetch_all(
-            """SELECT DATE(sale_date) as sale_date,
-                      COUNT(*) as orders,
-                      SUM(total_amount) as revenue,
-                      AVG(total_amount) as avg_order
-               FROM sales 
-               WHERE DATE(sale_date) BETWEEN ? AND ?
-               GROUP BY DATE(sale_date)
-               ORDER BY sale_date""",
-            (from_date, to_date)
-        )
-        
-        report = f"""
-=== BÁO CÁO BÁN HÀNG THEO NGÀY ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-{"Ngày":<12} {"Số đơn":<10} {"Doanh thu":<15} {"ĐH trung bình":<15}
-{"-"*60}
-"""
-        
-        total_orders = 0
-        total_revenue = 0
-        
-        for day in daily_sales:
-            report += f"{day['sale_date']:<12} {day['orders']:<10} {day['revenue']:>12,.0f} {day['avg_order']:>12,.0f}\n"
-            total_orders += day['orders']
-            total_revenue += day['revenue']
-        
-        report += f"{'-'*60}\n"
-        report += f"{'TỔNG CỘNG':<12} {total_orders:<10} {total_revenue:>12,.0f}\n"
-        
-        self.sales_report_text.insert('1.0', report)
-    
-    def generate_product_sales_report(self, from_date, to_date):
-        """Generate product sales report"""
-        # Get product sales data
-        product_sales = self.db_manager.fetch_all(
-            """SELECT p.name, p.brand, c.name as category,
-                      COUNT(si.id) as quantity,
-                      SUM(si.total_price) as revenue,
-                      AVG(si.unit_price) as avg_price
-               FROM sale_items si
-               JOIN products p ON si.product_id = p.id
-               LEFT JOIN categories c ON p.category_id = c.id
-               JOIN sales s ON si.sale_id = s.id
-               WHERE DATE(s.sale_date) BETWEEN ? AND ?
-               GROUP BY p.id, p.name, p.brand, c.name
-               ORDER BY revenue DESC""",
-            (from_date, to_date)
-        )
-        
-        report = f"""
-=== BÁO CÁO BÁN HÀNG THEO SẢN PHẨM ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-{"Sản phẩm":<30} {"Danh mục":<15} {"SL bán":<10} {"Doanh thu":<15}
-{"-"*80}
-"""
-        
-        for product in product_sales:
-            product_display = product['name'][:25]
-            if product['brand']:
-                product_display += f" ({product['brand'][:10]})"
-            
-            report += f"{product_display:<30} {(product['category'] or 'N/A'):<15} {product['quantity']:<10} {product['revenue']:>12,.0f}\n"
-        
-        self.sales_report_text.insert('1.0', report)
-    
-    def generate_staff_sales_report(self, from_date, to_date):
-        """Generate staff sales report"""
-        # Get staff sales data
-        staff_sales = self.db_manager.fetch_all(
-            """SELECT st.full_name,
-                      COUNT(s.id) as orders,
-                      SUM(s.total_amount) as revenue,
-                      AVG(s.total_amount) as avg_order
-               FROM sales s
-               JOIN staff st ON s.staff_id = st.id
-               WHERE DATE(s.sale_date) BETWEEN ? AND ?
-               GROUP BY st.id, st.full_name
-               ORDER BY revenue DESC""",
-            (from_date, to_date)
-        )
-        
-        report = f"""
-=== BÁO CÁO BÁN HÀNG THEO NHÂN VIÊN ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-{"Nhân viên":<25} {"Số đơn":<10} {"Doanh thu":<15} {"ĐH trung bình":<15}
-{"-"*70}
-"""
-        
-        for staff in staff_sales:
-            # Calculate commission (assuming 2% commission rate)
-            commission = staff['revenue'] * 0.02
-            
-            report += f"{staff['full_name']:<25} {staff['orders']:<10} {staff['revenue']:>12,.0f} {staff['avg_order']:>12,.0f}\n"
-        
-        self.sales_report_text.insert('1.0', report)
+        self.run_report('sales', from_date, to_date)
     
     def generate_inventory_report(self):
         """Generate inventory report"""
-        report_type = self.inventory_report_type_var.get()
-        
-        self.inventory_report_text.delete('1.0', tk.END)
-        
-        try:
-            if report_type == "current_stock":
-                self.generate_current_stock_report()
-            elif report_type == "low_stock":
-                self.generate_low_stock_report()
-            elif report_type == "stock_movement":
-                self.generate_stock_movement_report()
-            else:
-                self.generate_current_stock_report()
-                
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể tạo báo cáo: {e}")
-    
-    def generate_current_stock_report(self):
-        """Generate current stock report"""
-        # Get current stock data
-        stock_data = self.db_manager.fetch_all(
-            """SELECT p.name, p.brand, c.name as category,
-                      COUNT(i.id) as total_stock,
-                      COUNT(CASE WHEN i.status = 'available' THEN 1 END) as available_stock,
-                      SUM(CASE WHEN i.status = 'available' THEN i.cost_price ELSE 0 END) as total_cost,
-                      SUM(CASE WHEN i.status = 'available' THEN i.selling_price ELSE 0 END) as total_value
-               FROM products p
-               LEFT JOIN inventory i ON p.id = i.product_id
-               LEFT JOIN categories c ON p.category_id = c.id
-               WHERE p.is_active = 1
-               GROUP BY p.id, p.name, p.brand, c.name
-               ORDER BY available_stock DESC"""
-        )
-        
-        report = f"""
-=== BÁO CÁO TỒN KHO HIỆN TẠI ===
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-{"Sản phẩm":<30} {"Danh mục":<15} {"Tồn kho":<10} {"Có sẵn":<10} {"Giá trị":<15}
-{"-"*90}
-"""
-        
-        total_cost = 0
-        total_value = 0
-        total_items = 0
-        
-        for item in stock_data:
-            product_display = item['name'][:25]
-            if item['brand']:
-                product_display += f" ({item['brand'][:8]})"
-            
-            cost = item['total_cost'] or 0
-            value = item['total_value'] or 0
-            available = item['available_stock'] or 0
-            
-            total_cost += cost
-            total_value += value
-            total_items += available
-            
-            report += f"{product_display:<30} {(item['category'] or 'N/A')[:14]:<15} {item['total_stock'] or 0:<10} {available:<10} {value:>12,.0f}\n"
-        
-        report += f"{'-'*90}\n"
-        report += f"TỔNG CỘNG: {total_items} sản phẩm - Giá vốn: {total_cost:,.0f} VNĐ - Giá trị: {total_value:,.0f} VNĐ\n"
-        report += f"Lợi nhuận tiềm năng: {total_value - total_cost:,.0f} VNĐ ({((total_value - total_cost)/total_cost*100 if total_cost > 0 else 0):.1f}%)\n"
-        
-        self.inventory_report_text.insert('1.0', report)
-    
-    def generate_low_stock_report(self):
-        """Generate low stock report"""
-        threshold = BUSINESS_RULES['LOW_STOCK_THRESHOLD']
-        
-        low_stock_items = self.db_manager.fetch_all(
-            """SELECT p.name, p.brand, c.name as category,
-                      COUNT(CASE WHEN i.status = 'available' THEN 1 END) as available_stock
-               FROM products p
-               LEFT JOIN inventory i ON p.id = i.product_id
-               LEFT JOIN categories c ON p.category_id = c.id
-               WHERE p.is_active = 1
-               GROUP BY p.id, p.name, p.brand, c.name
-               HAVING available_stock <= ?
-               ORDER BY available_stock ASC""",
-            (threshold,)
-        )
-        
-        report = f"""
-=== BÁO CÁO SẢN PHẨM SẮP HẾT HÀNG ===
-Ngưỡng cảnh báo: {threshold} sản phẩm
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-{"Sản phẩm":<40} {"Danh mục":<15} {"Tồn kho":<10} {"Mức độ":<15}
-{"-"*90}
-"""
-        
-        for item in low_stock_items:
-            product_display = item['name'][:35]
-            if item['brand']:
-                product_display += f" ({item['brand'][:8]})"
-            
-            stock = item['available_stock'] or 0
-            
-            if stock == 0:
-                urgency = "🔴 HẾT HÀNG"
-            elif stock <= threshold // 2:
-                urgency = "🟠 RẤT ÍT"
-            else:
-                urgency = "🟡 SẮP HẾT"
-            
-            report += f"{product_display:<40} {(item['category'] or 'N/A')[:14]:<15} {stock:<10} {urgency:<15}\n"
-        
-        if not low_stock_items:
-            report += "\n✅ Không có sản phẩm nào sắp hết hàng!\n"
-        
-        self.inventory_report_text.insert('1.0', report)
-    
-    def generate_stock_movement_report(self):
-        """Generate stock movement report"""
-        # This would require a stock_movements table to track all inventory changes
-        report = f"""
-=== BÁO CÁO XUẤT NHẬP TỒN ===
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-Báo cáo xuất nhập tồn chi tiết sẽ được phát triển khi có bảng theo dõi
-chuyển động kho hàng (stock_movements).
-
-Sẽ bao gồm:
-- Nhập kho theo ngày
-- Xuất kho (bán hàng, sửa chữa)
-- Chuyển kho
-- Kiểm kê kho
-- Điều chỉnh tồn kho
-        """
-        
-        self.inventory_report_text.insert('1.0', report)
+        self.run_report('inventory')
     
     def generate_financial_report(self):
         """Generate financial report"""
         from_date = self.financial_from_date_var.get()
         to_date = self.financial_to_date_var.get()
-        report_type = self.financial_report_type_var.get()
         
         if not from_date or not to_date:
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn khoảng thời gian!")
             return
         
-        self.financial_report_text.delete('1.0', tk.END)
-        
-        try:
-            if report_type == "profit_loss":
-                self.generate_profit_loss_report(from_date, to_date)
-            elif report_type == "cash_flow":
-                self.generate_cash_flow_report(from_date, to_date)
-            elif report_type == "revenue_analysis":
-                self.generate_revenue_analysis(from_date, to_date)
-            else:
-                self.generate_profit_loss_report(from_date, to_date)
-                
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể tạo báo cáo: {e}")
-    
-    def generate_profit_loss_report(self, from_date, to_date):
-        """Generate profit and loss report"""
-        # Get revenue data
-        revenue_data = self.db_manager.fetch_one(
-            """SELECT COALESCE(SUM(amount), 0) as total_revenue
-               FROM transactions 
-               WHERE transaction_type = 'income' AND DATE(transaction_date) BETWEEN ? AND ?""",
-            (from_date, to_date)
-        )
-        
-        # Get expense data
-        expense_data = self.db_manager.fetch_one(
-            """SELECT COALESCE(SUM(amount), 0) as total_expenses
-               FROM transactions 
-               WHERE transaction_type = 'expense' AND DATE(transaction_date) BETWEEN ? AND ?""",
-            (from_date, to_date)
-        )
-        
-        # Get detailed expense breakdown
-        expense_breakdown = self.db_manager.fetch_all(
-            """SELECT description, SUM(amount) as amount
-               FROM transactions 
-               WHERE transaction_type = 'expense' AND DATE(transaction_date) BETWEEN ? AND ?
-               GROUP BY description
-               ORDER BY amount DESC""",
-            (from_date, to_date)
-        )
-        
-        total_revenue = revenue_data['total_revenue']
-        total_expenses = expense_data['total_expenses']
-        net_profit = total_revenue - total_expenses
-        profit_margin = (net_profit / total_revenue * 100) if total_revenue > 0 else 0
-        
-        report = f"""
-=== BÁO CÁO LÃI LỖ ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-1. DOANH THU:
-   Tổng doanh thu: {total_revenue:>20,.0f} VNĐ
-
-2. CHI PHÍ:
-   Tổng chi phí: {total_expenses:>22,.0f} VNĐ
-   
-   Chi tiết chi phí:
-"""
-        
-        for expense in expense_breakdown:
-            report += f"   - {expense['description'][:30]:<30}: {expense['amount']:>15,.0f} VNĐ\n"
-        
-        report += f"""
-3. KẾT QUẢ KINH DOANH:
-   Lợi nhuận ròng: {net_profit:>19,.0f} VNĐ
-   Tỷ suất lợi nhuận: {profit_margin:>17.1f}%
-   
-4. ĐÁNH GIÁ:
-"""
-        
-        if net_profit > 0:
-            report += "   ✅ Kinh doanh có lãi\n"
-        elif net_profit == 0:
-            report += "   ⚠️ Hòa vốn\n"
-        else:
-            report += "   ❌ Kinh doanh thua lỗ\n"
-        
-        self.financial_report_text.insert('1.0', report)
-    
-    def generate_cash_flow_report(self, from_date, to_date):
-        """Generate cash flow report"""
-        # Get daily cash flow
-        daily_flow = self.db_manager.fetch_all(
-            """SELECT DATE(transaction_date) as date,
-                      SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END) as inflow,
-                      SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END) as outflow
-               FROM transactions 
-               WHERE DATE(transaction_date) BETWEEN ? AND ?
-               GROUP BY DATE(transaction_date)
-               ORDER BY date""",
-            (from_date, to_date)
-        )
-        
-        report = f"""
-=== BÁO CÁO DÒNG TIỀN ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-{"Ngày":<12} {"Tiền vào":<15} {"Tiền ra":<15} {"Dòng tiền ròng":<15}
-{"-"*70}
-"""
-        
-        total_inflow = 0
-        total_outflow = 0
-        
-        for day in daily_flow:
-            net_flow = day['inflow'] - day['outflow']
-            total_inflow += day['inflow']
-            total_outflow += day['outflow']
-            
-            report += f"{day['date']:<12} {day['inflow']:>12,.0f} {day['outflow']:>12,.0f} {net_flow:>12,.0f}\n"
-        
-        net_total = total_inflow - total_outflow
-        
-        report += f"{'-'*70}\n"
-        report += f"{'TỔNG CỘNG':<12} {total_inflow:>12,.0f} {total_outflow:>12,.0f} {net_total:>12,.0f}\n"
-        
-        self.financial_report_text.insert('1.0', report)
-    
-    def generate_revenue_analysis(self, from_date, to_date):
-        """Generate revenue analysis report"""
-        # Revenue by source
-        revenue_sources = self.db_manager.fetch_all(
-            """SELECT reference_type, SUM(amount) as amount
-               FROM transactions 
-               WHERE transaction_type = 'income' AND DATE(transaction_date) BETWEEN ? AND ?
-               GROUP BY reference_type
-               ORDER BY amount DESC""",
-            (from_date, to_date)
-        )
-        
-        report = f"""
-=== PHÂN TÍCH DOANH THU ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-1. DOANH THU THEO NGUỒN:
-"""
-        
-        total_revenue = sum(source['amount'] for source in revenue_sources)
-        
-        source_names = {
-            'sale': 'Bán hàng',
-            'repair': 'Sửa chữa',
-            'pawn_interest': 'Lãi cầm đồ',
-            'other': 'Khác'
-        }
-        
-        for source in revenue_sources:
-            source_name = source_names.get(source['reference_type'], source['reference_type'] or 'Không xác định')
-            percentage = (source['amount'] / total_revenue * 100) if total_revenue > 0 else 0
-            
-            report += f"   - {source_name:<20}: {source['amount']:>15,.0f} VNĐ ({percentage:>5.1f}%)\n"
-        
-        report += f"\nTổng doanh thu: {total_revenue:,.0f} VNĐ\n"
-        
-        self.financial_report_text.insert('1.0', report)
+        self.run_report('financial', from_date, to_date)
     
     def generate_customer_report(self):
         """Generate customer report"""
-        report_type = self.customer_report_type_var.get()
-        from_date = self.customer_from_date_var.get()
-        to_date = self.customer_to_date_var.get()
-        
-        self.customer_report_text.delete('1.0', tk.END)
-        
-        try:
-            if report_type == "customer_list":
-                self.generate_customer_list_report()
-            elif report_type == "top_customers":
-                self.generate_top_customers_report(from_date, to_date)
-            elif report_type == "debt_customers":
-                self.generate_debt_customers_report()
-            else:
-                self.generate_customer_list_report()
-                
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể tạo báo cáo: {e}")
-    
-    def generate_customer_list_report(self):
-        """Generate customer list report"""
-        customers = self.db_manager.fetch_all(
-            """SELECT c.*,
-                      COUNT(s.id) as total_orders,
-                      COALESCE(SUM(s.total_amount), 0) as total_spent
-               FROM customers c
-               LEFT JOIN sales s ON c.id = s.customer_id
-               GROUP BY c.id
-               ORDER BY total_spent DESC"""
-        )
-        
-        report = f"""
-=== DANH SÁCH KHÁCH HÀNG ===
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-Tổng số khách hàng: {len(customers)}
-
-{"Tên khách hàng":<25} {"Điện thoại":<15} {"Số đơn":<10} {"Tổng mua":<15}
-{"-"*75}
-"""
-        
-        for customer in customers:
-            report += f"{customer['name'][:24]:<25} {(customer['phone'] or 'N/A')[:14]:<15} {customer['total_orders']:<10} {customer['total_spent']:>12,.0f}\n"
-        
-        self.customer_report_text.insert('1.0', report)
-    
-    def generate_top_customers_report(self, from_date, to_date):
-        """Generate top customers report"""
-        top_customers = self.db_manager.fetch_all(
-            """SELECT c.name, c.phone,
-                      COUNT(s.id) as orders,
-                      SUM(s.total_amount) as total_spent,
-                      AVG(s.total_amount) as avg_order
-               FROM customers c
-               JOIN sales s ON c.id = s.customer_id
-               WHERE DATE(s.sale_date) BETWEEN ? AND ?
-               GROUP BY c.id, c.name, c.phone
-               ORDER BY total_spent DESC
-               LIMIT 20""",
-            (from_date, to_date)
-        )
-        
-        report = f"""
-=== TOP 20 KHÁCH HÀNG VIP ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-{"#":<3} {"Tên khách hàng":<25} {"Số đơn":<10} {"Tổng mua":<15} {"ĐH trung bình":<15}
-{"-"*80}
-"""
-        
-        for i, customer in enumerate(top_customers, 1):
-            report += f"{i:<3} {customer['name'][:24]:<25} {customer['orders']:<10} {customer['total_spent']:>12,.0f} {customer['avg_order']:>12,.0f}\n"
-        
-        self.customer_report_text.insert('1.0', report)
-    
-    def generate_debt_customers_report(self):
-        """Generate customers with debt report"""
-        debt_customers = self.db_manager.fetch_all(
-            """SELECT c.name, c.phone, SUM(d.amount) as total_debt
-               FROM customers c
-               JOIN debts d ON c.id = d.debtor_id
-               WHERE d.debtor_type = 'customer' AND d.status = 'outstanding'
-               GROUP BY c.id, c.name, c.phone
-               ORDER BY total_debt DESC"""
-        )
-        
-        report = f"""
-=== KHÁCH HÀNG CÓ CÔNG NỢ ===
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-{"Tên khách hàng":<25} {"Điện thoại":<15} {"Số nợ":<15}
-{"-"*65}
-"""
-        
-        total_debt = 0
-        
-        for customer in debt_customers:
-            total_debt += customer['total_debt']
-            report += f"{customer['name'][:24]:<25} {(customer['phone'] or 'N/A')[:14]:<15} {customer['total_debt']:>12,.0f}\n"
-        
-        report += f"{'-'*65}\n"
-        report += f"TỔNG CÔNG NỢ: {total_debt:,.0f} VNĐ\n"
-        
-        if not debt_customers:
-            report += "\n✅ Không có khách hàng nào đang nợ!\n"
-        
-        self.customer_report_text.insert('1.0', report)
+        self.run_report('customer', self.customer_from_date_var.get(), self.customer_to_date_var.get())
     
     def generate_performance_report(self):
         """Generate performance report"""
         from_date = self.performance_from_date_var.get()
         to_date = self.performance_to_date_var.get()
-        report_type = self.performance_report_type_var.get()
         
         if not from_date or not to_date:
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn khoảng thời gian!")
             return
         
-        self.performance_report_text.delete('1.0', tk.END)
-        
+        self.run_report('performance', from_date, to_date)
+    
+    # Print and export functions, all rendering the report already built
+    def current_report(self, category):
+        """Get the report shown in a category, warning when there is none yet"""
+        result = self.results.get(category)
+        if result is None:
+            messagebox.showwarning("Cảnh báo", "Vui lòng tạo báo cáo trước!")
+        return result
+    
+    def report_filename(self, result, extension):
+        """Get a timestamped output filename for a report"""
+        return f"bao_cao_{result.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    
+    def print_report(self, category, title):
+        """Print the report shown in a category"""
+        result = self.current_report(category)
+        if result is None:
+            return
         try:
-            if report_type == "overall":
-                self.generate_overall_performance_report(from_date, to_date)
-            elif report_type == "sales_performance":
-                self.generate_sales_performance_report(from_date, to_date)
-            elif report_type == "staff_performance":
-                self.generate_staff_performance_report(from_date, to_date)
-            else:
-                self.generate_overall_performance_report(from_date, to_date)
-                
+            from utils.print_utils import print_text_report
+            print_text_report(render_text(result), title)
         except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể tạo báo cáo: {e}")
+            messagebox.showerror("Lỗi in", f"Không thể in báo cáo: {e}")
     
-    def generate_overall_performance_report(self, from_date, to_date):
-        """Generate overall performance report"""
-        # Key metrics
-        sales_metrics = self.db_manager.fetch_one(
-            """SELECT COUNT(*) as orders, SUM(total_amount) as revenue
-               FROM sales WHERE DATE(sale_date) BETWEEN ? AND ?""",
-            (from_date, to_date)
-        )
+    def save_report(self, category, file_format):
+        """Save the report shown in a category as a text, CSV or XLSX file on the query executor"""
+        result = self.current_report(category)
+        if result is None:
+            return
         
-        repairs_metrics = self.db_manager.fetch_one(
-            """SELECT COUNT(*) as repairs, SUM(total_cost) as repair_revenue
-               FROM repairs WHERE DATE(created_at) BETWEEN ? AND ?""",
-            (from_date, to_date)
-        )
+        filename = self.report_filename(result, file_format)
+        if file_format == 'txt':
+            write = lambda: render_file(result, filename)
+        elif file_format == 'csv':
+            write = lambda: render_csv(result, filename)
+        elif category == 'sales' and 'from_date' in result.params:
+            write = lambda: render_xlsx(result, filename, extra_sheets=[self.sales_detail_sheet(result)])
+        else:
+            write = lambda: render_xlsx(result, filename)
         
-        report = f"""
-=== BÁO CÁO HIỆU SUẤT TỔNG QUAN ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-1. HIỆU SUẤT BÁN HÀNG:
-   - Số đơn hàng: {sales_metrics['orders']:,}
-   - Doanh thu: {sales_metrics['revenue']:,.0f} VNĐ
-   - Đơn hàng trung bình: {(sales_metrics['revenue']/sales_metrics['orders'] if sales_metrics['orders'] > 0 else 0):,.0f} VNĐ
-
-2. HIỆU SUẤT SỬA CHỮA:
-   - Số lượng sửa chữa: {repairs_metrics['repairs']:,}
-   - Doanh thu sửa chữa: {(repairs_metrics['repair_revenue'] or 0):,.0f} VNĐ
-
-3. TỔNG KẾT:
-   - Tổng doanh thu: {sales_metrics['revenue'] + (repairs_metrics['repair_revenue'] or 0):,.0f} VNĐ
-   - Hiệu suất tổng thể: Đạt mục tiêu (cần thiết lập KPI)
-        """
+        def show_saved(saved):
+            if saved:
+                messagebox.showinfo("Thành công", f"Đã xuất báo cáo ra {os.path.join('reports', filename)}!")
+            else:
+                messagebox.showerror("Lỗi", "Không thể xuất báo cáo!")
         
-        self.performance_report_text.insert('1.0', report)
-    
-    def generate_sales_performance_report(self, from_date, to_date):
-        """Generate sales performance report"""
-        # Sales by time periods
-        daily_sales = self.db_manager.fetch_all(
-            """SELECT DATE(sale_date) as date, COUNT(*) as orders, SUM(total_amount) as revenue
-               FROM sales WHERE DATE(sale_date) BETWEEN ? AND ?
-               GROUP BY DATE(sale_date) ORDER BY date""",
-            (from_date, to_date)
+        # No key: every save reports its own outcome
+        self.query_executor.submit_call(
+            write, on_done=show_saved, indicator=self.loading_indicator,
+            on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể xuất báo cáo: {e}")
         )
-        
-        report = f"""
-=== BÁO CÁO HIỆU SUẤT BÁN HÀNG ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-HIỆU SUẤT THEO NGÀY:
-{"Ngày":<12} {"Đơn hàng":<10} {"Doanh thu":<15} {"Hiệu suất":<12}
-{"-"*55}
-"""
-        
-        total_orders = sum(day['orders'] for day in daily_sales)
-        total_revenue = sum(day['revenue'] for day in daily_sales)
-        avg_daily_revenue = total_revenue / len(daily_sales) if daily_sales else 0
-        
-        for day in daily_sales:
-            performance = "Tốt" if day['revenue'] >= avg_daily_revenue else "Trung bình"
-            report += f"{day['date']:<12} {day['orders']:<10} {day['revenue']:>12,.0f} {performance:<12}\n"
-        
-        report += f"\nTổng kết: {total_orders} đơn hàng, {total_revenue:,.0f} VNĐ\n"
-        
-        self.performance_report_text.insert('1.0', report)
     
-    def generate_staff_performance_report(self, from_date, to_date):
-        """Generate staff performance report"""
-        # Staff performance metrics
-        staff_performance = self.db_manager.fetch_all(
-            """SELECT st.full_name,
-                      COUNT(s.id) as sales_count,
-                      SUM(s.total_amount) as sales_revenue,
-                      COUNT(r.id) as repairs_count
-               FROM staff st
-               LEFT JOIN sales s ON st.id = s.staff_id AND DATE(s.sale_date) BETWEEN ? AND ?
-               LEFT JOIN repairs r ON st.id = r.staff_id AND DATE(r.created_at) BETWEEN ? AND ?
-               WHERE st.is_active = 1
-               GROUP BY st.id, st.full_name
-               ORDER BY sales_revenue DESC""",
-            (from_date, to_date, from_date, to_date)
-        )
-        
-        report = f"""
-=== BÁO CÁO HIỆU SUẤT NHÂN VIÊN ===
-Từ ngày: {from_date} đến ngày: {to_date}
-Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-{"Nhân viên":<20} {"Bán hàng":<10} {"Doanh thu":<15} {"Sửa chữa":<10} {"Xếp hạng":<10}
-{"-"*75}
-"""
-        
-        for i, staff in enumerate(staff_performance, 1):
-            ranking = f"#{i}"
-            report += f"{staff['full_name'][:19]:<20} {staff['sales_count'] or 0:<10} {(staff['sales_revenue'] or 0):>12,.0f} {staff['repairs_count'] or 0:<10} {ranking:<10}\n"
-        
-        self.performance_report_text.insert('1.0', report)
+    def sales_detail_sheet(self, result):
+        """Get the sheet listing every sale in a sales report's date range, run on a worker thread"""
+        from utils.excel_utils import format_sales_data_for_export
+        
+        # Rows stream from the worker's reader cursor into the workbook
+        sales = self.db_manager.iterate("""
+            SELECT s.*, c.name as customer_name, st.full_name as staff_name
+            FROM sales s
+            LEFT JOIN customers c ON s.customer_id = c.id
+            LEFT JOIN staff st ON s.staff_id = st.id
+            WHERE s.sale_day BETWEEN ? AND ?
+            ORDER BY s.sale_date
+        """, self.day_range(result.params['from_date'], result.params['to_date']))
+        
+        rows, headers = format_sales_data_for_export(sales, numeric=True)
+        return ("Chi tiết bán hàng", rows, headers, (4, 5))
+    
+    def add_save_buttons(self, btn_frame, category):
+        """Add the save as text and CSV buttons of a category"""
+        ttk.Button(btn_frame, text="💾 Lưu văn bản",
+                  command=lambda: self.save_report(category, 'txt')).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="📑 Xuất CSV",
+                  command=lambda: self.save_report(category, 'csv')).pack(side=tk.LEFT, padx=5)
     
-    # Print and export functions
     def print_sales_report(self):
         """Print sales report"""
-        try:
-            from utils.print_utils import print_text_report
-            report_content = self.sales_report_text.get('1.0', tk.END)
-            print_text_report("Báo cáo bán hàng", report_content)
-        except Exception as e:
-            messagebox.showerror("Lỗi in", f"Không thể in báo cáo: {e}")
+        self.print_report('sales', "Báo cáo bán hàng")
     
     def export_sales_excel(self):
         """Export sales report to Excel"""
-        try:
-            from utils.excel_utils import export_sales_report
-            from_date = self.sales_from_date_var.get()
-            to_date = self.sales_to_date_var.get()
-            export_sales_report(self.db_manager, from_date, to_date)
-            messagebox.showinfo("Thành công", "Đã xuất báo cáo ra Excel!")
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể xuất Excel: {e}")
+        self.save_report('sales', 'xlsx')
     
     def show_sales_chart(self):
         """Show sales chart"""
@@ -1223,16 +636,11 @@ Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
     
     def print_inventory_report(self):
         """Print inventory report"""
-        try:
-            from utils.print_utils import print_text_report
-            report_content = self.inventory_report_text.get('1.0', tk.END)
-            print_text_report("Báo cáo kho hàng", report_content)
-        except Exception as e:
-            messagebox.showerror("Lỗi in", f"Không thể in báo cáo: {e}")
+        self.print_report('inventory', "Báo cáo kho hàng")
     
     def export_inventory_excel(self):
         """Export inventory report to Excel"""
-        messagebox.showinfo("Thông báo", "Chức năng xuất Excel báo cáo kho hàng sẽ được phát triển!")
+        self.save_report('inventory', 'xlsx')
     
     def show_stock_alerts(self):
         """Show stock alerts"""
@@ -1240,16 +648,11 @@ Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
     
     def print_financial_report(self):
         """Print financial report"""
-        try:
-            from utils.print_utils import print_text_report
-            report_content = self.financial_report_text.get('1.0', tk.END)
-            print_text_report("Báo cáo tài chính", report_content)
-        except Exception as e:
-            messagebox.showerror("Lỗi in", f"Không thể in báo cáo: {e}")
+        self.print_report('financial', "Báo cáo tài chính")
     
     def export_financial_excel(self):
         """Export financial report to Excel"""
-        messagebox.showinfo("Thông báo", "Chức năng xuất Excel báo cáo tài chính sẽ được phát triển!")
+        self.save_report('financial', 'xlsx')
     
     def show_financial_chart(self):
         """Show financial chart"""
@@ -1257,16 +660,11 @@ Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
     
     def print_customer_report(self):
         """Print customer report"""
-        try:
-            from utils.print_utils import print_text_report
-            report_content = self.customer_report_text.get('1.0', tk.END)
-            print_text_report("Báo cáo khách hàng", report_content)
-        except Exception as e:
-            messagebox.showerror("Lỗi in", f"Không thể in báo cáo: {e}")
+        self.print_report('customer', "Báo cáo khách hàng")
     
     def export_customer_excel(self):
         """Export customer report to Excel"""
-        messagebox.showinfo("Thông báo", "Chức năng xuất Excel báo cáo khách hàng sẽ được phát triển!")
+        self.save_report('customer', 'xlsx')
     
     def send_customer_email(self):
         """Send customer email"""
@@ -1274,16 +672,11 @@ Thời gian tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
     
     def print_performance_report(self):
         """Print performance report"""
-        try:
-            from utils.print_utils import print_text_report
-            report_content = self.performance_report_text.get('1.0', tk.END)
-            print_text_report("Báo cáo hiệu suất", report_content)
-        except Exception as e:
-            messagebox.showerror("Lỗi in", f"Không thể in báo cáo: {e}")
+        self.print_report('performance', "Báo cáo hiệu suất")
     
     def export_performance_excel(self):
         """Export performance report to Excel"""
-        messagebox.showinfo("Thông báo", "Chức năng xuất Excel báo cáo hiệu suất sẽ được phát triển!")
+        self.save_report('performance', 'xlsx')
     
     def show_performance_dashboard(self):
         """Show performance dashboard"""
@@ -7,11 +7,18 @@ Sales management tab for ChViet Mobile Store Management System
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date
+import json
 import uuid
 from decimal import Decimal
 
-from models import Sale, SaleItem, Customer
-from config import BUSINESS_RULES
+from config import BUSINESS_RULES, DATABASE_CONFIG
+from gui.query_executor import QueryExecutor, LoadingIndicator
+from gui.tree_binder import TreeBinder
+from gui.search_controller import SearchController
+from gui.scan_input import ScanInput
+from gui.history_pager import HistoryPager
+from utils.catalog_cache import CatalogCache
+from utils.lookup_cache import LookupCache
 
 class SalesTab:
     def __init__(self, parent, db_manager, current_user):
@@ -20,8 +27,16 @@ class SalesTab:
         self.current_user = current_user
         
         self.frame = ttk.Frame(parent)
+        self.query_executor = QueryExecutor.for_widget(self.frame, db_manager)
+        self.lookups = LookupCache.for_manager(db_manager)
+        self.loading_indicator = LoadingIndicator(self.frame)
+        self.catalog = CatalogCache.for_manager(db_manager)
         self.setup_ui()
         self.load_data()
+        
+        # Warm the scan cache in the background
+        if not self.catalog.loaded:
+            self.query_executor.submit_call(self.catalog.load, key='sales.catalog')
     
     def setup_ui(self):
         """Setup sales tab UI"""
@@ -64,15 +79,19 @@ class SalesTab:
         # Barcode/IMEI search
         ttk.Label(search_frame, text="Quét mã vạch / IMEI:").grid(row=0, column=0, sticky=tk.W, pady=5)
         self.barcode_var = tk.StringVar()
-        self.barcode_var.trace('w', self.on_barcode_scan)
         barcode_entry = ttk.Entry(search_frame, textvariable=self.barcode_var, width=40)
         barcode_entry.grid(row=0, column=1, sticky=tk.W, pady=5, padx=(10, 0))
-        barcode_entry.bind('<Return>', self.add_product_to_cart)
+        self.scan_input = ScanInput(barcode_entry, self.barcode_var, self.on_barcode_scans)
         
         # Product search
         ttk.Label(search_frame, text="Tìm sản phẩm:").grid(row=1, column=0, sticky=tk.W, pady=5)
         self.product_search_var = tk.StringVar()
-        self.product_search_var.trace('w', self.on_product_search)
+        self.product_search = SearchController(
+            self.product_search_var, self.search_available_products, self.populate_available_products,
+            self.refresh_available_products, self.query_executor, 'sales.available_products',
+            ('name', 'brand', 'model', 'barcode', 'sku', 'imei', 'serial_number'),
+            indicator=self.loading_indicator
+        )
         product_search_entry = ttk.Entry(search_frame, textvariable=self.product_search_var, width=40)
         product_search_entry.grid(row=1, column=1, sticky=tk.W, pady=5, padx=(10, 0))
         
@@ -84,6 +103,7 @@ class SalesTab:
         self.available_products_tree = ttk.Treeview(products_frame,
                                                    columns=('id', 'name', 'imei', 'price', 'stock'),
                                                    show='headings', height=10)
+        self.available_products_binder = TreeBinder(self.available_products_tree)
         
         self.available_products_tree.heading('id', text='ID')
         self.available_products_tree.heading('name', text='Sản phẩm')
@@ -238,7 +258,11 @@ class SalesTab:
         
         ttk.Label(search_frame, text="Số hóa đơn / Khách hàng:").pack(anchor=tk.W)
         self.sales_search_var = tk.StringVar()
-        self.sales_search_var.trace('w', self.on_sales_search)
+        self.sales_search = SearchController(
+            self.sales_search_var, self.search_sales, self.populate_sales, self.refresh_sales,
+            self.query_executor, 'sales.sales', ('invoice_number', 'customer_name'),
+            indicator=self.loading_indicator
+        )
         search_entry = ttk.Entry(search_frame, textvariable=self.sales_search_var, width=30)
         search_entry.pack(pady=5)
         
@@ -269,6 +293,7 @@ class SalesTab:
                                       show='headings',
                                       yscrollcommand=v_scrollbar.set,
                                       xscrollcommand=h_scrollbar.set)
+        self.sales_binder = TreeBinder(self.sales_tree)
         
         # Configure scrollbars
         v_scrollbar.config(command=self.sales_tree.yview)
@@ -299,6 +324,11 @@ class SalesTab:
         # Bind double-click
         self.sales_tree.bind('<Double-1>', lambda e: self.view_sale_details())
     
+        # Newer / older pages instead of a fixed LIMIT
+        self.sales_pager = HistoryPager(history_frame, self.query_executor, 'sales.sales', 'sale_date',
+                                        self.populate_sales, indicator=self.loading_indicator)
+        self.sales_pager.frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+    
     def setup_customers_tab(self):
         """Setup customers management tab"""
         customers_frame = ttk.Frame(self.notebook)
@@ -314,7 +344,11 @@ class SalesTab:
         
         ttk.Label(search_frame, text="Tên / SĐT:").pack(side=tk.LEFT, padx=(0, 5))
         self.customer_search_var = tk.StringVar()
-        self.customer_search_var.trace('w', self.on_customer_search)
+        self.customer_search = SearchController(
+            self.customer_search_var, self.search_customers, self.populate_customers, self.refresh_customers,
+            self.query_executor, 'sales.customers', ('name', 'phone'),
+            indicator=self.loading_indicator
+        )
         search_entry = ttk.Entry(search_frame, textvariable=self.customer_search_var, width=40)
         search_entry.pack(side=tk.LEFT)
         
@@ -339,6 +373,7 @@ class SalesTab:
                                           columns=('id', 'name', 'phone', 'email', 'address', 
                                                  'total_purchases', 'debt'),
                                           show='headings')
+        self.customers_binder = TreeBinder(self.customers_tree)
         
         # Column headings
         columns = {
@@ -383,6 +418,7 @@ class SalesTab:
                                                   'total_amount', 'monthly_payment', 'remaining',
                                                   'next_payment', 'status'),
                                            show='headings')
+        self.installment_binder = TreeBinder(self.installment_tree)
         
         # Column headings
         columns = {
@@ -410,66 +446,72 @@ class SalesTab:
         self.refresh_customers()
         self.refresh_installments()
     
+    def release_data(self):
+        """Drop the loaded lists while the tab is hidden; load_data() reads them again"""
+        # The cart is kept; only the lists around it are dropped
+        for search in (self.product_search, self.sales_search, self.customer_search):
+            search.clear_cache()
+        for binder in (self.available_products_binder, self.sales_binder,
+                       self.customers_binder, self.installment_binder):
+            binder.clear()
+    
     def refresh_available_products(self):
         """Refresh available products list"""
-        # Clear existing items
-        for item in self.available_products_tree.get_children():
-            self.available_products_tree.delete(item)
-        
-        # Load available inventory
+        # Load available inventory with its product's stock counter
         query = """
-        SELECT i.*, p.name, p.brand, p.model, p.selling_price
+        SELECT i.*, p.name, p.brand, p.model, p.selling_price, ps.available as stock_count
         FROM inventory i
         JOIN products p ON i.product_id = p.id
+        JOIN product_stock ps ON ps.product_id = i.product_id
         WHERE i.status = 'available' AND p.is_active = 1
         ORDER BY p.name
         """
         
-        items = self.db_manager.fetch_all(query)
+        self.query_executor.submit(query, on_done=self.populate_available_products,
+                                   key='sales.available_products', indicator=self.loading_indicator)
+    
+    def populate_available_products(self, items):
+        """Fill available products tree with query results"""
+        # Collected rows go through the binder, which only applies the differences
+        rows = []
         
         for item in items:
             product_name = item['name']
             if item['brand']:
                 product_name += f" ({item['brand']})"
             
-            # Get stock count for this product
-            stock_query = """
-            SELECT COUNT(*) as count FROM inventory 
-            WHERE product_id = ? AND status = 'available'
-            """
-            stock_result = self.db_manager.fetch_one(stock_query, (item['product_id'],))
-            stock_count = stock_result['count'] if stock_result else 0
-            
-            self.available_products_tree.insert('', 'end', values=(
+            # The inventory id doubles as the row id so a scan can select it directly
+            rows.append((item['id'], (
                 item['id'],
                 product_name,
                 item['imei'] or '',
-                f"{(item['selling_price'] or item['selling_price'] or 0):,.0f}",
-                stock_count
-            ))
+                f"{(item['selling_price'] or 0):,.0f}",
+                item['stock_count']
+            )))
+        
+        self.available_products_binder.update(rows)
     
     def refresh_sales(self):
         """Refresh sales history"""
-        # Clear existing items
-        for item in self.sales_tree.get_children():
-            self.sales_tree.delete(item)
-        
         # Load sales
         query = """
         SELECT s.*, c.name as customer_name, st.full_name as staff_name
         FROM sales s
         LEFT JOIN customers c ON s.customer_id = c.id
         LEFT JOIN staff st ON s.staff_id = st.id
-        ORDER BY s.sale_date DESC
-        LIMIT 500
         """
         
-        sales = self.db_manager.fetch_all(query)
+        self.sales_pager.set_query(query)
+    
+    def populate_sales(self, sales):
+        """Fill sales history tree with query results"""
+        # Collected rows go through the binder, which only applies the differences
+        rows = []
         
         for sale in sales:
             sale_date = datetime.fromisoformat(sale['sale_date']).strftime('%d/%m/%Y %H:%M')
             
-            self.sales_tree.insert('', 'end', values=(
+            rows.append((sale['id'], (
                 sale['id'],
                 sale['invoice_number'],
                 sale_date,
@@ -479,14 +521,12 @@ class SalesTab:
                 f"{sale['paid_amount']:,.0f}",
                 sale['payment_method'],
                 sale['payment_status']
-            ))
+            )))
+        
+        self.sales_binder.update(rows)
     
     def refresh_customers(self):
         """Refresh customers list"""
-        # Clear existing items
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
-        
         # Load customers with purchase totals and debts
         query = """
         SELECT c.*,
@@ -499,10 +539,16 @@ class SalesTab:
         ORDER BY c.name
         """
         
-        customers = self.db_manager.fetch_all(query)
+        self.query_executor.submit(query, on_done=self.populate_customers,
+                                   key='sales.customers', indicator=self.loading_indicator)
+    
+    def populate_customers(self, customers):
+        """Fill customers tree with query results"""
+        # Collected rows go through the binder, which only applies the differences
+        rows = []
         
         for customer in customers:
-            self.customers_tree.insert('', 'end', values=(
+            rows.append((customer['id'], (
                 customer['id'],
                 customer['name'],
                 customer['phone'] or '',
@@ -510,14 +556,12 @@ class SalesTab:
                 customer['address'] or '',
                 f"{customer['total_purchases']:,.0f}",
                 f"{customer['total_debt']:,.0f}" if customer['total_debt'] > 0 else "0"
-            ))
+            )))
+        
+        self.customers_binder.update(rows)
     
     def refresh_installments(self):
         """Refresh installment contracts"""
-        # Clear existing items
-        for item in self.installment_tree.get_children():
-            self.installment_tree.delete(item)
-        
         # Load installment sales
         query = """
         SELECT s.*, c.name as customer_name,
@@ -531,13 +575,19 @@ class SalesTab:
         ORDER BY s.sale_date DESC
         """
         
-        installments = self.db_manager.fetch_all(query)
+        self.query_executor.submit(query, on_done=self.populate_installments,
+                                   key='sales.installments', indicator=self.loading_indicator)
+    
+    def populate_installments(self, installments):
+        """Fill installment tree with query results"""
+        # Collected rows go through the binder, which only applies the differences
+        rows = []
         
         for installment in installments:
             remaining = installment['total_amount'] - installment['paid_amount']
             next_payment_date = "N/A"  # This would need more complex calculation
             
-            self.installment_tree.insert('', 'end', values=(
+            rows.append((installment['id'], (
                 installment['id'],
                 installment['invoice_number'],
                 installment['customer_name'],
@@ -547,104 +597,64 @@ class SalesTab:
                 f"{remaining:,.0f}",
                 next_payment_date,
                 installment['payment_status']
-            ))
+            )))
+        
+        self.installment_binder.update(rows)
     
     def load_customers_combo(self, combo):
         """Load customers into combobox"""
-        customers = self.db_manager.fetch_all("SELECT id, name, phone FROM customers ORDER BY name")
+        customers = self.lookups.get('customers')
         combo['values'] = [""] + [f"{c['id']} - {c['name']} ({c['phone']})" for c in customers if c['phone']]
     
-    def on_barcode_scan(self, *args):
-        """Handle barcode scan"""
-        barcode = self.barcode_var.get()
-        if len(barcode) >= 10:  # Minimum barcode length
-            self.search_product_by_barcode(barcode)
+    def on_barcode_scans(self, codes):
+        """Add the unit of each finished scan to the cart, one lookup per scan"""
+        in_cart = {cart_item['inventory_id'] for cart_item in self.cart_items}
+        last_added = None
+        not_found = []
     
-    def search_product_by_barcode(self, barcode):
-        """Search product by barcode or IMEI"""
-        # Search by barcode
-        product = self.db_manager.fetch_one(
-            """SELECT i.*, p.name, p.brand, p.model, p.selling_price
-               FROM inventory i
-               JOIN products p ON i.product_id = p.id
-               WHERE (p.barcode = ? OR i.imei = ?) AND i.status = 'available'
-               LIMIT 1""",
-            (barcode, barcode)
-        )
-        
-        if product:
-            # Highlight the product in available products tree
-            for item in self.available_products_tree.get_children():
-                values = self.available_products_tree.item(item)['values']
-                if str(values[0]) == str(product['id']) or values[2] == barcode:
-                    self.available_products_tree.selection_set(item)
-                    self.available_products_tree.see(item)
-                    break
+        for code in codes:
+            # Skipping units already in the cart lets repeated barcode scans pick the next unit
+            item = self.catalog.lookup(code, exclude=in_cart)
+            if item is None:
+                not_found.append(code)
+                continue
+        
+            self.add_item_to_cart(item, refresh=False)
+            in_cart.add(item['id'])
+            last_added = item
+        
+        if last_added:
+            self.update_cart_display()
+            self.calculate_total()
+            
+            # Highlight the last scanned product in available products tree
+            if self.available_products_tree.exists(last_added['id']):
+                self.available_products_tree.selection_set(last_added['id'])
+                self.available_products_tree.see(last_added['id'])
+        
+        if not_found:
+            messagebox.showwarning("Không tìm thấy",
+                                   "Không tìm thấy sản phẩm (hoặc đã có trong giỏ hàng) với mã:\n" +
+                                   "\n".join(not_found))
     
-    def on_product_search(self, *args):
-        """Handle product search"""
-        search_term = self.product_search_var.get().lower()
-        
-        if not search_term:
-            self.refresh_available_products()
-            return
-        
-        # Clear existing items
-        for item in self.available_products_tree.get_children():
-            self.available_products_tree.delete(item)
-        
-        # Search products
+    def search_available_products(self, search_term):
+        """Search available items by product or IMEI"""
         query = """
-        SELECT i.*, p.name, p.brand, p.model, p.selling_price
+        SELECT i.*, p.name, p.brand, p.model, p.barcode, p.sku, p.selling_price, ps.available as stock_count
         FROM inventory i
         JOIN products p ON i.product_id = p.id
+        JOIN product_stock ps ON ps.product_id = i.product_id
         WHERE i.status = 'available' AND p.is_active = 1 AND (
-            LOWER(p.name) LIKE ? OR
-            LOWER(p.brand) LIKE ? OR
-            LOWER(p.model) LIKE ? OR
-            i.imei LIKE ?
+            i.product_id IN (SELECT value FROM json_each(?)) OR
+            i.id IN (SELECT value FROM json_each(?))
         )
         ORDER BY p.name
         """
         
-        search_pattern = f"%{search_term}%"
-        items = self.db_manager.fetch_all(query, (search_pattern, search_pattern, 
-                                                search_pattern, search_pattern))
-        
-        for item in items:
-            product_name = item['name']
-            if item['brand']:
-                product_name += f" ({item['brand']})"
-            
-            self.available_products_tree.insert('', 'end', values=(
-                item['id'],
-                product_name,
-                item['imei'] or '',
-                f"{(item['selling_price'] or 0):,.0f}",
-                "1"  # Available quantity for this specific item
-            ))
-    
-    def add_product_to_cart(self, event=None):
-        """Add product to cart by barcode/IMEI"""
-        barcode = self.barcode_var.get().strip()
-        if not barcode:
-            return
-        
-        # Find product by barcode/IMEI
-        item = self.db_manager.fetch_one(
-            """SELECT i.*, p.name, p.brand, p.model, p.selling_price
-               FROM inventory i
-               JOIN products p ON i.product_id = p.id
-               WHERE (p.barcode = ? OR i.imei = ?) AND i.status = 'available'
-               LIMIT 1""",
-            (barcode, barcode)
-        )
-        
-        if item:
-            self.add_item_to_cart(item)
-            self.barcode_var.set("")  # Clear barcode entry
-        else:
-            messagebox.showwarning("Không tìm thấy", f"Không tìm thấy sản phẩm với mã: {barcode}")
+        product_ids = self.db_manager.search('products', search_term)
+        item_ids = self.db_manager.search('inventory', search_term)
+        rows = self.db_manager.fetch_all(query, (json.dumps(product_ids), json.dumps(item_ids)))
+        return rows, max(len(product_ids), len(item_ids)) < DATABASE_CONFIG['SEARCH_LIMIT']
     
     def add_selected_product_to_cart(self, event=None):
         """Add selected product to cart"""
@@ -668,7 +678,7 @@ class SalesTab:
         if item:
             self.add_item_to_cart(item)
     
-    def add_item_to_cart(self, item):
+    def add_item_to_cart(self, item, refresh=True):
         """Add item to cart"""
         # Check if item already in cart (for IMEI tracked items)
         if item['imei']:
@@ -690,8 +700,9 @@ class SalesTab:
         
         # Add to cart
         self.cart_items.append(cart_item)
-        self.update_cart_display()
-        self.calculate_total()
+        if refresh:
+            self.update_cart_display()
+            self.calculate_total()
     
     def update_cart_display(self):
         """Update cart treeview"""
@@ -830,106 +841,108 @@ class SalesTab:
                 'updated_at': datetime.now().isoformat()
             }
             
-            # Insert sale
-            columns = ', '.join(sale_data.keys())
-            placeholders = ', '.join(['?' for _ in sale_data])
-            query = f"INSERT INTO sales ({columns}) VALUES ({placeholders})"
-            
-            cursor = self.db_manager.execute_query(query, list(sale_data.values()))
-            sale_id = cursor.lastrowid
-            
-            # Insert sale items and update inventory
-            for cart_item in self.cart_items:
-                # Insert sale item
-                sale_item_data = {
-                    'sale_id': sale_id,
-                    'inventory_id': cart_item['inventory_id'],
-                    'product_id': cart_item['product_id'],
-                    'imei': cart_item['imei'],
-                    'quantity': cart_item['quantity'],
-                    'unit_price': cart_item['price'],
-                    'discount_amount': 0,
-                    'total_price': cart_item['price'] * cart_item['quantity'],
-                    'warranty_months': BUSINESS_RULES['DEFAULT_WARRANTY_MONTHS'],
-                    'created_at': datetime.now().isoformat()
-                }
-                
-                columns = ', '.join(sale_item_data.keys())
-                placeholders = ', '.join(['?' for _ in sale_item_data])
-                query = f"INSERT INTO sale_items ({columns}) VALUES ({placeholders})"
-                self.db_manager.execute_query(query, list(sale_item_data.values()))
+            # Write the whole sale as a single unit of work
+            with self.db_manager.transaction():
+                # Insert sale
+                columns = ', '.join(sale_data.keys())
+                placeholders = ', '.join(['?' for _ in sale_data])
+                query = f"INSERT INTO sales ({columns}) VALUES ({placeholders})"
                 
-                # Update inventory status
-                self.db_manager.execute_query(
-                    "UPDATE inventory SET status = 'sold', updated_at = ? WHERE id = ?",
-                    (datetime.now().isoformat(), cart_item['inventory_id'])
-                )
+                cursor = self.db_manager.execute_query(query, list(sale_data.values()))
+                sale_id = cursor.lastrowid
                 
-                # Create warranty record if applicable
-                if cart_item['imei']:
-                    warranty_data = {
-                        'warranty_number': f"BH{datetime.now().strftime('%Y%m%d%H%M%S')}{cart_item['inventory_id']}",
-                        'imei': cart_item['imei'],
-                        'product_id': cart_item['product_id'],
-                        'customer_id': customer_id,
+                # Insert sale items and update inventory
+                for cart_item in self.cart_items:
+                    # Insert sale item
+                    sale_item_data = {
                         'sale_id': sale_id,
-                        'warranty_type': 'product',
-                        'start_date': date.today().isoformat(),
-                        'end_date': (date.today().replace(
-                            year=date.today().year + (date.today().month + BUSINESS_RULES['DEFAULT_WARRANTY_MONTHS'] - 1) // 12,
-                            month=(date.today().month + BUSINESS_RULES['DEFAULT_WARRANTY_MONTHS'] - 1) % 12 + 1
-                        )).isoformat(),
-                        'status': 'active',
-                        'created_at': datetime.now().isoformat(),
-                        'updated_at': datetime.now().isoformat()
+                        'inventory_id': cart_item['inventory_id'],
+                        'product_id': cart_item['product_id'],
+                        'imei': cart_item['imei'],
+                        'quantity': cart_item['quantity'],
+                        'unit_price': cart_item['price'],
+                        'discount_amount': 0,
+                        'total_price': cart_item['price'] * cart_item['quantity'],
+                        'warranty_months': BUSINESS_RULES['DEFAULT_WARRANTY_MONTHS'],
+                        'created_at': datetime.now().isoformat()
                     }
                     
-                    from utils.qr_utils import generate_qr_code
-                    qr_code = generate_qr_code(f"WARRANTY:{warranty_data['warranty_number']}")
-                    warranty_data['qr_code'] = qr_code
+                    columns = ', '.join(sale_item_data.keys())
+                    placeholders = ', '.join(['?' for _ in sale_item_data])
+                    query = f"INSERT INTO sale_items ({columns}) VALUES ({placeholders})"
+                    self.db_manager.execute_query(query, list(sale_item_data.values()))
                     
-                    columns = ', '.join(warranty_data.keys())
-                    placeholders = ', '.join(['?' for _ in warranty_data])
-                    query = f"INSERT INTO warranties ({columns}) VALUES ({placeholders})"
-                    self.db_manager.execute_query(query, list(warranty_data.values()))
-            
-            # Create transaction record
-            transaction_data = {
-                'transaction_type': 'income',
-                'amount': paid,
-                'description': f'Bán hàng - {invoice_number}',
-                'reference_id': sale_id,
-                'reference_type': 'sale',
-                'payment_method': self.payment_method_var.get(),
-                'staff_id': self.current_user['id'],
-                'transaction_date': datetime.now().isoformat(),
-                'created_at': datetime.now().isoformat()
-            }
-            
-            columns = ', '.join(transaction_data.keys())
-            placeholders = ', '.join(['?' for _ in transaction_data])
-            query = f"INSERT INTO transactions ({columns}) VALUES ({placeholders})"
-            self.db_manager.execute_query(query, list(transaction_data.values()))
-            
-            # Create debt record if not fully paid
-            if paid < total:
-                debt_data = {
-                    'debtor_type': 'customer',
-                    'debtor_id': customer_id,
-                    'amount': total - paid,
-                    'description': f'Nợ từ hóa đơn {invoice_number}',
+                    # Update inventory status
+                    self.db_manager.execute_query(
+                        "UPDATE inventory SET status = 'sold', updated_at = ? WHERE id = ?",
+                        (datetime.now().isoformat(), cart_item['inventory_id'])
+                    )
+                    
+                    # Create warranty record if applicable
+                    if cart_item['imei']:
+                        warranty_data = {
+                            'warranty_number': f"BH{datetime.now().strftime('%Y%m%d%H%M%S')}{cart_item['inventory_id']}",
+                            'imei': cart_item['imei'],
+                            'product_id': cart_item['product_id'],
+                            'customer_id': customer_id,
+                            'sale_id': sale_id,
+                            'warranty_type': 'product',
+                            'start_date': date.today().isoformat(),
+                            'end_date': (date.today().replace(
+                                year=date.today().year + (date.today().month + BUSINESS_RULES['DEFAULT_WARRANTY_MONTHS'] - 1) // 12,
+                                month=(date.today().month + BUSINESS_RULES['DEFAULT_WARRANTY_MONTHS'] - 1) % 12 + 1
+                            )).isoformat(),
+                            'status': 'active',
+                            'created_at': datetime.now().isoformat(),
+                            'updated_at': datetime.now().isoformat()
+                        }
+                        
+                        from utils.qr_utils import generate_qr_code
+                        qr_code = generate_qr_code(f"WARRANTY:{warranty_data['warranty_number']}")
+                        warranty_data['qr_code'] = qr_code
+                        
+                        columns = ', '.join(warranty_data.keys())
+                        placeholders = ', '.join(['?' for _ in warranty_data])
+                        query = f"INSERT INTO warranties ({columns}) VALUES ({placeholders})"
+                        self.db_manager.execute_query(query, list(warranty_data.values()))
+                
+                # Create transaction record
+                transaction_data = {
+                    'transaction_type': 'income',
+                    'amount': paid,
+                    'description': f'Bán hàng - {invoice_number}',
                     'reference_id': sale_id,
                     'reference_type': 'sale',
-                    'due_date': (date.today().replace(day=date.today().day + 30)).isoformat(),
-                    'status': 'outstanding',
-                    'created_at': datetime.now().isoformat(),
-                    'updated_at': datetime.now().isoformat()
+                    'payment_method': self.payment_method_var.get(),
+                    'staff_id': self.current_user['id'],
+                    'transaction_date': datetime.now().isoformat(),
+                    'created_at': datetime.now().isoformat()
                 }
                 
-                columns = ', '.join(debt_data.keys())
-                placeholders = ', '.join(['?' for _ in debt_data])
-                query = f"INSERT INTO debts ({columns}) VALUES ({placeholders})"
-                self.db_manager.execute_query(query, list(debt_data.values()))
+                columns = ', '.join(transaction_data.keys())
+                placeholders = ', '.join(['?' for _ in transaction_data])
+                query = f"INSERT INTO transactions ({columns}) VALUES ({placeholders})"
+                self.db_manager.execute_query(query, list(transaction_data.values()))
+                
+                # Create debt record if not fully paid
+                if paid < total:
+                    debt_data = {
+                        'debtor_type': 'customer',
+                        'debtor_id': customer_id,
+                        'amount': total - paid,
+                        'description': f'Nợ từ hóa đơn {invoice_number}',
+                        'reference_id': sale_id,
+                        'reference_type': 'sale',
+                        'due_date': (date.today().replace(day=date.today().day + 30)).isoformat(),
+                        'status': 'outstanding',
+                        'created_at': datetime.now().isoformat(),
+                        'updated_at': datetime.now().isoformat()
+                    }
+                    
+                    columns = ', '.join(debt_data.keys())
+                    placeholders = ', '.join(['?' for _ in debt_data])
+                    query = f"INSERT INTO debts ({columns}) VALUES ({placeholders})"
+                    self.db_manager.execute_query(query, list(debt_data.values()))
             
             messagebox.showinfo("Thành công", f"Đã tạo hóa đơn {invoice_number}!")
             
@@ -937,6 +950,9 @@ class SalesTab:
             if messagebox.askyesno("In hóa đơn", "Bạn có muốn in hóa đơn không?"):
                 self.print_receipt(sale_id)
             
+            # Sold units leave the scan cache
+            self.catalog.refresh_units([cart_item['inventory_id'] for cart_item in self.cart_items])
+            
             # Clear cart and refresh
             self.cart_items.clear()
             self.update_cart_display()
@@ -966,19 +982,8 @@ class SalesTab:
         # This would implement saving the current cart as a draft
         messagebox.showinfo("Thông báo", "Chức năng tạm lưu sẽ được phát triển!")
     
-    def on_sales_search(self, *args):
-        """Handle sales search"""
-        search_term = self.sales_search_var.get().lower()
-        
-        if not search_term:
-            self.refresh_sales()
-            return
-        
-        # Clear existing items
-        for item in self.sales_tree.get_children():
-            self.sales_tree.delete(item)
-        
-        # Search sales
+    def search_sales(self, search_term):
+        """Search sales by invoice number or customer name"""
         query = """
         SELECT s.*, c.name as customer_name, st.full_name as staff_name
         FROM sales s
@@ -989,23 +994,9 @@ class SalesTab:
         LIMIT 100
         """
         
-        search_pattern = f"%{search_term}%"
-        sales = self.db_manager.fetch_all(query, (search_pattern, search_pattern))
-        
-        for sale in sales:
-            sale_date = datetime.fromisoformat(sale['sale_date']).strftime('%d/%m/%Y %H:%M')
-            
-            self.sales_tree.insert('', 'end', values=(
-                sale['id'],
-                sale['invoice_number'],
-                sale_date,
-                sale['customer_name'] or 'Khách lẻ',
-                sale['staff_name'] or '',
-                f"{sale['total_amount']:,.0f}",
-                f"{sale['paid_amount']:,.0f}",
-                sale['payment_method'],
-                sale['payment_status']
-            ))
+        search_pattern = f"%{search_term.lower()}%"
+        rows = self.db_manager.fetch_all(query, (search_pattern, search_pattern))
+        return rows, len(rows) < 100
     
     def filter_sales(self):
         """Filter sales by date range"""
@@ -1016,36 +1007,17 @@ class SalesTab:
             messagebox.showwarning("Cảnh báo", "Vui lòng nhập đầy đủ khoảng thời gian!")
             return
         
-        # Clear existing items
-        for item in self.sales_tree.get_children():
-            self.sales_tree.delete(item)
-        
         # Filter sales
         query = """
         SELECT s.*, c.name as customer_name, st.full_name as staff_name
         FROM sales s
         LEFT JOIN customers c ON s.customer_id = c.id
         LEFT JOIN staff st ON s.staff_id = st.id
-        WHERE DATE(s.sale_date) BETWEEN ? AND ?
-        ORDER BY s.sale_date DESC
+        WHERE s.sale_day BETWEEN ? AND ?
         """
+        params = (self.db_manager.day_key(from_date), self.db_manager.day_key(to_date))
         
-        sales = self.db_manager.fetch_all(query, (from_date, to_date))
-        
-        for sale in sales:
-            sale_date = datetime.fromisoformat(sale['sale_date']).strftime('%d/%m/%Y %H:%M')
-            
-            self.sales_tree.insert('', 'end', values=(
-                sale['id'],
-                sale['invoice_number'],
-                sale_date,
-                sale['customer_name'] or 'Khách lẻ',
-                sale['staff_name'] or '',
-                f"{sale['total_amount']:,.0f}",
-                f"{sale['paid_amount']:,.0f}",
-                sale['payment_method'],
-                sale['payment_status']
-            ))
+        self.sales_pager.set_query(query, params)
     
     def view_sale_details(self):
         """View sale details"""
@@ -1181,44 +1153,23 @@ class SalesTab:
         
         messagebox.showinfo("Thông báo", "Chức năng hoàn trả sẽ được phát triển!")
     
-    def on_customer_search(self, *args):
-        """Handle customer search"""
-        search_term = self.customer_search_var.get().lower()
-        
-        if not search_term:
-            self.refresh_customers()
-            return
-        
-        # Clear existing items
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
-        
-        # Search customers
+    def search_customers(self, search_term):
+        """Search customers, best match first"""
         query = """
         SELECT c.*,
                COALESCE(SUM(s.total_amount), 0) as total_purchases,
                COALESCE(SUM(d.amount), 0) as total_debt
-        FROM customers c
+        FROM json_each(?) m
+        JOIN customers c ON c.id = m.value
         LEFT JOIN sales s ON c.id = s.customer_id
         LEFT JOIN debts d ON c.id = d.debtor_id AND d.debtor_type = 'customer' AND d.status = 'outstanding'
-        WHERE LOWER(c.name) LIKE ? OR c.phone LIKE ?
         GROUP BY c.id
-        ORDER BY c.name
+        ORDER BY MIN(m.key)
         """
         
-        search_pattern = f"%{search_term}%"
-        customers = self.db_manager.fetch_all(query, (search_pattern, search_pattern))
-        
-        for customer in customers:
-            self.customers_tree.insert('', 'end', values=(
-                customer['id'],
-                customer['name'],
-                customer['phone'] or '',
-                customer['email'] or '',
-                customer['address'] or '',
-                f"{customer['total_purchases']:,.0f}",
-                f"{customer['total_debt']:,.0f}" if customer['total_debt'] > 0 else "0"
-            ))
+        ids = self.db_manager.search('customers', search_term)
+        rows = self.db_manager.fetch_all(query, (json.dumps(ids),))
+        return rows, len(ids) < DATABASE_CONFIG['SEARCH_LIMIT']
     
     def add_customer(self):
         """Add new customer"""
@@ -1356,6 +1307,7 @@ class SalesTab:
                     params = list(data.values())
                 
                 self.db_manager.execute_query(query, params)
+                self.lookups.invalidate('customers')
                 
                 messagebox.showinfo("Thành công", 
                                    "Đã cập nhật khách hàng!" if customer_id else "Đã thêm khách hàng!")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Barcode scanner input for ChViet Mobile Store Management System
+"""
+
+from collections import deque
+
+from config import GUI_CONFIG
+
+class ScanInput:
+    """Turn keyboard-wedge scanner bursts in an Entry into one callback per scan
+    
+    Keys arriving within key_gap_ms of each other form a burst. A scan ends
+    at Return, or idle_ms after a burst of at least min_length characters
+    for scanners configured without a terminator. Finished codes are queued
+    and handed to on_scans in order, so a stack of phones scanned back to
+    back is neither dropped nor merged. Slow, typed input still completes
+    on Return.
+    """
+    
+    def __init__(self, entry, variable, on_scans, key_gap_ms=None, min_length=None, idle_ms=None):
+        self.entry = entry
+        self.variable = variable
+        self.on_scans = on_scans
+        self.key_gap_ms = key_gap_ms or GUI_CONFIG['SCAN_KEY_GAP_MS']
+        self.min_length = min_length or GUI_CONFIG['SCAN_MIN_LENGTH']
+        self.idle_ms = idle_ms or GUI_CONFIG['SCAN_IDLE_MS']
+        
+        self._queue = deque()
+        self._last_key_time = None
+        self._burst_length = 0
+        self._idle_timer = None
+        self._draining = False
+        
+        entry.bind('<KeyPress>', self.on_key, add='+')
+        entry.bind('<Return>', self.on_terminator)
+        entry.bind('<KP_Enter>', self.on_terminator)
+    
+    def on_key(self, event):
+        """Track the timing of printable keys"""
+        if len(event.char) != 1 or not event.char.isprintable():
+            return
+        
+        gap = event.time - self._last_key_time if self._last_key_time is not None else None
+        self._last_key_time = event.time
+        self._burst_length = self._burst_length + 1 if gap is not None and 0 <= gap <= self.key_gap_ms else 1
+        
+        if self._idle_timer is not None:
+            self.entry.after_cancel(self._idle_timer)
+            self._idle_timer = None
+        if self._burst_length >= self.min_length:
+            self._idle_timer = self.entry.after(self.idle_ms, self.finish)
+    
+    def on_terminator(self, event=None):
+        """Complete the current scan on Return"""
+        self.finish()
+        return 'break'
+    
+    def finish(self):
+        """Queue the text of the entry as one scan and clear it for the next"""
+        if self._idle_timer is not None:
+            self.entry.after_cancel(self._idle_timer)
+            self._idle_timer = None
+        self._burst_length = 0
+        self._last_key_time = None
+        
+        code = self.variable.get().strip()
+        self.variable.set("")
+        if not code:
+            return
+        
+        self._queue.append(code)
+        if not self._draining:
+            self._draining = True
+            self.entry.after_idle(self.drain)
+    
+    def drain(self):
+        """Hand every queued scan to the callback"""
+        codes = []
+        while self._queue:
+            codes.append(self._queue.popleft())
+        self._draining = False
+        if codes:
+            self.on_scans(codes)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Search-as-you-type controller for ChViet Mobile Store Management System
+"""
+
+from config import GUI_CONFIG
+
+class SearchController:
+    """Debounce a search box and run its query on the query executor
+    
+    The query runs once typing pauses for delay_ms. Terms shorter than
+    min_length bring back the unfiltered list, and results of a superseded
+    search are dropped through the executor key. search(term) returns
+    (rows, complete), where complete is False when the matches were cut at
+    a limit before any filtering of the rows. Complete results are kept per
+    term, so typing more characters filters the previous rows in memory
+    instead of querying again. Any other request on the same key, such as
+    a refresh after an edit, invalidates those results.
+    """
+    
+    def __init__(self, variable, search, on_results, on_clear, executor, key,
+                 fields, indicator=None, delay_ms=None, min_length=None):
+        self.variable = variable
+        self.search = search
+        self.on_results = on_results
+        self.on_clear = on_clear
+        self.executor = executor
+        self.key = key
+        self.fields = fields
+        self.indicator = indicator
+        self.delay_ms = delay_ms if delay_ms is not None else GUI_CONFIG['SEARCH_DELAY_MS']
+        self.min_length = min_length or GUI_CONFIG['SEARCH_MIN_LENGTH']
+        
+        self._cache = {}
+        self._cache_generation = None
+        self._filtered = False  # The list shows search results, not the full list
+        self._timer = None
+        self.variable.trace('w', self.on_change)
+    
+    def on_change(self, *args):
+        """Restart the quiet period after each keystroke"""
+        root = self.executor.root
+        if self._timer is not None:
+            root.after_cancel(self._timer)
+        self._timer = root.after(self.delay_ms, self.run)
+    
+    def run(self):
+        """Search for the current text of the box"""
+        self._timer = None
+        term = self.variable.get().strip()
+        
+        if len(term) < self.min_length:
+            # Too short to search: go back to the unfiltered list
+            self.executor.cancel(self.key)
+            self.clear_cache()
+            if self._filtered or not term:
+                self._filtered = False
+                self.on_clear()
+            return
+        
+        self._filtered = True
+        needle = term.lower()
+        
+        # Only the prefixes of the current term can narrow later keystrokes
+        if self._cache_generation != self.executor.generation(self.key):
+            self._cache = {}
+        self._cache = dict((cached, rows) for cached, rows in self._cache.items()
+                           if needle.startswith(cached))
+        
+        if self._cache:
+            base = self._cache[max(self._cache, key=len)]
+            self.executor.cancel(self.key)
+            self.deliver(needle, [row for row in base if self.matches(row, needle)], True)
+            return
+        
+        self.executor.submit_call(lambda: self.search(term),
+                                  on_done=lambda result: self.deliver(needle, *result),
+                                  key=self.key, indicator=self.indicator)
+    
+    def matches(self, row, needle):
+        """Check whether any searched field of a row contains the needle"""
+        return any(needle in str(row[field] or '').lower() for field in self.fields)
+    
+    def deliver(self, needle, rows, complete):
+        """Show rows and remember them if they are the complete match set"""
+        if complete:
+            self._cache[needle] = rows
+            self._cache_generation = self.executor.generation(self.key)
+        self.on_results(rows)
+    
+    def clear_cache(self):
+        """Forget cached results, e.g. after the underlying data changed"""
+        self._cache = {}
@@ -9,8 +9,12 @@ from tkinter import ttk, messagebox
 from datetime import datetime, date
 import hashlib
 
-from models import Staff
 from config import BUSINESS_RULES
+from gui.query_executor import QueryExecutor, LoadingIndicator
+from gui.tree_binder import TreeBinder
+from gui.search_controller import SearchController
+from utils.staff_performance import get_staff_performance, format_on_time_ratio
+from utils.lookup_cache import LookupCache
 
 class StaffTab:
     def __init__(self, parent, db_manager, current_user):
@@ -19,6 +23,9 @@ class StaffTab:
         self.current_user = current_user
         
         self.frame = ttk.Frame(parent)
+        self.query_executor = QueryExecutor.for_widget(self.frame, db_manager)
+        self.lookups = LookupCache.for_manager(db_manager)
+        self.loading_indicator = LoadingIndicator(self.frame)
         self.setup_ui()
         self.load_data()
     
@@ -59,7 +66,11 @@ class StaffTab:
         
         ttk.Label(search_frame, text="Tên / Tài khoản:").pack(anchor=tk.W)
         self.staff_search_var = tk.StringVar()
-        self.staff_search_var.trace('w', self.on_staff_search)
+        self.staff_search = SearchController(
+            self.staff_search_var, self.search_staff, self.populate_staff, self.refresh_staff,
+            self.query_executor, 'staff.staff', ('full_name', 'username', 'phone'),
+            indicator=self.loading_indicator
+        )
         search_entry = ttk.Entry(search_frame, textvariable=self.staff_search_var, width=40)
         search_entry.pack(pady=5, fill=tk.X)
         
@@ -107,6 +118,7 @@ class StaffTab:
                                       show='headings',
                                       yscrollcommand=v_scrollbar.set,
                                       xscrollcommand=h_scrollbar.set)
+        self.staff_binder = TreeBinder(self.staff_tree)
         
         # Configure scrollbars
         v_scrollbar.config(command=self.staff_tree.yview)
@@ -378,19 +390,28 @@ class StaffTab:
         self.load_performance_data()
         self.filter_attendance()
     
+    def release_data(self):
+        """Drop the loaded lists while the tab is hidden; load_data() reads them again"""
+        self.staff_search.clear_cache()
+        self.staff_binder.clear()
+        for tree in (self.performance_tree, self.attendance_tree):
+            tree.delete(*tree.get_children())
+    
     def refresh_staff(self):
         """Refresh staff list"""
-        # Clear existing items
-        for item in self.staff_tree.get_children():
-            self.staff_tree.delete(item)
-        
         # Load staff
         query = """
         SELECT * FROM staff
         ORDER BY full_name
         """
         
-        staff_members = self.db_manager.fetch_all(query)
+        self.query_executor.submit(query, on_done=self.populate_staff,
+                                   key='staff.staff', indicator=self.loading_indicator)
+    
+    def populate_staff(self, staff_members):
+        """Fill staff tree with query results"""
+        # Collected rows go through the binder, which only applies the differences
+        rows = []
         
         for staff in staff_members:
             status_text = "Đang làm việc" if staff['is_active'] else "Nghỉ việc"
@@ -404,7 +425,7 @@ class StaffTab:
             }
             role_text = role_map.get(staff['role'], staff['role'])
             
-            self.staff_tree.insert('', 'end', values=(
+            rows.append((staff['id'], (
                 staff['id'],
                 staff['username'],
                 staff['full_name'],
@@ -415,62 +436,26 @@ class StaffTab:
                 f"{staff['salary'] or 0:,.0f}",
                 status_text,
                 "Chưa đăng nhập"  # This would come from a login_logs table
-            ))
-    
-    def on_staff_search(self, *args):
-        """Handle staff search"""
-        search_term = self.staff_search_var.get().lower()
-        
-        if not search_term:
-            self.refresh_staff()
-            return
+            )))
         
-        # Clear existing items
-        for item in self.staff_tree.get_children():
-            self.staff_tree.delete(item)
-        
-        # Search staff
+        self.staff_binder.update(rows)
+    
+    def search_staff(self, search_term):
+        """Search staff by name, username or phone"""
         query = """
         SELECT * FROM staff
         WHERE LOWER(full_name) LIKE ? OR LOWER(username) LIKE ? OR LOWER(phone) LIKE ?
         ORDER BY full_name
         """
         
-        search_pattern = f"%{search_term}%"
-        staff_members = self.db_manager.fetch_all(query, (search_pattern, search_pattern, search_pattern))
-        
-        for staff in staff_members:
-            status_text = "Đang làm việc" if staff['is_active'] else "Nghỉ việc"
-            
-            role_map = {
-                'admin': 'Quản trị viên',
-                'manager': 'Quản lý',
-                'staff': 'Nhân viên',
-                'cashier': 'Thu ngân'
-            }
-            role_text = role_map.get(staff['role'], staff['role'])
-            
-            self.staff_tree.insert('', 'end', values=(
-                staff['id'],
-                staff['username'],
-                staff['full_name'],
-                staff['phone'] or '',
-                staff['email'] or '',
-                role_text,
-                f"{(staff['commission_rate'] or 0) * 100:.1f}",
-                f"{staff['salary'] or 0:,.0f}",
-                status_text,
-                "Chưa đăng nhập"
-            ))
+        search_pattern = f"%{search_term.lower()}%"
+        rows = self.db_manager.fetch_all(query, (search_pattern, search_pattern, search_pattern))
+        return rows, True
     
     def filter_staff(self):
         """Filter staff by status"""
         status_filter = self.status_filter_var.get()
         
-        # Clear existing items
-        for item in self.staff_tree.get_children():
-            self.staff_tree.delete(item)
-        
         # Build query based on filter
         if status_filter == "all":
             query = "SELECT * FROM staff ORDER BY full_name"
@@ -482,31 +467,9 @@ class StaffTab:
             query = "SELECT * FROM staff WHERE is_active = 0 ORDER BY full_name"
             params = ()
         
-        staff_members = self.db_manager.fetch_all(query, params)
-        
-        for staff in staff_members:
-            status_text = "Đang làm việc" if staff['is_active'] else "Nghỉ việc"
-            
-            role_map = {
-                'admin': 'Quản trị viên',
-                'manager': 'Quản lý',
-                'staff': 'Nhân viên',
-                'cashier': 'Thu ngân'
-            }
-            role_text = role_map.get(staff['role'], staff['role'])
-            
-            self.staff_tree.insert('', 'end', values=(
-                staff['id'],
-                staff['username'],
-                staff['full_name'],
-                staff['phone'] or '',
-                staff['email'] or '',
-                role_text,
-                f"{(staff['commission_rate'] or 0) * 100:.1f}",
-                f"{staff['salary'] or 0:,.0f}",
-                status_text,
-                "Chưa đăng nhập"
-            ))
+        self.query_executor.submit(query, params,
+                                   on_done=self.populate_staff,
+                                   key='staff.staff', indicator=self.loading_indicator)
     
     def add_staff(self):
         """Add new staff member"""
@@ -673,6 +636,7 @@ class StaffTab:
                     params = list(data.values())
                 
                 self.db_manager.execute_query(query, params)
+                self.lookups.invalidate('staff')
                 
                 messagebox.showinfo("Thành công", 
                                    "Đã cập nhật nhân viên!" if staff_id else "Đã thêm nhân viên!")
@@ -774,9 +738,7 @@ class StaffTab:
     
     def load_staff_combo(self, combo):
         """Load staff into combobox"""
-        staff_members = self.db_manager.fetch_all(
-            "SELECT id, full_name, username FROM staff WHERE is_active = 1 ORDER BY full_name"
-        )
+        staff_members = self.lookups.get('staff')
         combo['values'] = [f"{s['id']} - {s['full_name']} ({s['username']})" for s in staff_members]
     
     def load_staff_permissions(self):
@@ -860,43 +822,28 @@ class StaffTab:
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn khoảng thời gian!")
             return
         
+        # Load performance data for all active staff in one grouped query
+        self.query_executor.submit_call(
+            lambda: get_staff_performance(self.db_manager, from_date, to_date),
+            on_done=lambda performance: self.populate_performance(performance, from_date, to_date),
+            key='staff.performance', indicator=self.loading_indicator
+        )
+    
+    def populate_performance(self, performance, from_date, to_date):
+        """Fill performance tree with computed staff performance"""
         # Clear existing items
         for item in self.performance_tree.get_children():
             self.performance_tree.delete(item)
         
-        # Load performance data (this would involve complex queries across multiple tables)
-        staff_members = self.db_manager.fetch_all(
-            "SELECT id, full_name FROM staff WHERE is_active = 1 ORDER BY full_name"
-        )
-        
-        for staff in staff_members:
-            # Sales performance
-            sales_data = self.db_manager.fetch_one(
-                """SELECT COUNT(*) as count, COALESCE(SUM(total_amount), 0) as total
-                   FROM sales 
-                   WHERE staff_id = ? AND DATE(sale_date) BETWEEN ? AND ?""",
-                (staff['id'], from_date, to_date)
-            )
-            
-            # Repairs performance
-            repairs_data = self.db_manager.fetch_one(
-                """SELECT COUNT(*) as count
-                   FROM repairs 
-                   WHERE staff_id = ? AND DATE(created_at) BETWEEN ? AND ?""",
-                (staff['id'], from_date, to_date)
-            )
-            
-            # Calculate commission (simplified)
-            commission = sales_data['total'] * 0.02  # 2% commission example
-            
+        for staff in sorted(performance, key=lambda staff: staff['full_name']):
             self.performance_tree.insert('', 'end', values=(
                 staff['full_name'],
-                sales_data['count'],
-                f"{sales_data['total']:,.0f}",
-                f"{commission:,.0f}",
-                repairs_data['count'],
+                staff['sales_count'],
+                f"{staff['sales_revenue']:,.0f}",
+                f"{staff['commission']:,.0f}",
+                staff['repairs_count'],
                 "N/A",  # Customer rating would come from reviews
-                "N/A"   # Efficiency metric
+                format_on_time_ratio(staff['on_time_ratio'])
             ))
         
         # Update detail text
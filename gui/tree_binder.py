@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Treeview row binder for ChViet Mobile Store Management System
+"""
+
+class TreeBinder:
+    """Keep a flat ttk.Treeview in step with query results by row id
+    
+    update() compares the new rows with the previous snapshot and only
+    deletes, inserts, edits or moves the rows that differ, so refreshing
+    after a single change touches a single Tk item. Selection survives for
+    rows that still exist and the first visible row stays in view.
+    """
+    
+    def __init__(self, tree):
+        self.tree = tree
+        self._order = []
+        self._rows = {}
+    
+    def update(self, rows):
+        """
+        Show rows in the tree
+        
+        Args:
+            rows: Iterable of (row id, values) or (row id, values, tags),
+                  in display order; row ids must be unique
+        """
+        tree = self.tree
+        rows = [(str(row[0]), tuple(row[1]), tuple(row[2]) if len(row) > 2 else ()) for row in rows]
+        new_keys = [key for key, _, _ in rows]
+        
+        # Start over if something else changed the tree behind our back
+        if list(tree.get_children()) != self._order:
+            tree.delete(*tree.get_children())
+            self._order, self._rows = [], {}
+        
+        anchor = self._first_visible()
+        
+        # Deletes
+        wanted = set(new_keys)
+        removed = [key for key in self._order if key not in wanted]
+        if removed:
+            tree.delete(*removed)
+            for key in removed:
+                del self._rows[key]
+        
+        # Surviving rows in the same relative order can take inserts in place;
+        # otherwise new rows go to the end and the order is set in one call
+        kept = [key for key in self._order if key in wanted]
+        in_place = kept == [key for key in new_keys if key in self._rows]
+        
+        for index, (key, values, tags) in enumerate(rows):
+            if key not in self._rows:
+                tree.insert('', index if in_place else 'end', iid=key, values=values, tags=tags)
+            elif self._rows[key] != (values, tags):
+                tree.item(key, values=values, tags=tags)
+            self._rows[key] = (values, tags)
+        
+        if not in_place:
+            tree.set_children('', *new_keys)
+        self._order = new_keys
+        
+        if anchor in self._rows and new_keys:
+            tree.yview_moveto(new_keys.index(anchor) / len(new_keys))
+    
+    def _first_visible(self):
+        """Get the id of the row at the top of the view"""
+        if not self._order:
+            return None
+        top = self.tree.yview()[0]
+        return self._order[min(int(round(top * len(self._order))), len(self._order) - 1)]
+    
+    def clear(self):
+        """Remove every row"""
+        self.update([])
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Virtual (windowed) Treeview for ChViet Mobile Store Management System
+"""
+
+from collections import OrderedDict
+
+from config import GUI_CONFIG
+from gui.tree_binder import TreeBinder
+
+class KeysetSource:
+    """Read one listing a page at a time with keyset (seek) queries
+    
+    A page is read by seeking on the sort index to the row key, the sort
+    value and id, of a neighbouring page instead of skipping rows with
+    OFFSET, so walking the list costs the same per page however deep it
+    goes. Only a jump to a page with no known neighbour counts through
+    the index, and then only the keys.
+    """
+    
+    def __init__(self, db_manager, columns, tables, id_column='id', count_tables=None):
+        """
+        Args:
+            db_manager: Database manager to read from
+            columns: Select list, e.g. "i.*, p.name as product_name"
+            tables: FROM clause with its joins, without the FROM keyword;
+                    LEFT JOINs keep the planner on the sort index
+            id_column: Unique column used to break ties in the sort order
+            count_tables: FROM clause for counting rows, e.g. the main table
+                          alone when the joins cannot change the count;
+                          filters must only use these tables
+        """
+        self.db_manager = db_manager
+        self.columns = columns
+        self.tables = tables
+        self.id_column = id_column
+        self.count_tables = count_tables or tables
+    
+    def _order_by(self, sort_key, descending):
+        """Build the ORDER BY list of a sort"""
+        direction = 'DESC' if descending else 'ASC'
+        if sort_key == self.id_column:
+            return f"{self.id_column} {direction}"
+        return f"{sort_key} {direction}, {self.id_column} {direction}"
+    
+    def _where(self, filters):
+        """Join filter conditions into a WHERE clause and its parameters"""
+        conditions, params = [], []
+        for condition, condition_params in filters:
+            conditions.append(f"({condition})")
+            params.extend(condition_params)
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+    
+    def count(self, filters):
+        """Count the rows of the listing"""
+        where, params = self._where(filters)
+        row = self.db_manager.fetch_one(f"SELECT COUNT(*) FROM {self.count_tables} {where}", params)
+        return row[0]
+    
+    def page(self, filters, sort_key, descending, page_size, at=None, after=None, before=None, offset=0):
+        """
+        Read one page of rows
+        
+        Args:
+            filters: (condition, params) pairs combined with AND
+            sort_key: SQL expression to sort by
+            descending: Sort direction
+            page_size: Rows per page
+            at: Row key of the first row of the page
+            after: Row key of the row just before the page
+            before: Row key of the row just after the page
+            offset: Position of the first row when no row key is given
+        
+        Returns:
+            list: Rows with sort_value and row_id columns added
+        """
+        if at is None and after is None and before is None:
+            where, params = self._where(filters)
+            row = self.db_manager.fetch_one(
+                f"""SELECT {sort_key}, {self.id_column} FROM {self.tables} {where}
+                    ORDER BY {self._order_by(sort_key, descending)} LIMIT 1 OFFSET ?""",
+                params + [offset]
+            )
+            if row is None:
+                return []
+            at = (row[0], row[1])
+        
+        where, params = self._where(filters)
+        query = f"""
+        SELECT {self.columns}, {sort_key} AS sort_value, {self.id_column} AS row_id
+        FROM {self.tables}
+        {where}
+        """
+        return self.db_manager.paginate(query, 'sort_value', page_size, params, after=after, before=before,
+                                        at=at, descending=descending, id_column='row_id')
+
+class VirtualTree:
+    """Show a listing of any length in a flat ttk.Treeview
+    
+    Only the rows that fit in the widget exist as Tk items. The scrollbar
+    is driven by the row count, and pages are read from a KeysetSource on
+    the query executor as the view moves, with the page before and after
+    the visible one read ahead and a few pages kept in memory. Row keys of
+    every page seen are remembered, so returning to a part of the list
+    seeks straight to it. Sorting by clicking a heading and filtering both
+    run in SQL.
+    """
+    
+    def __init__(self, tree, scrollbar, executor, key, source, format_row,
+                 sort_columns, sort, indicator=None, page_size=None, cache_pages=None):
+        """
+        Args:
+            tree: Treeview to draw rows in; its own scrolling is replaced
+            scrollbar: Vertical scrollbar for the tree
+            executor: QueryExecutor to read pages on
+            key: Executor key prefix for this list
+            source: KeysetSource of the listing
+            format_row: Function turning a row into the tree values
+            sort_columns: Tree column -> SQL expression for sortable columns
+            sort: Initial (SQL expression, descending) sort
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.executor = executor
+        self.key = key
+        self.source = source
+        self.format_row = format_row
+        self.sort_columns = sort_columns
+        self.sort_key, self.descending = sort
+        self.indicator = indicator
+        self.page_size = page_size or GUI_CONFIG['VIRTUAL_PAGE_SIZE']
+        self.cache_pages = cache_pages or GUI_CONFIG['VIRTUAL_CACHE_PAGES']
+        
+        self.binder = TreeBinder(tree)
+        self.filters = {}
+        self.total = 0
+        self.offset = 0
+        
+        self._keys = {}
+        self._pages = OrderedDict()
+        self._requested = None
+        self._version = 0
+        self._loaded = False
+        self._visible = 20
+        self._row_height = None
+        self._top = 0
+        self._pending_focus = None
+        
+        self._headings = {}
+        for column in sort_columns:
+            self._headings[column] = tree.heading(column, 'text')
+            tree.heading(column, command=lambda column=column: self.sort_by(column))
+        self._show_sort()
+        
+        tree.configure(yscrollcommand='')
+        scrollbar.configure(command=self.yview)
+        
+        tree.bind('<Configure>', self.on_configure, add='+')
+        tree.bind('<MouseWheel>', self.on_mousewheel)
+        tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        tree.bind('<Button-5>', lambda e: self.scroll(3))
+        tree.bind('<Up>', lambda e: self.on_step(-1))
+        tree.bind('<Down>', lambda e: self.on_step(1))
+        tree.bind('<Prior>', lambda e: self.on_page(-1))
+        tree.bind('<Next>', lambda e: self.on_page(1))
+    
+    def refresh(self):
+        """Re-read the listing, keeping the scroll position"""
+        self._version += 1
+        version = self._version
+        filters = list(self.filters.values())
+        
+        self.executor.submit_call(
+            lambda: self.source.count(filters),
+            on_done=lambda total: self.on_count(version, total),
+            key=f"{self.key}.count", indicator=self.indicator
+        )
+    
+    def release(self):
+        """Drop every loaded row and page; refresh() reads them again"""
+        self._version += 1
+        self.total = 0
+        self._keys.clear()
+        self._pages.clear()
+        self._requested = None
+        self._loaded = False
+        self.binder.clear()
+        self._update_scrollbar()
+    
+    def set_filter(self, name, condition, params=()):
+        """Add, replace or (with condition None) remove a named SQL filter"""
+        if condition is None:
+            if self.filters.pop(name, None) is None:
+                return
+        else:
+            self.filters[name] = (condition, list(params))
+        self.offset = 0
+        self.refresh()
+    
+    def sort_by(self, column):
+        """Sort by a tree column, toggling the direction on repeated clicks"""
+        sort_key = self.sort_columns[column]
+        if sort_key == self.sort_key:
+            self.descending = not self.descending
+        else:
+            self.sort_key, self.descending = sort_key, False
+        self._show_sort()
+        self.offset = 0
+        self.refresh()
+    
+    def _show_sort(self):
+        """Mark the sorted column heading with the direction"""
+        for column, text in self._headings.items():
+            if self.sort_columns[column] == self.sort_key:
+                text += " ▼" if self.descending else " ▲"
+            self.tree.heading(column, text=text)
+    
+    def on_count(self, version, total):
+        """Start showing a freshly counted listing"""
+        if version != self._version:
+            return
+        self.total = total
+        self._keys.clear()
+        self._pages.clear()
+        self._requested = None
+        self._loaded = True
+        self.scroll_to(self.offset)
+    
+    def scroll_to(self, offset):
+        """Show the rows starting at offset"""
+        self.offset = max(0, min(offset, self.total - self._visible))
+        self._update_scrollbar()
+        self._render()
+    
+    def scroll(self, rows):
+        """Move the view by a number of rows"""
+        self.scroll_to(self.offset + rows)
+        return 'break'
+    
+    def yview(self, *args):
+        """Scrollbar command"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == 'scroll':
+            step = self._visible if args[2] == 'pages' else 1
+            self.scroll(int(args[1]) * step)
+    
+    def on_mousewheel(self, event):
+        """Scroll three rows per wheel notch"""
+        return self.scroll(-3 if event.delta > 0 else 3)
+    
+    def on_step(self, rows):
+        """Move the keyboard focus past the first or last visible row"""
+        children = self.tree.get_children()
+        if not children or self.tree.focus() != (children[0] if rows < 0 else children[-1]):
+            return None
+        self._pending_focus = 'first' if rows < 0 else 'last'
+        return self.scroll(rows)
+    
+    def on_page(self, pages):
+        """Page Up / Page Down"""
+        return self.scroll(pages * self._visible)
+    
+    def on_configure(self, event=None):
+        """Fit the number of materialized rows to the widget height"""
+        visible = self._fit()
+        if visible != self._visible:
+            self._visible = visible
+            if self._loaded:
+                self.scroll_to(self.offset)
+    
+    def _fit(self):
+        """Get how many rows fit in the tree"""
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else None
+        if bbox:
+            self._top, self._row_height = bbox[1], bbox[3]
+        if not self._row_height:
+            return self._visible
+        return max(1, (self.tree.winfo_height() - self._top) // self._row_height)
+    
+    def _update_scrollbar(self):
+        """Size the scrollbar thumb to the visible part of the listing"""
+        if self.total <= self._visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / self.total, (self.offset + self._visible) / self.total)
+    
+    def _render(self):
+        """Draw the visible rows, reading missing pages first"""
+        page_count = -(-self.total // self.page_size)
+        first = self.offset // self.page_size
+        last = max(first, (min(self.offset + self._visible, self.total) - 1) // self.page_size)
+        needed = range(first, min(last + 1, page_count))
+        
+        # Read ahead one page either way so short scrolls stay local
+        wanted = [page for page in range(first - 1, last + 2)
+                  if 0 <= page < page_count and page not in self._pages]
+        if wanted and wanted != self._requested:
+            self._fetch(wanted)
+        if any(page not in self._pages for page in needed):
+            return
+        
+        rows = []
+        for page in needed:
+            self._pages.move_to_end(page)
+            rows.extend(self._pages[page])
+        start = self.offset - first * self.page_size
+        window = rows[start:start + self._visible]
+        self.binder.update([(row['row_id'], self.format_row(row)) for row in window])
+        
+        # Extra rows may appear before the first draw tells us the row height
+        if self._fit() != self._visible:
+            self.on_configure()
+        
+        children = self.tree.get_children()
+        if self._pending_focus and children:
+            item = children[0] if self._pending_focus == 'first' else children[-1]
+            self.tree.focus(item)
+            self.tree.selection_set(item)
+        self._pending_focus = None
+    
+    def _fetch(self, pages):
+        """Read pages on the executor and draw once they arrive"""
+        version = self._version
+        filters = list(self.filters.values())
+        sort_key, descending, page_size = self.sort_key, self.descending, self.page_size
+        keys = dict(self._keys)
+        self._requested = pages
+        
+        def read():
+            result, pending = [], list(pages)
+            while pending:
+                # Seek from a neighbour whose row keys are known, counting only for a jump
+                page = next((page for page in pending
+                             if page in keys or page - 1 in keys or page + 1 in keys), pending[0])
+                pending.remove(page)
+                if page in keys:
+                    anchor = {'at': keys[page][0]}
+                elif page - 1 in keys:
+                    anchor = {'after': keys[page - 1][1]}
+                elif page + 1 in keys:
+                    anchor = {'before': keys[page + 1][0]}
+                else:
+                    anchor = {'offset': page * page_size}
+                rows = self.source.page(filters, sort_key, descending, page_size, **anchor)
+                if rows:
+                    keys[page] = self._row_keys(rows)
+                result.append((page, rows))
+            return result
+        
+        self.executor.submit_call(read, on_done=lambda result: self.on_pages(version, result),
+                                  key=f"{self.key}.pages", indicator=self.indicator)
+    
+    def on_pages(self, version, result):
+        """Keep newly read pages and redraw"""
+        if version != self._version:
+            return
+        self._requested = None
+        for page, rows in result:
+            if rows:
+                self._keys[page] = self._row_keys(rows)
+            self._pages[page] = rows
+            self._pages.move_to_end(page)
+        while len(self._pages) > self.cache_pages:
+            self._pages.popitem(last=False)
+        self._render()
+    
+    @staticmethod
+    def _row_keys(rows):
+        """Get the row keys of the first and last row of a page"""
+        return ((rows[0]['sort_value'], rows[0]['row_id']),
+                (rows[-1]['sort_value'], rows[-1]['row_id']))
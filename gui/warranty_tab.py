@@ -7,11 +7,15 @@ Warranty management tab for ChViet Mobile Store Management System
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date, timedelta
+import json
 import uuid
 
-from models import Warranty, Customer
 from utils.qr_utils import generate_qr_code
-from config import BUSINESS_RULES
+from config import BUSINESS_RULES, DATABASE_CONFIG
+from gui.query_executor import QueryExecutor, LoadingIndicator
+from gui.virtual_tree import VirtualTree, KeysetSource
+from gui.search_controller import SearchController
+from utils.lookup_cache import LookupCache
 
 class WarrantyTab:
     def __init__(self, parent, db_manager, current_user):
@@ -20,6 +24,9 @@ class WarrantyTab:
         self.current_user = current_user
         
         self.frame = ttk.Frame(parent)
+        self.query_executor = QueryExecutor.for_widget(self.frame, db_manager)
+        self.lookups = LookupCache.for_manager(db_manager)
+        self.loading_indicator = LoadingIndicator(self.frame)
         self.setup_ui()
         self.load_data()
     
@@ -60,7 +67,11 @@ class WarrantyTab:
         
         ttk.Label(search_frame, text="IMEI / Số bảo hành / Khách hàng:").pack(anchor=tk.W)
         self.warranty_search_var = tk.StringVar()
-        self.warranty_search_var.trace('w', self.on_warranty_search)
+        self.warranty_search = SearchController(
+            self.warranty_search_var, self.search_warranties, self.show_warranty_matches, self.clear_warranty_search,
+            self.query_executor, 'warranty.warranties', ('warranty_number', 'imei', 'customer_name'),
+            indicator=self.loading_indicator
+        )
         search_entry = ttk.Entry(search_frame, textvariable=self.warranty_search_var, width=40)
         search_entry.pack(pady=5, fill=tk.X)
         
@@ -108,11 +119,9 @@ class WarrantyTab:
                                            columns=('id', 'warranty_number', 'imei', 'customer', 'product',
                                                   'start_date', 'end_date', 'status', 'type', 'remaining_days'),
                                            show='headings',
-                                           yscrollcommand=v_scrollbar.set,
                                            xscrollcommand=h_scrollbar.set)
         
         # Configure scrollbars
-        v_scrollbar.config(command=self.warranties_tree.yview)
         h_scrollbar.config(command=self.warranties_tree.xview)
         
         # Column headings
@@ -133,6 +142,20 @@ class WarrantyTab:
             self.warranties_tree.heading(col, text=heading)
             self.warranties_tree.column(col, width=width, minwidth=50)
         
+        # Only the visible rows exist in the tree; pages are read as it scrolls
+        self.warranties_view = VirtualTree(
+            self.warranties_tree, v_scrollbar, self.query_executor, 'warranty.list',
+            KeysetSource(self.db_manager, "w.*, c.name as customer_name, p.name as product_name",
+                         "warranties w "
+                         "LEFT JOIN customers c ON w.customer_id = c.id "
+                         "LEFT JOIN products p ON w.product_id = p.id", 'w.id',
+                         count_tables="warranties w"),
+            self.format_warranty_row,
+            {'id': 'w.id', 'warranty_number': 'w.warranty_number', 'end_date': 'w.end_day'},
+            ('w.created_at', True),
+            indicator=self.loading_indicator
+        )
+        
         # Pack treeview and scrollbars
         self.warranties_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -277,218 +300,94 @@ class WarrantyTab:
         self.refresh_warranties()
         self.load_warranty_claims()
     
+    def release_data(self):
+        """Drop the loaded lists while the tab is hidden; load_data() reads them again"""
+        self.warranty_search.clear_cache()
+        self.warranties_view.release()
+    
     def refresh_warranties(self):
         """Refresh warranties list"""
-        # Clear existing items
-        for item in self.warranties_tree.get_children():
-            self.warranties_tree.delete(item)
-        
-        # Load warranties
-        query = """
-        SELECT w.*, c.name as customer_name, p.name as product_name
-        FROM warranties w
-        LEFT JOIN customers c ON w.customer_id = c.id
-        LEFT JOIN products p ON w.product_id = p.id
-        ORDER BY w.created_at DESC
-        """
-        
-        warranties = self.db_manager.fetch_all(query)
-        
-        for warranty in warranties:
-            # Calculate remaining days
-            try:
-                end_date = datetime.strptime(warranty['end_date'], '%Y-%m-%d').date()
-                remaining_days = (end_date - date.today()).days
-                remaining_text = f"{remaining_days} ngày" if remaining_days > 0 else "Hết hạn"
-            except:
-                remaining_text = "N/A"
-            
-            # Status translation
-            status_map = {
-                'active': 'Đang bảo hành',
-                'expired': 'Hết hạn',
-                'claimed': 'Đã bảo hành',
-                'voided': 'Hủy bỏ'
-            }
-            
-            status_text = status_map.get(warranty['status'], warranty['status'])
-            
-            # Type translation
-            type_map = {
-                'product': 'Sản phẩm',
-                'repair': 'Sau sửa chữa'
-            }
-            
-            type_text = type_map.get(warranty['warranty_type'], warranty['warranty_type'])
-            
-            self.warranties_tree.insert('', 'end', values=(
-                warranty['id'],
-                warranty['warranty_number'],
-                warranty['imei'] or '',
-                warranty['customer_name'] or '',
-                warranty['product_name'] or '',
-                warranty['start_date'],
-                warranty['end_date'],
-                status_text,
-                type_text,
-                remaining_text
-            ))
+        self.warranty_search.clear_cache()
+        self.warranties_view.refresh()
     
-    def on_warranty_search(self, *args):
-        """Handle warranty search"""
-        search_term = self.warranty_search_var.get().lower()
+    def format_warranty_row(self, warranty):
+        """Build the tree values of a warranty"""
+        # Calculate remaining days
+        try:
+            end_date = datetime.strptime(warranty['end_date'], '%Y-%m-%d').date()
+            remaining_days = (end_date - date.today()).days
+            remaining_text = f"{remaining_days} ngày" if remaining_days > 0 else "Hết hạn"
+        except:
+            remaining_text = "N/A"
+        
+        # Status translation
+        status_map = {
+            'active': 'Đang bảo hành',
+            'expired': 'Hết hạn',
+            'claimed': 'Đã bảo hành',
+            'voided': 'Hủy bỏ'
+        }
         
-        if not search_term:
-            self.refresh_warranties()
-            return
+        status_text = status_map.get(warranty['status'], warranty['status'])
         
-        # Clear existing items
-        for item in self.warranties_tree.get_children():
-            self.warranties_tree.delete(item)
+        # Type translation
+        type_map = {
+            'product': 'Sản phẩm',
+            'repair': 'Sau sửa chữa'
+        }
         
-        # Search warranties
+        type_text = type_map.get(warranty['warranty_type'], warranty['warranty_type'])
+        
+        return (
+            warranty['id'],
+            warranty['warranty_number'],
+            warranty['imei'] or '',
+            warranty['customer_name'] or '',
+            warranty['product_name'] or '',
+            warranty['start_date'],
+            warranty['end_date'],
+            status_text,
+            type_text,
+            remaining_text
+        )
+    
+    def show_warranty_matches(self, warranties):
+        """Limit the warranty list to search results"""
+        ids = [warranty['id'] for warranty in warranties]
+        self.warranties_view.set_filter('search', "w.id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))
+    
+    def clear_warranty_search(self):
+        """Show all warranties again"""
+        self.warranties_view.set_filter('search', None)
+    
+    def search_warranties(self, search_term):
+        """Search warranties, best match first"""
         query = """
         SELECT w.*, c.name as customer_name, p.name as product_name
-        FROM warranties w
+        FROM json_each(?) m
+        JOIN warranties w ON w.id = m.value
         LEFT JOIN customers c ON w.customer_id = c.id
         LEFT JOIN products p ON w.product_id = p.id
-        WHERE LOWER(w.warranty_number) LIKE ? OR
-              LOWER(w.imei) LIKE ? OR
-              LOWER(c.name) LIKE ?
-        ORDER BY w.created_at DESC
+        ORDER BY m.key
         """
         
-        search_pattern = f"%{search_term}%"
-        warranties = self.db_manager.fetch_all(query, (search_pattern, search_pattern, search_pattern))
-        
-        for warranty in warranties:
-            # Calculate remaining days
-            try:
-                end_date = datetime.strptime(warranty['end_date'], '%Y-%m-%d').date()
-                remaining_days = (end_date - date.today()).days
-                remaining_text = f"{remaining_days} ngày" if remaining_days > 0 else "Hết hạn"
-            except:
-                remaining_text = "N/A"
-            
-            status_map = {
-                'active': 'Đang bảo hành',
-                'expired': 'Hết hạn',
-                'claimed': 'Đã bảo hành',
-                'voided': 'Hủy bỏ'
-            }
-            
-            status_text = status_map.get(warranty['status'], warranty['status'])
-            
-            type_map = {
-                'product': 'Sản phẩm',
-                'repair': 'Sau sửa chữa'
-            }
-            
-            type_text = type_map.get(warranty['warranty_type'], warranty['warranty_type'])
-            
-            self.warranties_tree.insert('', 'end', values=(
-                warranty['id'],
-                warranty['warranty_number'],
-                warranty['imei'] or '',
-                warranty['customer_name'] or '',
-                warranty['product_name'] or '',
-                warranty['start_date'],
-                warranty['end_date'],
-                status_text,
-                type_text,
-                remaining_text
-            ))
+        ids = self.db_manager.search('warranties', search_term)
+        rows = self.db_manager.fetch_all(query, (json.dumps(ids),))
+        return rows, len(ids) < DATABASE_CONFIG['SEARCH_LIMIT']
     
     def filter_warranties(self):
         """Filter warranties by status"""
         status_filter = self.status_filter_var.get()
         
-        # Clear existing items
-        for item in self.warranties_tree.get_children():
-            self.warranties_tree.delete(item)
-        
-        # Build query based on filter
         if status_filter == "all":
-            query = """
-            SELECT w.*, c.name as customer_name, p.name as product_name
-            FROM warranties w
-            LEFT JOIN customers c ON w.customer_id = c.id
-            LEFT JOIN products p ON w.product_id = p.id
-            ORDER BY w.created_at DESC
-            """
-            params = ()
+            self.warranties_view.set_filter('status', None)
+        elif status_filter == "active":
+            self.warranties_view.set_filter('status', "w.status = 'active' AND w.end_day >= ?",
+                                            (self.db_manager.day_key(),))
+        elif status_filter == "expired":
+            self.warranties_view.set_filter('status', "w.end_day < ?", (self.db_manager.day_key(),))
         else:
-            # Handle special cases
-            if status_filter == "active":
-                query = """
-                SELECT w.*, c.name as customer_name, p.name as product_name
-                FROM warranties w
-                LEFT JOIN customers c ON w.customer_id = c.id
-                LEFT JOIN products p ON w.product_id = p.id
-                WHERE w.status = 'active' AND DATE(w.end_date) >= DATE('now')
-                ORDER BY w.created_at DESC
-                """
-                params = ()
-            elif status_filter == "expired":
-                query = """
-                SELECT w.*, c.name as customer_name, p.name as product_name
-                FROM warranties w
-                LEFT JOIN customers c ON w.customer_id = c.id
-                LEFT JOIN products p ON w.product_id = p.id
-                WHERE DATE(w.end_date) < DATE('now')
-                ORDER BY w.created_at DESC
-                """
-                params = ()
-            else:
-                query = """
-                SELECT w.*, c.name as customer_name, p.name as product_name
-                FROM warranties w
-                LEFT JOIN customers c ON w.customer_id = c.id
-                LEFT JOIN products p ON w.product_id = p.id
-                WHERE w.status = ?
-                ORDER BY w.created_at DESC
-                """
-                params = (status_filter,)
-        
-        warranties = self.db_manager.fetch_all(query, params)
-        
-        for warranty in warranties:
-            # Calculate remaining days
-            try:
-                end_date = datetime.strptime(warranty['end_date'], '%Y-%m-%d').date()
-                remaining_days = (end_date - date.today()).days
-                remaining_text = f"{remaining_days} ngày" if remaining_days > 0 else "Hết hạn"
-            except:
-                remaining_text = "N/A"
-            
-            status_map = {
-                'active': 'Đang bảo hành',
-                'expired': 'Hết hạn',
-                'claimed': 'Đã bảo hành',
-                'voided': 'Hủy bỏ'
-            }
-            
-            status_text = status_map.get(warranty['status'], warranty['status'])
-            
-            type_map = {
-                'product': 'Sản phẩm',
-                'repair': 'Sau sửa chữa'
-            }
-            
-            type_text = type_map.get(warranty['warranty_type'], warranty['warranty_type'])
-            
-            self.warranties_tree.insert('', 'end', values=(
-                warranty['id'],
-                warranty['warranty_number'],
-                warranty['imei'] or '',
-                warranty['customer_name'] or '',
-                warranty['product_name'] or '',
-                warranty['start_date'],
-                warranty['end_date'],
-                status_text,
-                type_text,
-                remaining_text
-            ))
+            self.warranties_view.set_filter('status', "w.status = ?", (status_filter,))
     
     def create_warranty(self):
         """Create new warranty"""
@@ -532,7 +431,7 @@ class WarrantyTab:
         customer_combo = ttk.Combobox(main_frame, textvariable=customer_var, width=40)
         
         # Load customers
-        customers = self.db_manager.fetch_all("SELECT id, name, phone FROM customers ORDER BY name")
+        customers = self.lookups.get('customers')
         customer_combo['values'] = [f"{c['id']} - {c['name']} ({c['phone']})" for c in customers if c['phone']]
         
         if warranty_data.get('customer_id'):
@@ -996,9 +895,10 @@ class WarrantyTab:
             LEFT JOIN customers c ON w.customer_id = c.id
             LEFT JOIN products p ON w.product_id = p.id
             WHERE w.status = 'active' AND 
-                  DATE(w.end_date) BETWEEN DATE('now') AND DATE('now', '+30 days')
+                  w.end_day BETWEEN ? AND ?
             ORDER BY w.end_date ASC
             """
+            params = (self.db_manager.day_key(), self.db_manager.day_key(date.today() + timedelta(days=30)))
         else:
             # Expired warranties
             query = """
@@ -1007,11 +907,12 @@ class WarrantyTab:
             FROM warranties w
             LEFT JOIN customers c ON w.customer_id = c.id
             LEFT JOIN products p ON w.product_id = p.id
-            WHERE DATE(w.end_date) < DATE('now')
+            WHERE w.end_day < ?
             ORDER BY w.end_date DESC
             """
+            params = (self.db_manager.day_key(),)
         
-        warranties = self.db_manager.fetch_all(query)
+        warranties = self.db_manager.fetch_all(query, params)
         
         for warranty in warranties:
             # Calculate remaining days
@@ -5,6 +5,9 @@ ChViet Mobile Store Management System
 Main application entry point
 """
 
+import time
+STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sys
@@ -19,18 +22,25 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database import DatabaseManager
 from gui.main_window import MainWindow
-from config import APP_CONFIG
+from config import APP_CONFIG, create_directories
+from utils.startup_profile import StartupProfile
 
 class ChVietApp:
-    def __init__(self):
+    def __init__(self, profile=None):
         self.db_manager = None
         self.main_window = None
+        self.profile = profile or StartupProfile()
         
-    def initialize_database(self):
+    def initialize_database(self, db_path=None):
         """Initialize database connection and create tables"""
         try:
-            self.db_manager = DatabaseManager()
-            self.db_manager.initialize_database()
+            with self.profile.phase('db_connect'):
+                self.db_manager = DatabaseManager(db_path)
+                if '--log-queries' in sys.argv:
+                    self.db_manager.enable_query_log()
+                self.db_manager.connect()
+            with self.profile.phase('schema_check'):
+                self.db_manager.initialize_database()
             print("Database initialized successfully")
             return True
         except Exception as e:
@@ -39,16 +49,20 @@ class ChVietApp:
     
     def run(self):
         """Main application entry point"""
+        create_directories()
+        
+        # Create main window first so database errors have a parent window
+        with self.profile.phase('tk_root'):
+            root = tk.Tk()
+            root.title(APP_CONFIG['APP_NAME'])
+            root.geometry(APP_CONFIG['WINDOW_SIZE'])
+            root.state('zoomed' if os.name == 'nt' else 'normal')  # Maximize on Windows
+        
         # Initialize database
         if not self.initialize_database():
+            root.destroy()
             return
         
-        # Create main window
-        root = tk.Tk()
-        root.title(APP_CONFIG['APP_NAME'])
-        root.geometry(APP_CONFIG['WINDOW_SIZE'])
-        root.state('zoomed' if os.name == 'nt' else 'normal')  # Maximize on Windows
-        
         # Set application icon and style
         try:
             # Use ttk style for modern appearance
@@ -67,11 +81,14 @@ class ChVietApp:
             print(f"Style configuration error: {e}")
         
         # Initialize main window
-        self.main_window = MainWindow(root, self.db_manager)
+        self.main_window = MainWindow(root, self.db_manager, self.profile)
         
         # Handle window closing
         def on_closing():
             if messagebox.askokcancel("Thoát", "Bạn có chắc chắn muốn thoát ứng dụng?"):
+                executor = getattr(root, 'query_executor', None)
+                if executor:
+                    executor.shutdown()
                 if self.db_manager:
                     self.db_manager.close_connection()
                 root.destroy()
@@ -83,5 +100,8 @@ class ChVietApp:
         root.mainloop()
 
 if __name__ == "__main__":
-    app = ChVietApp()
+    # --profile-startup saves phase timings; check them with python -m utils.startup_profile --check
+    profile = StartupProfile(APP_CONFIG['STARTUP_PROFILE_FILE'] if '--profile-startup' in sys.argv else None)
+    profile.record('imports', STARTED)
+    app = ChVietApp(profile)
     app.run()
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar analytics snapshot for ChViet Mobile Store Management System
+
+Copies sale items, sales and transactions into one binary file per column
+(day key, product, staff, quantity, amount, cost...) next to the database
+and answers group-by totals, top-N lists and period comparisons from
+memory-mapped views of those files, without touching the live database.
+
+Usage:
+    python -m utils.analytics_snapshot [database] [--rebuild]   # refresh the snapshot
+    python -m utils.analytics_snapshot [database] --verify      # compare it with the database
+"""
+
+import array
+import bisect
+import heapq
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import APP_CONFIG
+
+class AnalyticsSnapshot:
+    """Append-only column files of the sales and cash history
+    
+    Rows are appended by id above the high-water mark saved in each
+    table's meta.json, so a refresh reads only what was added since the
+    last one. A table is copied again from scratch when the table_edits
+    counter of a table it reads moved (a copied row was updated or
+    deleted), its ids went
+    backwards (the database was restored from a backup) or new rows are
+    dated before rows already copied. Item cost is the unit cost known
+    when the row was copied.
+    
+    Columns are read through memoryviews of read-only maps. Rows are kept
+    in day order, so a date range is found with two binary searches and
+    only that slice is walked.
+    """
+    
+    # table: (source query taking the high-water mark, [(column, array typecode)]).
+    # The first column is the source row id, the second the YYYYMMDD day key;
+    # rows come in day order so the day column stays sorted. The unary + and
+    # CROSS JOIN keep SQLite on the id range instead of walking the day index.
+    TABLES = {
+        'sale_items': ("""
+            SELECT si.id, COALESCE(s.sale_day, 0), si.product_id, COALESCE(s.staff_id, 0),
+                   COALESCE(si.quantity, 0), COALESCE(si.total_price, 0),
+                   COALESCE(i.cost_price, p.cost_price, 0) * COALESCE(si.quantity, 0)
+            FROM sale_items si
+            CROSS JOIN sales s ON si.sale_id = s.id
+            LEFT JOIN inventory i ON si.inventory_id = i.id
+            LEFT JOIN products p ON si.product_id = p.id
+            WHERE si.id > ?
+            ORDER BY +s.sale_day, si.id""",
+            [('id', 'q'), ('day', 'i'), ('product_id', 'i'), ('staff_id', 'i'),
+             ('quantity', 'i'), ('amount', 'd'), ('cost', 'd')]),
+        'sales': ("""
+            SELECT id, COALESCE(sale_day, 0), COALESCE(staff_id, 0), COALESCE(customer_id, 0),
+                   COALESCE(total_amount, 0), COALESCE(paid_amount, 0)
+            FROM sales
+            WHERE id > ?
+            ORDER BY +sale_day, id""",
+            [('id', 'q'), ('day', 'i'), ('staff_id', 'i'), ('customer_id', 'i'),
+             ('amount', 'd'), ('paid', 'd')]),
+        'transactions': ("""
+            SELECT id, COALESCE(transaction_day, 0), COALESCE(staff_id, 0),
+                   CASE WHEN transaction_type = 'income' THEN COALESCE(amount, 0) ELSE 0 END,
+                   CASE WHEN transaction_type = 'expense' THEN COALESCE(amount, 0) ELSE 0 END
+            FROM transactions
+            WHERE id > ?
+            ORDER BY +transaction_day, id""",
+            [('id', 'q'), ('day', 'i'), ('staff_id', 'i'), ('income', 'd'), ('expense', 'd')]),
+    }
+    
+    # Tables whose edits invalidate a copy: sale items take their day and staff from sales
+    SOURCES = {
+        'sale_items': ['sale_items', 'sales'],
+        'sales': ['sales'],
+        'transactions': ['transactions'],
+    }
+    
+    BATCH_ROWS = 10000
+    
+    def __init__(self, db_manager, directory=None):
+        self.db_manager = db_manager
+        if directory is None:
+            name = os.path.splitext(os.path.basename(db_manager.db_path))[0]
+            directory = os.path.join(APP_CONFIG['ANALYTICS_DIR'], name)
+        self.directory = directory
+        
+        self._lock = threading.RLock()
+        self._meta = {}
+        self._maps = {}
+    
+    @classmethod
+    def for_manager(cls, db_manager):
+        """Get the snapshot shared by every tab using db_manager"""
+        snapshot = getattr(db_manager, 'analytics_snapshot', None)
+        if snapshot is None:
+            snapshot = cls(db_manager)
+            db_manager.analytics_snapshot = snapshot
+        return snapshot
+    
+    def refresh(self, rebuild=False, tables=None):
+        """
+        Append the rows added since the last refresh, safe to run on a worker thread
+        
+        Args:
+            rebuild: Copy the tables again from scratch
+            tables: Snapshot tables to refresh, None for all
+        
+        Returns:
+            dict: Table -> number of rows appended
+        """
+        with self._lock:
+            return dict((table, self._refresh_table(table, rebuild)) for table in (tables or self.TABLES))
+    
+    def verify(self):
+        """
+        Compare the snapshot with a fresh copy of the rows it holds
+        
+        Every column but the id is summed per day on both sides, over the
+        source rows up to each table's high-water mark.
+        
+        Returns:
+            list: (table, day, column, stored, expected) for every drifted total
+        """
+        mismatches = []
+        with self._lock:
+            for table, (query, columns) in self.TABLES.items():
+                meta = self._load_meta(table)
+                names = [name for name, _ in columns[2:]]
+                
+                expected = {}
+                for row in self.db_manager.iterate(query, (0,)):
+                    if row[0] <= meta['high_water']:
+                        totals = expected.setdefault(row[1], [0] * len(names))
+                        for index, value in enumerate(row[2:]):
+                            totals[index] += value
+                
+                stored = {}
+                for index, name in enumerate(names):
+                    for day, (_, total) in self.group_totals(table, 'day', name).items():
+                        stored.setdefault(day, [0] * len(names))[index] = total
+                
+                for day in sorted(set(expected) | set(stored)):
+                    for index, name in enumerate(names):
+                        expected_value = expected[day][index] if day in expected else 0
+                        stored_value = stored[day][index] if day in stored else 0
+                        if round(stored_value, 2) != round(expected_value, 2):
+                            mismatches.append((table, day, name, stored_value, expected_value))
+        return mismatches
+    
+    def rows(self, table):
+        """Get the number of rows in a table's snapshot"""
+        with self._lock:
+            return self._load_meta(table)['rows']
+    
+    def column(self, table, name):
+        """
+        Get a read-only view of one column
+        
+        Args:
+            table: Snapshot table
+            name: Column name
+        
+        Returns:
+            memoryview: One item per row, in id order
+        """
+        with self._lock:
+            meta = self._load_meta(table)
+            view = self._maps.get((table, name))
+            if view is None:
+                typecode = meta['columns'][name]
+                length = meta['rows'] * array.array(typecode).itemsize
+                if length:
+                    with open(self._column_path(table, name), 'rb') as f:
+                        mapped = mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ)
+                    view = memoryview(mapped).cast(typecode)
+                else:
+                    view = memoryview(array.array(typecode))
+                self._maps[(table, name)] = view
+            return view
+    
+    def total(self, table, value, from_date=None, to_date=None):
+        """
+        Sum a column over a date range
+        
+        Args:
+            table: Snapshot table
+            value: Column to sum
+            from_date: Start date (date or 'YYYY-MM-DD'), None for no lower bound
+            to_date: End date, inclusive, None for no upper bound
+        
+        Returns:
+            tuple: (row count, total)
+        """
+        with self._lock:
+            lo, hi, days, low, high = self._range(table, from_date, to_date)
+            values = self.column(table, value)[lo:hi]
+            if days is None:
+                return hi - lo, sum(values)
+            count, total = 0, 0
+            for day, amount in zip(days, values):
+                if low <= day <= high:
+                    count += 1
+                    total += amount
+            return count, total
+    
+    def group_totals(self, table, key, value, from_date=None, to_date=None):
+        """
+        Count rows and sum a column per key over a date range
+        
+        Args:
+            table: Snapshot table
+            key: Column to group by, e.g. 'product_id', 'staff_id' or 'day'
+            value: Column to sum
+            from_date: Start date (date or 'YYYY-MM-DD'), None for no lower bound
+            to_date: End date, inclusive, None for no upper bound
+        
+        Returns:
+            dict: Key -> [row count, total]
+        """
+        with self._lock:
+            lo, hi, days, low, high = self._range(table, from_date, to_date)
+            keys = self.column(table, key)[lo:hi]
+            values = self.column(table, value)[lo:hi]
+            
+            groups = {}
+            if days is None:
+                for group, amount in zip(keys, values):
+                    totals = groups.get(group)
+                    if totals is None:
+                        groups[group] = [1, amount]
+                    else:
+                        totals[0] += 1
+                        totals[1] += amount
+            else:
+                for day, group, amount in zip(days, keys, values):
+                    if low <= day <= high:
+                        totals = groups.setdefault(group, [0, 0])
+                        totals[0] += 1
+                        totals[1] += amount
+            return groups
+    
+    def top(self, table, key, value, from_date=None, to_date=None, limit=10):
+        """
+        Get the keys with the largest totals over a date range
+        
+        Args:
+            table: Snapshot table
+            key: Column to group by
+            value: Column to sum and rank by
+            from_date: Start date (date or 'YYYY-MM-DD'), None for no lower bound
+            to_date: End date, inclusive, None for no upper bound
+            limit: Number of keys to return, None for every key
+        
+        Returns:
+            list: (key, row count, total) tuples, largest total first
+        """
+        groups = self.group_totals(table, key, value, from_date, to_date)
+        if limit is None:
+            ranked = sorted(groups.items(), key=lambda item: item[1][1], reverse=True)
+        else:
+            ranked = heapq.nlargest(limit, groups.items(), key=lambda item: item[1][1])
+        return [(group, count, total) for group, (count, total) in ranked]
+    
+    def compare_periods(self, table, value, current, previous, key=None):
+        """
+        Compare the total of a column between two date ranges
+        
+        Args:
+            table: Snapshot table
+            value: Column to sum
+            current: (from_date, to_date) of the period reported
+            previous: (from_date, to_date) of the period compared against
+            key: Optional column to compare per key instead of overall
+        
+        Returns:
+            dict: current, previous, change and growth (change / previous,
+                  None when previous is 0); keyed by group when key is given
+        """
+        def compare(now, before):
+            return {'current': now, 'previous': before, 'change': now - before,
+                    'growth': (now - before) / before if before else None}
+        
+        if key is None:
+            return compare(self.total(table, value, *current)[1], self.total(table, value, *previous)[1])
+        
+        now = self.group_totals(table, key, value, *current)
+        before = self.group_totals(table, key, value, *previous)
+        return dict((group, compare(now.get(group, (0, 0))[1], before.get(group, (0, 0))[1]))
+                    for group in set(now) | set(before))
+    
+    def close(self):
+        """Release the column maps"""
+        with self._lock:
+            for view in self._maps.values():
+                mapped = view.obj
+                try:
+                    view.release()
+                    if isinstance(mapped, mmap.mmap):
+                        mapped.close()
+                except BufferError:
+                    # A caller still holds a slice; the map closes when it is dropped
+                    pass
+            self._maps = {}
+    
+    def _range(self, table, from_date, to_date):
+        """Find the rows of a date range
+        
+        Returns (lo, hi, days, low, high): the slice to walk, and when the
+        day column is not sorted, the day keys of that slice to filter on.
+        """
+        meta = self._load_meta(table)
+        low = self.db_manager.day_key(from_date) if from_date is not None else 0
+        high = self.db_manager.day_key(to_date) if to_date is not None else 99999999
+        if low is None or high is None:
+            return 0, 0, None, 0, 0
+        
+        days = self.column(table, 'day')
+        if not meta['sorted']:
+            return 0, len(days), days, low, high
+        return bisect.bisect_left(days, low), bisect.bisect_right(days, high), None, low, high
+    
+    def _refresh_table(self, table, rebuild):
+        """Bring one table's column files up to date"""
+        query, columns = self.TABLES[table]
+        meta = self._load_meta(table)
+        
+        if not rebuild and meta['rows']:
+            newest = self.db_manager.fetch_one(f"SELECT MAX(id) FROM {table}")[0] or 0
+            rebuild = (newest < meta['high_water'] or
+                       meta['columns'] != dict(columns) or
+                       meta['edits'] != self._edits(table))
+        
+        # The maps must go before the files are truncated or grown
+        self.close()
+        if rebuild:
+            meta = self._empty_meta(table)
+        edits = self._edits(table)
+        
+        os.makedirs(os.path.join(self.directory, table), exist_ok=True)
+        files = {}
+        try:
+            for name, typecode in columns:
+                path = self._column_path(table, name)
+                f = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+                # Drop anything written after the last saved meta.json
+                f.truncate(meta['rows'] * array.array(typecode).itemsize)
+                f.seek(0, os.SEEK_END)
+                files[name] = f
+            
+            appended = 0
+            high_water, last_day = meta['high_water'], meta['last_day']
+            batch = [array.array(typecode) for _, typecode in columns]
+            for row in self.db_manager.iterate(query, (meta['high_water'],)):
+                for values, value in zip(batch, row):
+                    values.append(value)
+                if row[1] < last_day:
+                    meta['sorted'] = False
+                high_water, last_day = max(high_water, row[0]), row[1]
+                appended += 1
+                if len(batch[0]) >= self.BATCH_ROWS:
+                    self._write_batch(files, columns, batch)
+                    batch = [array.array(typecode) for _, typecode in columns]
+            self._write_batch(files, columns, batch)
+        finally:
+            for f in files.values():
+                f.close()
+        
+        if appended or rebuild:
+            meta['rows'] += appended
+            meta['high_water'], meta['last_day'] = high_water, last_day
+            meta['edits'] = edits
+            meta['refreshed_at'] = time.time()
+            self._save_meta(table, meta)
+        
+        # Backdated rows were appended out of order, copy the table again sorted
+        if not meta['sorted']:
+            return self._refresh_table(table, True)
+        return appended
+    
+    def _edits(self, table):
+        """Get the table_edits counters of the tables a snapshot table is copied from"""
+        return [self.db_manager.get_table_edits(source) for source in self.SOURCES[table]]
+    
+    @staticmethod
+    def _write_batch(files, columns, batch):
+        """Append one batch of values to the column files"""
+        for (name, _), values in zip(columns, batch):
+            values.tofile(files[name])
+    
+    def _column_path(self, table, name):
+        """Get the file holding one column"""
+        return os.path.join(self.directory, table, f"{name}.bin")
+    
+    def _empty_meta(self, table):
+        """Get the meta data of an empty snapshot table"""
+        return {'columns': dict(self.TABLES[table][1]), 'rows': 0, 'high_water': 0,
+                'last_day': 0, 'sorted': True, 'edits': [], 'refreshed_at': None}
+    
+    def _load_meta(self, table):
+        """Get a table's meta data, reading meta.json on first use"""
+        meta = self._meta.get(table)
+        if meta is None:
+            try:
+                with open(os.path.join(self.directory, table, 'meta.json'), 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (FileNotFoundError, ValueError):
+                meta = self._empty_meta(table)
+            self._meta[table] = meta
+        return meta
+    
+    def _save_meta(self, table, meta):
+        """Write a table's meta data once its column files are complete"""
+        path = os.path.join(self.directory, table, 'meta.json')
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+        self._meta[table] = meta
+
+def main(argv=None):
+    """Command line entry point"""
+    from database import DatabaseManager
+    
+    argv = sys.argv[1:] if argv is None else argv
+    rebuild = '--rebuild' in argv
+    verify = '--verify' in argv
+    args = [arg for arg in argv if arg not in ('--rebuild', '--verify')]
+    
+    db_manager = DatabaseManager(args[0] if args else APP_CONFIG['DATABASE_NAME'])
+    db_manager.connect()
+    snapshot = AnalyticsSnapshot(db_manager)
+    
+    started = time.perf_counter()
+    appended = snapshot.refresh(rebuild)
+    elapsed = (time.perf_counter() - started) * 1000
+    
+    for table in snapshot.TABLES:
+        print(f"{table:<15} {snapshot.rows(table):>10,} rows (+{appended[table]:,})")
+    print(f"Snapshot refreshed in {elapsed:.0f} ms: {snapshot.directory}")
+    
+    mismatches = snapshot.verify() if verify else []
+    for table, day, column, stored, expected in mismatches[:20]:
+        print(f"  {table} {day} {column}: snapshot {stored:,.2f}, database {expected:,.2f}")
+    if verify:
+        print(f"{len(mismatches)} drifted totals")
+    
+    snapshot.close()
+    db_manager.close_connection()
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sellable unit cache for ChViet Mobile Store Management System
+"""
+
+import json
+import threading
+
+class CatalogCache:
+    """Available inventory units keyed by inventory id, IMEI and product barcode
+    
+    Barcode and IMEI scans at checkout resolve with dictionary lookups
+    instead of a query. The cache is loaded once and then kept current by
+    refresh_units() / refresh_product() after sales, stock-in and edits.
+    A code the cache does not know is still looked up in the database, so
+    changes made outside this process are picked up on the next scan.
+    """
+    
+    UNIT_QUERY = """
+    SELECT i.*, p.name, p.brand, p.model, p.barcode, p.selling_price
+    FROM inventory i
+    JOIN products p ON i.product_id = p.id
+    """
+    
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.loaded = False
+        
+        self._lock = threading.RLock()
+        self._by_id = {}
+        self._by_imei = {}
+        self._by_barcode = {}
+        self._loading = False
+        self._dirty = set()
+    
+    @classmethod
+    def for_manager(cls, db_manager):
+        """Get the cache shared by every tab using db_manager"""
+        cache = getattr(db_manager, 'catalog_cache', None)
+        if cache is None:
+            cache = cls(db_manager)
+            db_manager.catalog_cache = cache
+        return cache
+    
+    def load(self):
+        """Load every available unit, safe to run on a worker thread"""
+        with self._lock:
+            # A load already running delivers the same snapshot
+            if self._loading:
+                return None
+            self._loading = True
+            self._dirty = set()
+        
+        rows = self.db_manager.fetch_all(f"{self.UNIT_QUERY} WHERE i.status = 'available'")
+        
+        with self._lock:
+            self._by_id, self._by_imei, self._by_barcode = {}, {}, {}
+            for row in rows:
+                self._add(dict(row))
+            self._loading = False
+            self.loaded = True
+            dirty, self._dirty = self._dirty, set()
+        
+        # Units written while the snapshot was read
+        if dirty:
+            self.refresh_units(dirty)
+        return len(rows)
+    
+    def _add(self, unit):
+        """Index one available unit"""
+        self._by_id[unit['id']] = unit
+        if unit['imei']:
+            self._by_imei[unit['imei']] = unit
+        if unit['barcode']:
+            self._by_barcode.setdefault(unit['barcode'], {})[unit['id']] = unit
+    
+    def _discard(self, inventory_id):
+        """Drop one unit from every index"""
+        unit = self._by_id.pop(inventory_id, None)
+        if unit is None:
+            return
+        if unit['imei'] and self._by_imei.get(unit['imei']) is unit:
+            del self._by_imei[unit['imei']]
+        units = self._by_barcode.get(unit['barcode'])
+        if units is not None:
+            units.pop(inventory_id, None)
+            if not units:
+                del self._by_barcode[unit['barcode']]
+    
+    def _apply(self, inventory_ids, rows):
+        """Replace the given units with freshly read rows"""
+        with self._lock:
+            if self._loading:
+                self._dirty.update(inventory_ids)
+            for inventory_id in inventory_ids:
+                self._discard(inventory_id)
+            for row in rows:
+                if row['status'] == 'available':
+                    self._add(dict(row))
+    
+    def refresh_units(self, inventory_ids):
+        """Re-read units after their status or details changed"""
+        inventory_ids = [int(inventory_id) for inventory_id in inventory_ids if inventory_id is not None]
+        if not inventory_ids:
+            return
+        rows = self.db_manager.fetch_all(
+            f"{self.UNIT_QUERY} WHERE i.id IN (SELECT value FROM json_each(?))",
+            (json.dumps(inventory_ids),)
+        )
+        self._apply(inventory_ids, rows)
+    
+    def refresh_product(self, product_id):
+        """Re-read every unit of a product after the product was edited"""
+        rows = self.db_manager.fetch_all(f"{self.UNIT_QUERY} WHERE i.product_id = ?", (product_id,))
+        with self._lock:
+            stale = [unit_id for unit_id, unit in self._by_id.items() if unit['product_id'] == product_id]
+        self._apply(set(stale) | {row['id'] for row in rows}, rows)
+    
+    def get(self, inventory_id):
+        """Get an available unit by inventory id"""
+        with self._lock:
+            return self._by_id.get(inventory_id)
+    
+    def lookup(self, code, exclude=()):
+        """
+        Find an available unit by IMEI or product barcode
+        
+        Args:
+            code: Scanned IMEI or barcode
+            exclude: Inventory ids to skip, e.g. units already in the cart
+        
+        Returns:
+            dict: Unit with inventory columns plus product name, brand,
+                  model, barcode and selling_price, or None
+        """
+        with self._lock:
+            unit = self._by_imei.get(code)
+            if unit is None or unit['id'] in exclude:
+                units = self._by_barcode.get(code, {})
+                unit = next((unit for unit_id, unit in units.items() if unit_id not in exclude), None)
+        if unit is not None:
+            return unit
+        
+        # Probe each unique index separately; an OR across both tables can use neither
+        row = None
+        for column in ('i.imei', 'p.barcode'):
+            row = self.db_manager.fetch_one(
+                f"""{self.UNIT_QUERY}
+                    WHERE {column} = ? AND i.status = 'available'
+                    AND i.id NOT IN (SELECT value FROM json_each(?))
+                    LIMIT 1""",
+                (code, json.dumps(list(exclude)))
+            )
+            if row is not None:
+                break
+        if row is None:
+            return None
+        
+        unit = dict(row)
+        if self.loaded:
+            self._apply([unit['id']], [row])
+        return unit
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Database benchmarks for ChViet Mobile Store Management System
+
+Seeds throwaway store databases in a temporary folder and times the
+database work behind the main screens, so the before/after numbers quoted
+for a change can be reproduced on any machine.
+
+Usage:
+    python -m utils.db_benchmark checkout [--sales N] [--runs N]   # per-statement commits vs transaction()
+    python -m utils.db_benchmark day_keys [--rows N]               # DATE() predicates vs day keys
+    python -m utils.db_benchmark stock_count [--units N]           # per-unit COUNT(*) vs one query
+"""
+
+import inspect
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+
+def create_store(path, products=1):
+    """
+    Create an empty store database with a few products
+    
+    Args:
+        path: Database file to create
+        products: Number of products to add
+    
+    Returns:
+        DatabaseManager: Connected manager for the new database
+    """
+    db_manager = DatabaseManager(path)
+    db_manager.initialize_database()
+    with db_manager.transaction():
+        db_manager.connection.executemany(
+            "INSERT INTO products (name, brand, cost_price, selling_price, category_id) VALUES (?, ?, ?, ?, 1)",
+            [(f"Product {i}", "Brand", 5000000, 7000000) for i in range(products)]
+        )
+    return db_manager
+
+def copy_store(source, target):
+    """Copy a closed benchmark database so each variant starts from the same data"""
+    shutil.copy(source, target)
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    return DatabaseManager(target)
+
+def timing_summary(times):
+    """Get (median ms, p95 ms) of a list of durations in seconds"""
+    times = sorted(times)
+    return (statistics.median(times) * 1000, times[int(len(times) * 0.95) - 1] * 1000)
+
+def _checkout(db_manager, sale_number, inventory_ids):
+    """Write one sale the way SalesTab.process_sale does, minus the QR codes"""
+    now = datetime.now().isoformat()
+    total = 7000000 * len(inventory_ids)
+    cursor = db_manager.execute_query(
+        """INSERT INTO sales (invoice_number, staff_id, sale_date, subtotal, total_amount, paid_amount,
+                              payment_method, payment_status, sale_type, created_at, updated_at)
+           VALUES (?, 1, ?, ?, ?, ?, 'cash', 'partial', 'retail', ?, ?)""",
+        (f"HDB{sale_number}", now, total, total, total - 100000, now, now)
+    )
+    sale_id = cursor.lastrowid
+    
+    for inventory_id in inventory_ids:
+        db_manager.execute_query(
+            """INSERT INTO sale_items (sale_id, inventory_id, product_id, imei, quantity, unit_price,
+                                       total_price, warranty_months, created_at)
+               VALUES (?, ?, 1, ?, 1, 7000000, 7000000, 12, ?)""",
+            (sale_id, inventory_id, f"IMEI{inventory_id:011d}", now)
+        )
+        db_manager.execute_query("UPDATE inventory SET status = 'sold', updated_at = ? WHERE id = ?",
+                                 (now, inventory_id))
+        db_manager.execute_query(
+            """INSERT INTO warranties (warranty_number, imei, product_id, sale_id, warranty_type,
+                                       start_date, end_date, status, created_at, updated_at)
+               VALUES (?, ?, 1, ?, 'product', ?, ?, 'active', ?, ?)""",
+            (f"BHB{inventory_id}", f"IMEI{inventory_id:011d}", sale_id, now[:10], now[:10], now, now)
+        )
+    
+    db_manager.execute_query(
+        """INSERT INTO transactions (transaction_type, amount, description, reference_id, reference_type,
+                                     payment_method, staff_id, transaction_date, created_at)
+           VALUES ('income', ?, 'Bán hàng', ?, 'sale', 'cash', 1, ?, ?)""",
+        (total - 100000, sale_id, now, now)
+    )
+    db_manager.execute_query(
+        """INSERT INTO debts (debtor_type, debtor_id, amount, description, reference_id, reference_type,
+                              status, created_at, updated_at)
+           VALUES ('customer', 1, 100000, 'Nợ', ?, 'sale', 'outstanding', ?, ?)""",
+        (sale_id, now, now)
+    )
+
+def benchmark_checkout(directory, sales=100000, runs=200, items=5):
+    """
+    Time a checkout with a commit per statement and inside one transaction()
+    
+    Args:
+        directory: Folder for the benchmark databases
+        sales: Sales history to seed before timing
+        runs: Checkouts timed per variant
+        items: Phones per checkout
+    
+    Returns:
+        list: (variant, median ms, p95 ms)
+    """
+    base = os.path.join(directory, 'checkout.db')
+    db_manager = create_store(base)
+    started = datetime(2024, 1, 1)
+    with db_manager.transaction():
+        db_manager.connection.executemany(
+            """INSERT INTO sales (invoice_number, staff_id, sale_date, subtotal, total_amount, paid_amount,
+                                  payment_method, payment_status)
+               VALUES (?, 1, ?, 7000000, 7000000, 7000000, 'cash', 'paid')""",
+            ((f"HDS{i}", (started + timedelta(minutes=5 * i)).isoformat()) for i in range(sales))
+        )
+        db_manager.connection.executemany(
+            """INSERT INTO inventory (product_id, imei, status, cost_price, selling_price)
+               VALUES (1, ?, 'available', 5000000, 7000000)""",
+            ((f"IMEI{i + 1:011d}",) for i in range(runs * items))
+        )
+    db_manager.close_connection()
+    
+    results = []
+    for variant in ('per-statement', 'transaction'):
+        db_manager = copy_store(base, os.path.join(directory, f'checkout_{variant}.db'))
+        db_manager.connect()
+        times = []
+        for run in range(runs):
+            inventory_ids = range(run * items + 1, run * items + items + 1)
+            started = time.perf_counter()
+            if variant == 'transaction':
+                with db_manager.transaction():
+                    _checkout(db_manager, run, inventory_ids)
+            else:
+                _checkout(db_manager, run, inventory_ids)
+            times.append(time.perf_counter() - started)
+        db_manager.close_connection()
+        results.append((variant,) + timing_summary(times))
+    return results
+
+def run_checkout(directory, sales=100000, runs=200):
+    """Run the checkout benchmark and format its results"""
+    lines = [f"Checkout of 5 phones, {runs} runs, {sales:,} sales in history"]
+    for variant, median, p95 in benchmark_checkout(directory, sales, runs):
+        lines.append(f"  {variant:<15} median {median:7.2f} ms   p95 {p95:7.2f} ms")
+    return "\n".join(lines)
+
+# (name, DATE() query, day key query, dates); the day key query gets the dates as day keys
+DAY_KEY_QUERIES = [
+    ("today's income",
+     "SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE transaction_type = 'income' AND DATE(transaction_date) = ?",
+     "SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE transaction_type = 'income' AND transaction_day = ?",
+     ('2024-03-03',)),
+    ("month income",
+     """SELECT COALESCE(SUM(amount), 0) FROM transactions
+        WHERE transaction_type = 'income' AND DATE(transaction_date) BETWEEN ? AND ?""",
+     """SELECT COALESCE(SUM(amount), 0) FROM transactions
+        WHERE transaction_type = 'income' AND transaction_day BETWEEN ? AND ?""",
+     ('2024-03-01', '2024-03-31')),
+    ("one-week filter list",
+     """SELECT t.*, s.full_name FROM transactions t LEFT JOIN staff s ON t.staff_id = s.id
+        WHERE DATE(t.transaction_date) BETWEEN ? AND ? ORDER BY t.transaction_date DESC""",
+     """SELECT t.*, s.full_name FROM transactions t LEFT JOIN staff s ON t.staff_id = s.id
+        WHERE t.transaction_day BETWEEN ? AND ? ORDER BY t.transaction_date DESC""",
+     ('2024-03-01', '2024-03-07')),
+    ("daily cash flow",
+     """SELECT DATE(transaction_date) as date,
+               SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END) as income,
+               SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END) as expense
+        FROM transactions WHERE DATE(transaction_date) BETWEEN ? AND ?
+        GROUP BY DATE(transaction_date) ORDER BY date""",
+     """SELECT DATE(transaction_date) as date,
+               SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END) as income,
+               SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END) as expense
+        FROM transactions WHERE transaction_day BETWEEN ? AND ?
+        GROUP BY transaction_day ORDER BY transaction_day""",
+     ('2024-03-01', '2024-03-31')),
+]
+
+def median_of(func, repeats):
+    """Get the result of func() and its median duration in ms over repeats calls"""
+    result = func()
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return result, statistics.median(times) * 1000
+
+def benchmark_day_keys(directory, rows=1000000, repeats=5):
+    """
+    Time the financial tab date filters with DATE() and with day keys
+    
+    Both variants run on the same table; DATE() around the column keeps
+    SQLite from using the day key indexes, as before migration 3.
+    
+    Args:
+        directory: Folder for the benchmark database
+        rows: Transactions to seed, spread evenly over 2022-2025
+        repeats: Timed runs per query
+    
+    Returns:
+        list: (query, DATE() ms, day key ms, same results)
+    """
+    db_manager = create_store(os.path.join(directory, 'day_keys.db'))
+    generator = random.Random(1)
+    first_day = datetime(2022, 1, 1)
+    days = (datetime(2026, 1, 1) - first_day).days
+    
+    # Seeded in date order, as a store writes them; out-of-order rows would
+    # make the daily rollup triggers rewrite every later day's running totals
+    def transactions():
+        for index in range(rows):
+            moment = first_day + timedelta(days=index * days // rows, hours=8,
+                                           minutes=generator.randint(0, 12 * 60 - 1))
+            yield (generator.choice(['income', 'expense']), generator.randint(1, 100) * 10000,
+                   "Giao dịch", moment.strftime('%Y-%m-%d %H:%M:%S'))
+    
+    with db_manager.transaction():
+        db_manager.connection.executemany(
+            """INSERT INTO transactions (transaction_type, amount, description, transaction_date, staff_id)
+               VALUES (?, ?, ?, ?, 1)""",
+            transactions()
+        )
+    db_manager.execute_query("ANALYZE")
+    
+    results = []
+    for name, date_query, day_query, dates in DAY_KEY_QUERIES:
+        days = [db_manager.day_key(value) for value in dates]
+        before, before_ms = median_of(lambda: db_manager.fetch_all(date_query, dates), repeats)
+        after, after_ms = median_of(lambda: db_manager.fetch_all(day_query, days), repeats)
+        same = sorted(tuple(row) for row in before) == sorted(tuple(row) for row in after)
+        results.append((name, before_ms, after_ms, same))
+    db_manager.close_connection()
+    return results
+
+def run_day_keys(directory, rows=1000000):
+    """Run the day key benchmark and format its results"""
+    lines = [f"Date filters on {rows:,} transactions, median of 5 runs",
+             f"  {'query':<22} {'DATE()':>10} {'day key':>10}  same"]
+    for name, before_ms, after_ms, same in benchmark_day_keys(directory, rows):
+        lines.append(f"  {name:<22} {before_ms:7.2f} ms {after_ms:7.2f} ms  {'yes' if same else 'NO'}")
+    return "\n".join(lines)
+
+AVAILABLE_UNITS_QUERY = """
+SELECT i.*, p.name, p.brand, p.model, p.selling_price
+FROM inventory i
+JOIN products p ON i.product_id = p.id
+WHERE i.status = 'available' AND p.is_active = 1
+ORDER BY p.name
+"""
+
+# The listing of SalesTab.refresh_available_products in each version
+STOCK_COUNT_QUERIES = [
+    ("grouped subquery", """
+SELECT i.*, p.name, p.brand, p.model, p.selling_price, stock.count as stock_count
+FROM inventory i
+JOIN products p ON i.product_id = p.id
+JOIN (SELECT product_id, COUNT(*) as count FROM inventory
+      WHERE status = 'available' GROUP BY product_id) stock ON stock.product_id = i.product_id
+WHERE i.status = 'available' AND p.is_active = 1
+ORDER BY p.name
+"""),
+    ("product_stock", """
+SELECT i.*, p.name, p.brand, p.model, p.selling_price, ps.available as stock_count
+FROM inventory i
+JOIN products p ON i.product_id = p.id
+JOIN product_stock ps ON ps.product_id = i.product_id
+WHERE i.status = 'available' AND p.is_active = 1
+ORDER BY p.name
+"""),
+]
+
+def benchmark_stock_count(directory, units, products=300, repeats=5):
+    """
+    Time the available products listing with its per-product stock count
+    
+    Args:
+        directory: Folder for the benchmark database
+        units: Available units to seed; as many sold units are added
+        products: Number of products the units belong to
+        repeats: Timed runs per variant
+    
+    Returns:
+        list: (variant, ms, queries issued)
+    """
+    db_manager = create_store(os.path.join(directory, f'stock_{units}.db'), products)
+    generator = random.Random(1)
+    with db_manager.transaction():
+        db_manager.connection.executemany(
+            """INSERT INTO inventory (product_id, imei, status, cost_price, selling_price)
+               VALUES (?, ?, ?, 5000000, 7000000)""",
+            ((generator.randint(1, products), f"IMEI{index:011d}", status)
+             for index, status in enumerate(['available', 'sold'] * units))
+        )
+    
+    # The original refresh: list the units, then count each unit's product
+    def per_unit():
+        rows = db_manager.fetch_all(AVAILABLE_UNITS_QUERY)
+        return [(row['id'], db_manager.fetch_one(
+            "SELECT COUNT(*) as count FROM inventory WHERE product_id = ? AND status = 'available'",
+            (row['product_id'],))['count']) for row in rows]
+    
+    expected, per_unit_ms = median_of(per_unit, repeats)
+    results = [("COUNT(*) per unit", per_unit_ms, len(expected) + 1)]
+    for variant, query in STOCK_COUNT_QUERIES:
+        rows, variant_ms = median_of(lambda: db_manager.fetch_all(query), repeats)
+        if sorted((row['id'], row['stock_count']) for row in rows) != sorted(expected):
+            raise AssertionError(f"{variant} stock counts differ from COUNT(*)")
+        results.append((variant, variant_ms, 1))
+    db_manager.close_connection()
+    return results
+
+def run_stock_count(directory, units=20000):
+    """Run the stock count benchmark at three stock sizes and format its results"""
+    lines = ["Available products refresh, 300 products, median of 5 runs"]
+    for size in (units // 20, units // 4, units):
+        lines.append(f"  {size:,} available units")
+        for variant, ms, queries in benchmark_stock_count(directory, size):
+            lines.append(f"    {variant:<20} {ms:8.1f} ms  {queries:>6,} queries")
+    return "\n".join(lines)
+
+BENCHMARKS = {
+    'checkout': run_checkout,
+    'day_keys': run_day_keys,
+    'stock_count': run_stock_count,
+}
+
+def main(argv=None):
+    """Command line entry point"""
+    argv = sys.argv[1:] if argv is None else argv
+    names = [arg for arg in argv if arg in BENCHMARKS] or list(BENCHMARKS)
+    
+    # Remaining arguments are --option N pairs passed to every benchmark that takes them
+    options = {}
+    args = [arg for arg in argv if arg not in BENCHMARKS]
+    for option, value in zip(args[::2], args[1::2]):
+        options[option.lstrip('-')] = int(value)
+    
+    with tempfile.TemporaryDirectory(prefix='chviet_benchmark_') as directory:
+        for name in names:
+            run = BENCHMARKS[name]
+            accepted = inspect.signature(run).parameters
+            print(run(directory, **{key: value for key, value in options.items() if key in accepted}))
+            print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,17 +5,44 @@ Excel utility functions for ChViet Mobile Store Management System
 """
 
 import csv
+import gzip
+import math
 import os
+import re
+import zipfile
 from datetime import datetime
+from itertools import islice
+from xml.sax.saxutils import escape, quoteattr
 
-def export_to_csv(data, filename, headers=None):
+# Rows handed to the csv writer at a time and size of the file buffer
+CHUNK_ROWS = 1000
+WRITE_BUFFER = 1 << 16
+
+def _as_dict(row):
+    """Get a dict view of a dict or sqlite3.Row"""
+    return row if isinstance(row, dict) else dict(row)
+
+def _money(value, numeric):
+    """Keep an amount as a number or format it as 1,234,567 text"""
+    return value if numeric else f"{value:,.0f}"
+
+def _report_filename(filename, compress):
+    """Add the .gz suffix to a report file name when compressing"""
+    return filename + '.gz' if compress and not filename.endswith('.gz') else filename
+
+def export_to_csv(data, filename, headers=None, compress=False):
     """
     Export data to CSV file
     
+    Rows are read from data one chunk at a time and written through a
+    buffered file, so memory use does not grow with the row count.
+    
     Args:
-        data: List of dictionaries or list of lists
+        data: Iterable of dictionaries, sqlite3.Row or lists, e.g. a list,
+              a generator or a database cursor
         filename: Output filename
         headers: Optional headers list
+        compress: Write gzip-compressed CSV; '.gz' is added to filename
     
     Returns:
         bool: True if successful, False otherwise
@@ -26,70 +53,303 @@ def export_to_csv(data, filename, headers=None):
         if not os.path.exists(reports_dir):
             os.makedirs(reports_dir)
         
-        filepath = os.path.join(reports_dir, filename)
+        filepath = os.path.join(reports_dir, _report_filename(filename, compress))
+        
+        rows = iter(data)
+        first = next(rows, None)
         
-        with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            if not data:
+        if compress:
+            csvfile = gzip.open(filepath, 'wt', newline='', encoding='utf-8-sig')
+        else:
+            csvfile = open(filepath, 'w', newline='', encoding='utf-8-sig', buffering=WRITE_BUFFER)
+        
+        with csvfile:
+            if first is None:
                 return True
             
-            if isinstance(data[0], dict):
-                # Data is list of dictionaries
-                fieldnames = headers or list(data[0].keys())
+            if isinstance(first, dict):
+                # Data is dictionaries
+                fieldnames = headers or list(first.keys())
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 writer.writeheader()
-                writer.writerows(data)
             else:
-                # Data is list of lists
+                # Data is lists or database rows
                 writer = csv.writer(csvfile)
+                if headers is None and hasattr(first, 'keys'):
+                    headers = first.keys()
                 if headers:
                     writer.writerow(headers)
-                writer.writerows(data)
+            
+            writer.writerow(first)
+            while True:
+                chunk = list(islice(rows, CHUNK_ROWS))
+                if not chunk:
+                    break
+                writer.writerows(chunk)
         
         return True
-        
+    
     except Exception as e:
         print(f"Lỗi xuất CSV: {e}")
         return False
 
-def format_sales_data_for_export(sales_data):
+# Shared strings kept for deduplication; later new strings are written inline
+SHARED_STRINGS_LIMIT = 100000
+
+# Characters XML 1.0 does not allow
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+# Cell styles defined in styles.xml: 1 = money (#,##0), 2 = bold header
+STYLE_MONEY = 1
+STYLE_HEADER = 2
+
+_XLSX_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+_STYLES_XML = (
+    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<styleSheet xmlns="{_XLSX_NS}">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="3" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+class XlsxWriter:
+    """Write .xlsx workbooks row by row using only zipfile
+    
+    Each sheet's XML is streamed into the archive as its rows are read, so
+    memory use does not grow with the row count. Repeated strings share one
+    entry in sharedStrings.xml until SHARED_STRINGS_LIMIT distinct strings
+    are stored; strings first seen after that are written inline. Numbers
+    stay numeric cells, and money columns get a #,##0 format.
+    
+    Usage:
+        with XlsxWriter(path) as workbook:
+            workbook.write_sheet("Bán hàng", rows, headers, money_columns=(4, 5))
+    """
+    
+    def __init__(self, filepath, shared_strings_limit=SHARED_STRINGS_LIMIT):
+        self.filepath = filepath
+        self.shared_strings_limit = shared_strings_limit
+        self.sheet_names = []
+        
+        self._zip = zipfile.ZipFile(filepath, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._strings = {}
+        self._string_refs = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @staticmethod
+    def _text(value):
+        """Build the <t> element of a string, keeping edge spaces"""
+        space = ' xml:space="preserve"' if value != value.strip() else ''
+        return f"<t{space}>{escape(_XML_INVALID.sub('', value))}</t>"
+    
+    def _string_cell(self, value, style=''):
+        """Build a string cell, shared when the table has room"""
+        self._string_refs += 1
+        index = self._strings.get(value)
+        if index is None and len(self._strings) < self.shared_strings_limit:
+            index = self._strings[value] = len(self._strings)
+        if index is not None:
+            return f'<c t="s"{style}><v>{index}</v></c>'
+        return f'<c t="inlineStr"{style}><is>{self._text(value)}</is></c>'
+    
+    def _row(self, values, money_columns=(), style=''):
+        """Build the XML of one row"""
+        cells = []
+        for column, value in enumerate(values):
+            if value is None or value == '':
+                cells.append('<c/>')
+            elif isinstance(value, bool):
+                cells.append(f'<c t="b"{style}><v>{int(value)}</v></c>')
+            elif isinstance(value, (int, float)) and math.isfinite(value):
+                number_style = f' s="{STYLE_MONEY}"' if column in money_columns else style
+                cells.append(f'<c{number_style}><v>{value!r}</v></c>')
+            else:
+                cells.append(self._string_cell(str(value), style))
+        return f"<row>{''.join(cells)}</row>"
+    
+    def write_sheet(self, name, rows, headers=None, money_columns=()):
+        """
+        Stream one worksheet into the workbook
+        
+        Args:
+            name: Sheet name, cut to Excel's 31 characters
+            rows: Iterable of lists or tuples, e.g. a generator
+            headers: Optional header row, shown in bold
+            money_columns: Indexes of columns whose numbers are money
+        
+        Returns:
+            int: Number of data rows written
+        """
+        name = re.sub(r'[\[\]:*?/\\]', ' ', name)[:31] or f"Sheet{len(self.sheet_names) + 1}"
+        self.sheet_names.append(name)
+        money_columns = set(money_columns)
+        count = 0
+        
+        path = f"xl/worksheets/sheet{len(self.sheet_names)}.xml"
+        with self._zip.open(path, 'w', force_zip64=True) as stream:
+            stream.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                         f'<worksheet xmlns="{_XLSX_NS}"><sheetData>'.encode('utf-8'))
+            if headers:
+                stream.write(self._row(headers, style=f' s="{STYLE_HEADER}"').encode('utf-8'))
+            
+            rows = iter(rows)
+            while True:
+                chunk = [self._row(values, money_columns) for values in islice(rows, CHUNK_ROWS)]
+                if not chunk:
+                    break
+                stream.write(''.join(chunk).encode('utf-8'))
+                count += len(chunk)
+            
+            stream.write(b'</sheetData></worksheet>')
+        return count
+    
+    def close(self):
+        """Write the workbook parts that list the sheets and finish the file"""
+        if self._zip is None:
+            return
+        
+        sheets = range(1, len(self.sheet_names) + 1)
+        self._zip.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for i in sheets)
+            + '</Types>'
+        ))
+        self._zip.writestr('_rels/.rels', (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{_PKG_REL_NS}">'
+            '<Relationship Id="rId1" Target="xl/workbook.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr('xl/workbook.xml', (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{_XLSX_NS}" xmlns:r="{_REL_NS}"><sheets>'
+            + ''.join(f'<sheet name={quoteattr(name)} sheetId="{i}" r:id="rId{i}"/>'
+                      for i, name in zip(sheets, self.sheet_names))
+            + '</sheets></workbook>'
+        ))
+        rel_type = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+        self._zip.writestr('xl/_rels/workbook.xml.rels', (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{_PKG_REL_NS}">'
+            + ''.join(f'<Relationship Id="rId{i}" Type="{rel_type}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                      for i in sheets)
+            + f'<Relationship Id="rId{len(self.sheet_names) + 1}" Type="{rel_type}/styles" Target="styles.xml"/>'
+            + f'<Relationship Id="rId{len(self.sheet_names) + 2}" Type="{rel_type}/sharedStrings" '
+              'Target="sharedStrings.xml"/>'
+            + '</Relationships>'
+        ))
+        self._zip.writestr('xl/styles.xml', _STYLES_XML)
+        
+        with self._zip.open('xl/sharedStrings.xml', 'w', force_zip64=True) as stream:
+            stream.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                         f'<sst xmlns="{_XLSX_NS}" count="{self._string_refs}" '
+                         f'uniqueCount="{len(self._strings)}">'.encode('utf-8'))
+            strings = iter(self._strings)
+            while True:
+                chunk = list(islice(strings, CHUNK_ROWS))
+                if not chunk:
+                    break
+                stream.write(''.join(f"<si>{self._text(value)}</si>" for value in chunk).encode('utf-8'))
+            stream.write(b'</sst>')
+        
+        self._zip.close()
+        self._zip = None
+
+def export_to_xlsx(sheets, filename):
+    """
+    Export one or more sheets to an XLSX workbook
+    
+    Args:
+        sheets: Iterable of (name, rows, headers, money_columns) tuples;
+                rows can be a list, a generator or a database cursor
+        filename: Output filename
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        # Ensure reports directory exists
+        reports_dir = "reports"
+        if not os.path.exists(reports_dir):
+            os.makedirs(reports_dir)
+        
+        with XlsxWriter(os.path.join(reports_dir, filename)) as workbook:
+            for name, rows, headers, money_columns in sheets:
+                workbook.write_sheet(name, rows, headers, money_columns)
+        
+        return True
+    
+    except Exception as e:
+        print(f"Lỗi xuất Excel: {e}")
+        return False
+
+def format_sales_data_for_export(sales_data, numeric=False):
     """
-    Format sales data for CSV export
+    Format sales data for export, one row at a time
     
     Args:
         sales_data: Raw sales data from database
+        numeric: Keep money as numbers (for XLSX) instead of 1,234,567 text
     
     Returns:
-        tuple: (formatted_data, headers)
+        tuple: (generator of formatted rows, headers)
     """
     headers = [
         'Số HĐ', 'Ngày', 'Khách hàng', 'Nhân viên',
         'Tổng tiền', 'Đã thanh toán', 'Hình thức TT', 'Trạng thái'
     ]
     
-    formatted_data = []
-    for sale in sales_data:
-        formatted_data.append([
-            sale.get('invoice_number', ''),
-            sale.get('sale_date', ''),
-            sale.get('customer_name', 'Khách lẻ'),
-            sale.get('staff_name', ''),
-            f"{sale.get('total_amount', 0):,.0f}",
-            f"{sale.get('paid_amount', 0):,.0f}",
-            sale.get('payment_method', ''),
-            sale.get('payment_status', '')
-        ])
-    
-    return formatted_data, headers
+    def formatted_rows():
+        for row in sales_data:
+            sale = _as_dict(row)
+            yield [
+                sale.get('invoice_number', ''),
+                sale.get('sale_date', ''),
+                sale.get('customer_name', 'Khách lẻ'),
+                sale.get('staff_name', ''),
+                _money(sale.get('total_amount', 0), numeric),
+                _money(sale.get('paid_amount', 0), numeric),
+                sale.get('payment_method', ''),
+                sale.get('payment_status', '')
+            ]
+    
+    return formatted_rows(), headers
 
-def format_inventory_data_for_export(inventory_data):
+def format_inventory_data_for_export(inventory_data, numeric=False):
     """
-    Format inventory data for CSV export
+    Format inventory data for export, one row at a time
     
     Args:
         inventory_data: Raw inventory data from database
+        numeric: Keep money as numbers (for XLSX) instead of 1,234,567 text
     
     Returns:
-        tuple: (formatted_data, headers)
+        tuple: (generator of formatted rows, headers)
     """
     headers = [
         'Sản phẩm', 'Thương hiệu', 'Mẫu mã', 'IMEI',
@@ -97,89 +357,96 @@ def format_inventory_data_for_export(inventory_data):
         'Giá bán', 'Vị trí'
     ]
     
-    formatted_data = []
-    for item in inventory_data:
-        formatted_data.append([
-            item.get('product_name', ''),
-            item.get('brand', ''),
-            item.get('model', ''),
-            item.get('imei', ''),
-            item.get('serial_number', ''),
-            item.get('condition', ''),
-            item.get('status', ''),
-            f"{item.get('cost_price', 0):,.0f}",
-            f"{item.get('selling_price', 0):,.0f}",
-            item.get('location', '')
-        ])
-    
-    return formatted_data, headers
+    def formatted_rows():
+        for row in inventory_data:
+            item = _as_dict(row)
+            yield [
+                item.get('product_name', ''),
+                item.get('brand', ''),
+                item.get('model', ''),
+                item.get('imei', ''),
+                item.get('serial_number', ''),
+                item.get('condition', ''),
+                item.get('status', ''),
+                _money(item.get('cost_price', 0), numeric),
+                _money(item.get('selling_price', 0), numeric),
+                item.get('location', '')
+            ]
+    
+    return formatted_rows(), headers
 
-def format_financial_data_for_export(financial_data):
+def format_financial_data_for_export(financial_data, numeric=False):
     """
-    Format financial data for CSV export
+    Format financial data for export, one row at a time
     
     Args:
         financial_data: Raw financial data from database
+        numeric: Keep money as numbers (for XLSX) instead of 1,234,567 text
     
     Returns:
-        tuple: (formatted_data, headers)
+        tuple: (generator of formatted rows, headers)
     """
     headers = [
         'Ngày', 'Loại', 'Số tiền', 'Mô tả',
         'Hình thức TT', 'Tham chiếu', 'Nhân viên'
     ]
     
-    formatted_data = []
-    for transaction in financial_data:
-        formatted_data.append([
-            transaction.get('transaction_date', ''),
-            'Thu' if transaction.get('transaction_type') == 'income' else 'Chi',
-            f"{transaction.get('amount', 0):,.0f}",
-            transaction.get('description', ''),
-            transaction.get('payment_method', ''),
-            transaction.get('reference_type', ''),
-            transaction.get('staff_name', '')
-        ])
-    
-    return formatted_data, headers
+    def formatted_rows():
+        for row in financial_data:
+            transaction = _as_dict(row)
+            yield [
+                transaction.get('transaction_date', ''),
+                'Thu' if transaction.get('transaction_type') == 'income' else 'Chi',
+                _money(transaction.get('amount', 0), numeric),
+                transaction.get('description', ''),
+                transaction.get('payment_method', ''),
+                transaction.get('reference_type', ''),
+                transaction.get('staff_name', '')
+            ]
+    
+    return formatted_rows(), headers
 
-def format_customer_data_for_export(customer_data):
+def format_customer_data_for_export(customer_data, numeric=False):
     """
-    Format customer data for CSV export
+    Format customer data for export, one row at a time
     
     Args:
         customer_data: Raw customer data from database
+        numeric: Keep money as numbers (for XLSX) instead of 1,234,567 text
     
     Returns:
-        tuple: (formatted_data, headers)
+        tuple: (generator of formatted rows, headers)
     """
     headers = [
         'Tên khách hàng', 'Điện thoại', 'Email', 'Địa chỉ',
         'CMND/CCCD', 'Ngày sinh', 'Tổng mua hàng', 'Công nợ'
     ]
     
-    formatted_data = []
-    for customer in customer_data:
-        formatted_data.append([
-            customer.get('name', ''),
-            customer.get('phone', ''),
-            customer.get('email', ''),
-            customer.get('address', ''),
-            customer.get('id_number', ''),
-            customer.get('birth_date', ''),
-            f"{customer.get('total_purchases', 0):,.0f}",
-            f"{customer.get('debt', 0):,.0f}"
-        ])
-    
-    return formatted_data, headers
+    def formatted_rows():
+        for row in customer_data:
+            customer = _as_dict(row)
+            yield [
+                customer.get('name', ''),
+                customer.get('phone', ''),
+                customer.get('email', ''),
+                customer.get('address', ''),
+                customer.get('id_number', ''),
+                customer.get('birth_date', ''),
+                _money(customer.get('total_purchases', 0), numeric),
+                _money(customer.get('debt', 0), numeric)
+            ]
+    
+    return formatted_rows(), headers
 
-def export_sales_report(sales_data, filename=None):
+def export_sales_report(sales_data, filename=None, compress=False, file_format='csv'):
     """
-    Export sales report to CSV
+    Export sales report to CSV or XLSX
     
     Args:
-        sales_data: Sales data to export
+        sales_data: Sales rows to export, e.g. a list or a database cursor
         filename: Optional filename, auto-generated if not provided
+        compress: Write gzip-compressed CSV
+        file_format: 'csv' or 'xlsx'
     
     Returns:
         str: Filepath if successful, None if failed
@@ -187,26 +454,34 @@ def export_sales_report(sales_data, filename=None):
     try:
         if not filename:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"bao_cao_ban_hang_{timestamp}.csv"
+            filename = f"bao_cao_ban_hang_{timestamp}.{file_format}"
+        
+        if file_format == 'xlsx':
+            formatted_data, headers = format_sales_data_for_export(sales_data, numeric=True)
+            if export_to_xlsx([("Bán hàng", formatted_data, headers, (4, 5))], filename):
+                return os.path.join("reports", filename)
+            return None
         
         formatted_data, headers = format_sales_data_for_export(sales_data)
         
-        if export_to_csv(formatted_data, filename, headers):
-            return os.path.join("reports", filename)
+        if export_to_csv(formatted_data, filename, headers, compress):
+            return os.path.join("reports", _report_filename(filename, compress))
         else:
             return None
-            
+    
     except Exception as e:
         print(f"Lỗi xuất báo cáo bán hàng: {e}")
         return None
 
-def export_inventory_report(inventory_data, filename=None):
+def export_inventory_report(inventory_data, filename=None, compress=False, file_format='csv'):
     """
-    Export inventory report to CSV
+    Export inventory report to CSV or XLSX
     
     Args:
-        inventory_data: Inventory data to export
+        inventory_data: Inventory rows to export, e.g. a list or a database cursor
         filename: Optional filename, auto-generated if not provided
+        compress: Write gzip-compressed CSV
+        file_format: 'csv' or 'xlsx'
     
     Returns:
         str: Filepath if successful, None if failed
@@ -214,26 +489,34 @@ def export_inventory_report(inventory_data, filename=None):
     try:
         if not filename:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"bao_cao_kho_hang_{timestamp}.csv"
+            filename = f"bao_cao_kho_hang_{timestamp}.{file_format}"
+        
+        if file_format == 'xlsx':
+            formatted_data, headers = format_inventory_data_for_export(inventory_data, numeric=True)
+            if export_to_xlsx([("Kho hàng", formatted_data, headers, (7, 8))], filename):
+                return os.path.join("reports", filename)
+            return None
         
         formatted_data, headers = format_inventory_data_for_export(inventory_data)
         
-        if export_to_csv(formatted_data, filename, headers):
-            return os.path.join("reports", filename)
+        if export_to_csv(formatted_data, filename, headers, compress):
+            return os.path.join("reports", _report_filename(filename, compress))
         else:
             return None
-            
+    
     except Exception as e:
         print(f"Lỗi xuất báo cáo kho hàng: {e}")
         return None
 
-def export_financial_report(financial_data, filename=None):
+def export_financial_report(financial_data, filename=None, compress=False, file_format='csv'):
     """
-    Export financial report to CSV
+    Export financial report to CSV or XLSX
     
     Args:
-        financial_data: Financial data to export
+        financial_data: Financial rows to export, e.g. a list or a database cursor
         filename: Optional filename, auto-generated if not provided
+        compress: Write gzip-compressed CSV
+        file_format: 'csv' or 'xlsx'
     
     Returns:
         str: Filepath if successful, None if failed
@@ -241,26 +524,34 @@ def export_financial_report(financial_data, filename=None):
     try:
         if not filename:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"bao_cao_tai_chinh_{timestamp}.csv"
+            filename = f"bao_cao_tai_chinh_{timestamp}.{file_format}"
+        
+        if file_format == 'xlsx':
+            formatted_data, headers = format_financial_data_for_export(financial_data, numeric=True)
+            if export_to_xlsx([("Tài chính", formatted_data, headers, (2,))], filename):
+                return os.path.join("reports", filename)
+            return None
         
         formatted_data, headers = format_financial_data_for_export(financial_data)
         
-        if export_to_csv(formatted_data, filename, headers):
-            return os.path.join("reports", filename)
+        if export_to_csv(formatted_data, filename, headers, compress):
+            return os.path.join("reports", _report_filename(filename, compress))
         else:
             return None
-            
+    
     except Exception as e:
         print(f"Lỗi xuất báo cáo tài chính: {e}")
         return None
 
-def export_customer_report(customer_data, filename=None):
+def export_customer_report(customer_data, filename=None, compress=False, file_format='csv'):
     """
-    Export customer report to CSV
+    Export customer report to CSV or XLSX
     
     Args:
-        customer_data: Customer data to export
+        customer_data: Customer rows to export, e.g. a list or a database cursor
         filename: Optional filename, auto-generated if not provided
+        compress: Write gzip-compressed CSV
+        file_format: 'csv' or 'xlsx'
     
     Returns:
         str: Filepath if successful, None if failed
@@ -268,15 +559,21 @@ def export_customer_report(customer_data, filename=None):
     try:
         if not filename:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"bao_cao_khach_hang_{timestamp}.csv"
+            filename = f"bao_cao_khach_hang_{timestamp}.{file_format}"
+        
+        if file_format == 'xlsx':
+            formatted_data, headers = format_customer_data_for_export(customer_data, numeric=True)
+            if export_to_xlsx([("Khách hàng", formatted_data, headers, (6, 7))], filename):
+                return os.path.join("reports", filename)
+            return None
         
         formatted_data, headers = format_customer_data_for_export(customer_data)
         
-        if export_to_csv(formatted_data, filename, headers):
-            return os.path.join("reports", filename)
+        if export_to_csv(formatted_data, filename, headers, compress):
+            return os.path.join("reports", _report_filename(filename, compress))
         else:
             return None
-            
+    
     except Exception as e:
         print(f"Lỗi xuất báo cáo khách hàng: {e}")
         return None
@@ -300,7 +597,7 @@ def create_backup_csv(table_name, data):
             return os.path.join("reports", filename)
         else:
             return None
-            
+    
     except Exception as e:
         print(f"Lỗi tạo backup CSV: {e}")
         return None
\ No newline at end of file
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index advisor for ChViet Mobile Store Management System
+
+Replays the statements recorded by DatabaseManager.enable_query_log() through
+EXPLAIN QUERY PLAN and reports full table scans and temporary sort trees.
+
+Usage:
+    python main.py --log-queries          # use the app, log is saved on exit
+    python -m utils.index_advisor [database] [query_log.json]
+"""
+
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from config import APP_CONFIG, DATABASE_CONFIG
+
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+def load_query_log(path=None):
+    """
+    Load statements saved by DatabaseManager.save_query_log()
+    
+    Args:
+        path: JSON file path, defaults to DATABASE_CONFIG['QUERY_LOG_FILE']
+    
+    Returns:
+        list: Entries with query, count, total_ms and sample params
+    """
+    path = path or DATABASE_CONFIG['QUERY_LOG_FILE']
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def explain_query(db_manager, query, params=None):
+    """
+    Get the EXPLAIN QUERY PLAN detail lines of a statement
+    
+    Args:
+        db_manager: DatabaseManager instance
+        query: SQL statement
+        params: Sample parameters; missing ones are bound as NULL
+    
+    Returns:
+        list: Plan detail strings
+    """
+    params = list(params or [])
+    placeholders = query.count('?')
+    if len(params) != placeholders:
+        params = (params + [None] * placeholders)[:placeholders]
+    
+    cursor = db_manager.connection.execute(f"EXPLAIN QUERY PLAN {query}", params)
+    return [row['detail'] for row in cursor.fetchall()]
+
+def analyze_queries(db_manager, entries):
+    """
+    Find recorded statements whose plans scan tables or build temp B-trees
+    
+    Args:
+        db_manager: Connected DatabaseManager instance
+        entries: Query log entries
+    
+    Returns:
+        list: Findings sorted by total time spent, slowest first
+    """
+    findings = []
+    for entry in entries:
+        query = entry['query']
+        if not query.lstrip().upper().startswith(EXPLAINABLE):
+            continue
+        
+        try:
+            plan = explain_query(db_manager, query, entry.get('params'))
+        except Exception as e:
+            findings.append({**entry, 'scans': [], 'temp_btrees': [], 'error': str(e)})
+            continue
+        
+        scans = [line for line in plan
+                 if line.startswith('SCAN ') and 'CONSTANT ROW' not in line]
+        temp_btrees = [line for line in plan if 'USE TEMP B-TREE' in line]
+        
+        if scans or temp_btrees:
+            findings.append({**entry, 'scans': scans, 'temp_btrees': temp_btrees})
+    
+    findings.sort(key=lambda finding: finding.get('total_ms', 0), reverse=True)
+    return findings
+
+def format_advisor_report(findings):
+    """
+    Format advisor findings as plain text
+    
+    Args:
+        findings: Result of analyze_queries()
+    
+    Returns:
+        str: Report text
+    """
+    if not findings:
+        return "No table scans or temp B-trees in the recorded workload."
+    
+    lines = [f"{len(findings)} statement(s) need attention:", ""]
+    for finding in findings:
+        lines.append(f"[{finding.get('count', 0)}x, {finding.get('total_ms', 0):.1f} ms] {finding['query']}")
+        if finding.get('error'):
+            lines.append(f"    ERROR {finding['error']}")
+        for line in finding['scans']:
+            covering = ' (covering index)' if 'COVERING INDEX' in line else ''
+            lines.append(f"    {line}{covering}")
+        for line in finding['temp_btrees']:
+            lines.append(f"    {line}")
+        lines.append("")
+    
+    return "\n".join(lines)
+
+def main(argv=None):
+    """Command line entry point"""
+    argv = sys.argv[1:] if argv is None else argv
+    db_path = argv[0] if len(argv) > 0 else APP_CONFIG['DATABASE_NAME']
+    log_path = argv[1] if len(argv) > 1 else None
+    
+    try:
+        entries = load_query_log(log_path)
+    except FileNotFoundError:
+        print("No query log found. Run 'python main.py --log-queries' first.")
+        return 1
+    
+    db_manager = DatabaseManager(db_path)
+    db_manager.connect()
+    try:
+        print(format_advisor_report(analyze_queries(db_manager, entries)))
+    finally:
+        db_manager.close_connection()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lookup table cache for ChViet Mobile Store Management System
+"""
+
+import threading
+
+class LookupCache:
+    """Categories, active staff and customers as used by the tab comboboxes
+    
+    The main window loads every table on a worker thread while the login
+    dialog is open, so the first dialogs fill their comboboxes without a
+    query. Code that writes one of these tables calls invalidate(), and the
+    next get() reads it again.
+    """
+    
+    QUERIES = {
+        'categories': "SELECT id, name FROM categories ORDER BY name",
+        'staff': "SELECT id, full_name, username FROM staff WHERE is_active = 1 ORDER BY full_name",
+        'customers': "SELECT id, name, phone FROM customers ORDER BY name",
+    }
+    
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._versions = dict((table, 0) for table in self.QUERIES)
+    
+    @classmethod
+    def for_manager(cls, db_manager):
+        """Get the cache shared by every tab using db_manager"""
+        cache = getattr(db_manager, 'lookup_cache', None)
+        if cache is None:
+            cache = cls(db_manager)
+            db_manager.lookup_cache = cache
+        return cache
+    
+    def load(self):
+        """Read every table, safe to run on a worker thread"""
+        for table in self.QUERIES:
+            self.get(table)
+    
+    def get(self, table):
+        """
+        Get the rows of a lookup table, reading it if not cached
+        
+        Args:
+            table: 'categories', 'staff' or 'customers'
+        
+        Returns:
+            list: Rows in display order
+        """
+        with self._lock:
+            rows = self._tables.get(table)
+            version = self._versions[table]
+        if rows is not None:
+            return rows
+        
+        rows = self.db_manager.fetch_all(self.QUERIES[table])
+        
+        # Keep the rows unless the table was written while they were read
+        with self._lock:
+            if self._versions[table] == version:
+                self._tables[table] = rows
+        return rows
+    
+    def invalidate(self, table):
+        """Forget a table after it was written"""
+        with self._lock:
+            self._tables.pop(table, None)
+            self._versions[table] += 1
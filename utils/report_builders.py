@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Report builders for ChViet Mobile Store Management System
+
+Each builder runs a report's queries and returns a ReportResult; the
+report engine caches it and the renderers in utils.report_engine turn
+it into text, files and workbooks.
+"""
+
+from datetime import datetime, timedelta
+
+from config import BUSINESS_RULES
+from utils.analytics_snapshot import AnalyticsSnapshot
+from utils.report_engine import ReportResult, ReportSection, ReportTable
+from utils.rollup_utils import get_rollup_totals, get_daily_rollup, get_payment_method_totals, get_sales_cube
+from utils.staff_performance import get_staff_performance, format_on_time_ratio
+
+PAYMENT_METHOD_NAMES = {
+    'cash': 'Tiền mặt',
+    'card': 'Thẻ',
+    'transfer': 'Chuyển khoản',
+    'mixed': 'Hỗn hợp'
+}
+
+REVENUE_SOURCE_NAMES = {
+    'sale': 'Bán hàng',
+    'repair': 'Sửa chữa',
+    'pawn_interest': 'Lãi cầm đồ',
+    'other': 'Khác'
+}
+
+def _date_range(from_date, to_date):
+    """Get the subtitle line of a date range report"""
+    return [f"Từ ngày: {from_date} đến ngày: {to_date}"]
+
+def _day_range(db_manager, from_date, to_date):
+    """Convert a from/to date filter to day key parameters"""
+    return (db_manager.day_key(from_date), db_manager.day_key(to_date))
+
+def _previous_period(from_date, to_date):
+    """Get the (from, to) dates of the period of the same length just before a date range"""
+    try:
+        start = datetime.strptime(str(from_date).strip()[:10], '%Y-%m-%d').date()
+        end = datetime.strptime(str(to_date).strip()[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None, None
+    return start - (end - start) - timedelta(days=1), start - timedelta(days=1)
+
+def _growth(growth):
+    """Format a growth ratio from AnalyticsSnapshot.compare_periods"""
+    return f"{growth * 100:+.1f}%" if growth is not None else "N/A"
+
+def _product_display(name, brand, name_length, brand_length):
+    """Get 'name (brand)' as shown in the product tables"""
+    display = name[:name_length]
+    if brand:
+        display += f" ({brand[:brand_length]})"
+    return display
+
+def build_sales_summary_report(db_manager, from_date, to_date):
+    """Build the sales summary report"""
+    # Get sales data from the daily rollup
+    totals = get_rollup_totals(db_manager, from_date, to_date)
+    orders, revenue, paid = totals['sale_count'], totals['revenue'], totals['paid']
+    avg_order = revenue / orders if orders else 0
+    
+    overview = ReportSection("1. TỔNG QUAN:", [
+        f"   - Tổng số đơn hàng: {orders:,}",
+        f"   - Tổng doanh thu: {revenue:,.0f} VNĐ",
+        f"   - Đã thu được: {paid:,.0f} VNĐ",
+        f"   - Giá trị đơn hàng trung bình: {avg_order:,.0f} VNĐ",
+        f"   - Tỷ lệ thu tiền: {(paid / revenue * 100 if revenue > 0 else 0):.1f}%",
+    ])
+    
+    payments = ReportSection("2. PHÂN TÍCH THEO HÌNH THỨC THANH TOÁN:", [
+        f"   - {PAYMENT_METHOD_NAMES.get(method['payment_method'], method['payment_method'])}: "
+        f"{method['count']:,} đơn ({method['amount']:,.0f} VNĐ)"
+        for method in get_payment_method_totals(db_manager, from_date, to_date)
+    ])
+    
+    top_products = get_sales_cube(db_manager, ['product_id', 'product_name'], from_date, to_date, limit=10)
+    products = ReportSection("3. TOP 10 SẢN PHẨM BÁN CHẠY:", table=ReportTable(
+        ["#", "Sản phẩm", "SL bán", "Doanh thu"],
+        [[i, product['product_name'], product['item_count'], product['revenue']]
+         for i, product in enumerate(top_products, 1)],
+        [4, 40, 10, 15], money_columns=(3,)
+    ))
+    
+    sections = [overview, payments, products]
+    
+    # Calculate daily average
+    try:
+        start_date = datetime.strptime(from_date, '%Y-%m-%d').date()
+        end_date = datetime.strptime(to_date, '%Y-%m-%d').date()
+        days = (end_date - start_date).days + 1
+        if days > 0:
+            sections.append(ReportSection("4. HIỆU SUẤT:", [
+                f"   - Số ngày báo cáo: {days} ngày",
+                f"   - Doanh thu trung bình/ngày: {revenue / days:,.0f} VNĐ",
+                f"   - Số đơn hàng trung bình/ngày: {orders / days:.1f} đơn",
+            ]))
+    except ValueError:
+        pass
+    
+    return ReportResult('sales_summary', "BÁO CÁO TỔNG HỢP BÁN HÀNG", {'from_date': from_date, 'to_date': to_date},
+                        sections, _date_range(from_date, to_date))
+
+def build_daily_sales_report(db_manager, from_date, to_date):
+    """Build the daily sales report"""
+    days = [day for day in get_daily_rollup(db_manager, from_date, to_date) if day['sale_count'] > 0]
+    
+    rows = [[day['date'], day['sale_count'], day['revenue'], day['revenue'] / day['sale_count']] for day in days]
+    totals = ["TỔNG CỘNG", sum(day['sale_count'] for day in days), sum(day['revenue'] for day in days), ""]
+    
+    table = ReportTable(["Ngày", "Số đơn", "Doanh thu", "ĐH trung bình"], rows, [12, 10, 15, 15],
+                        money_columns=(2, 3), totals=totals)
+    return ReportResult('sales_daily', "BÁO CÁO BÁN HÀNG THEO NGÀY", {'from_date': from_date, 'to_date': to_date},
+                        [ReportSection(table=table)], _date_range(from_date, to_date))
+
+def build_monthly_sales_report(db_manager, from_date, to_date):
+    """Build the monthly sales report"""
+    # Sum the daily rollup rows of each month
+    months = {}
+    for day in get_daily_rollup(db_manager, from_date, to_date):
+        if day['sale_count'] > 0:
+            totals = months.setdefault(day['date'][:7], [0, 0, 0])
+            totals[0] += day['sale_count']
+            totals[1] += day['revenue']
+            totals[2] += day['paid']
+    
+    rows = [[f"{month[5:]}/{month[:4]}", orders, revenue, paid, revenue / orders]
+            for month, (orders, revenue, paid) in months.items()]
+    totals = ["TỔNG CỘNG", sum(row[1] for row in rows), sum(row[2] for row in rows), sum(row[3] for row in rows), ""]
+    
+    table = ReportTable(["Tháng", "Số đơn", "Doanh thu", "Đã thu", "ĐH trung bình"], rows, [10, 10, 15, 15, 15],
+                        money_columns=(2, 3, 4), totals=totals)
+    return ReportResult('sales_monthly', "BÁO CÁO BÁN HÀNG THEO THÁNG", {'from_date': from_date, 'to_date': to_date},
+                        [ReportSection(table=table)], _date_range(from_date, to_date))
+
+def build_product_sales_report(db_manager, from_date, to_date):
+    """Build the sales by product report"""
+    # Get product sales data from the sales cube
+    product_sales = get_sales_cube(db_manager, ['product_id', 'product_name', 'brand', 'category'],
+                                   from_date, to_date)
+    
+    rows = [[_product_display(product['product_name'], product['brand'], 25, 10),
+             product['category'] or 'N/A', product['item_count'], product['revenue']]
+            for product in product_sales]
+    
+    table = ReportTable(["Sản phẩm", "Danh mục", "SL bán", "Doanh thu"], rows, [40, 15, 10, 15],
+                        money_columns=(3,))
+    return ReportResult('sales_by_product', "BÁO CÁO BÁN HÀNG THEO SẢN PHẨM",
+                        {'from_date': from_date, 'to_date': to_date},
+                        [ReportSection(table=table)], _date_range(from_date, to_date))
+
+def build_staff_sales_report(db_manager, from_date, to_date):
+    """Build the sales by staff report"""
+    # Include inactive staff who sold in the period
+    staff_sales = [staff for staff in get_staff_performance(db_manager, from_date, to_date, active_only=False)
+                   if staff['sales_count']]
+    
+    rows = [[staff['full_name'], staff['sales_count'], staff['sales_revenue'], staff['avg_order'], staff['commission']]
+            for staff in staff_sales]
+    
+    table = ReportTable(["Nhân viên", "Số đơn", "Doanh thu", "ĐH trung bình", "Hoa hồng"], rows,
+                        [25, 10, 15, 15, 15], money_columns=(2, 3, 4))
+    return ReportResult('sales_by_staff', "BÁO CÁO BÁN HÀNG THEO NHÂN VIÊN",
+                        {'from_date': from_date, 'to_date': to_date},
+                        [ReportSection(table=table)], _date_range(from_date, to_date))
+
+def build_customer_sales_report(db_manager, from_date, to_date):
+    """Build the sales by customer report"""
+    # Sales without a customer are grouped as walk-in customers
+    customer_sales = db_manager.fetch_all(
+        """SELECT c.name, c.phone,
+                  COUNT(s.id) as orders,
+                  SUM(s.total_amount) as revenue,
+                  SUM(s.paid_amount) as paid
+           FROM sales s
+           LEFT JOIN customers c ON s.customer_id = c.id
+           WHERE s.sale_day BETWEEN ? AND ?
+           GROUP BY s.customer_id
+           ORDER BY revenue DESC""",
+        _day_range(db_manager, from_date, to_date)
+    )
+    
+    rows = [[customer['name'] or 'Khách lẻ', customer['phone'] or 'N/A', customer['orders'],
+             customer['revenue'] or 0, (customer['revenue'] or 0) - (customer['paid'] or 0)]
+            for customer in customer_sales]
+    totals = ["TỔNG CỘNG", "", sum(row[2] for row in rows), sum(row[3] for row in rows), sum(row[4] for row in rows)]
+    
+    table = ReportTable(["Khách hàng", "Điện thoại", "Số đơn", "Doanh thu", "Còn nợ"], rows, [25, 15, 10, 15, 15],
+                        money_columns=(3, 4), totals=totals)
+    return ReportResult('sales_by_customer', "BÁO CÁO BÁN HÀNG THEO KHÁCH HÀNG",
+                        {'from_date': from_date, 'to_date': to_date},
+                        [ReportSection(table=table)], _date_range(from_date, to_date))
+
+def build_current_stock_report(db_manager):
+    """Build the current stock report"""
+    stock_data = db_manager.fetch_all(
+        """SELECT p.name, p.brand, c.name as category,
+                  COALESCE(ps.on_hand + ps.sold, 0) as total_stock,
+                  COALESCE(ps.available, 0) as available_stock,
+                  COALESCE(ps.available_cost, 0) as total_cost,
+                  COALESCE(ps.available_value, 0) as total_value
+           FROM products p
+           LEFT JOIN product_stock ps ON p.id = ps.product_id
+           LEFT JOIN categories c ON p.category_id = c.id
+           WHERE p.is_active = 1
+           ORDER BY available_stock DESC"""
+    )
+    
+    rows = [[_product_display(item['name'], item['brand'], 25, 8), item['category'] or 'N/A', item['total_stock'] or 0,
+             item['available_stock'] or 0, item['total_value'] or 0]
+            for item in stock_data]
+    total_items = sum(item['available_stock'] or 0 for item in stock_data)
+    total_cost = sum(item['total_cost'] or 0 for item in stock_data)
+    total_value = sum(item['total_value'] or 0 for item in stock_data)
+    
+    table = ReportTable(["Sản phẩm", "Danh mục", "Tồn kho", "Có sẵn", "Giá trị"], rows, [36, 15, 10, 10, 15],
+                        money_columns=(4,), totals=["TỔNG CỘNG", "", "", total_items, total_value])
+    section = ReportSection(table=table, notes=[
+        f"Giá vốn: {total_cost:,.0f} VNĐ - Giá trị: {total_value:,.0f} VNĐ",
+        f"Lợi nhuận tiềm năng: {total_value - total_cost:,.0f} VNĐ "
+        f"({((total_value - total_cost) / total_cost * 100 if total_cost > 0 else 0):.1f}%)",
+    ])
+    return ReportResult('inventory_current_stock', "BÁO CÁO TỒN KHO HIỆN TẠI", {}, [section])
+
+def build_low_stock_report(db_manager):
+    """Build the low stock report"""
+    threshold = BUSINESS_RULES['LOW_STOCK_THRESHOLD']
+    
+    low_stock_items = db_manager.fetch_all(
+        """SELECT p.name, p.brand, c.name as category,
+                  COALESCE(ps.available, 0) as available_stock
+           FROM products p
+           LEFT JOIN product_stock ps ON p.id = ps.product_id
+           LEFT JOIN categories c ON p.category_id = c.id
+           WHERE p.is_active = 1 AND COALESCE(ps.available, 0) <= ?
+           ORDER BY available_stock ASC""",
+        (threshold,)
+    )
+    
+    rows = []
+    for item in low_stock_items:
+        stock = item['available_stock'] or 0
+        if stock == 0:
+            urgency = "🔴 HẾT HÀNG"
+        elif stock <= threshold // 2:
+            urgency = "🟠 RẤT ÍT"
+        else:
+            urgency = "🟡 SẮP HẾT"
+        rows.append([_product_display(item['name'], item['brand'], 35, 8), item['category'] or 'N/A', stock, urgency])
+    
+    table = ReportTable(["Sản phẩm", "Danh mục", "Tồn kho", "Mức độ"], rows, [46, 15, 10, 15])
+    notes = [] if low_stock_items else ["", "✅ Không có sản phẩm nào sắp hết hàng!"]
+    return ReportResult('inventory_low_stock', "BÁO CÁO SẢN PHẨM SẮP HẾT HÀNG", {},
+                        [ReportSection(table=table, notes=notes)], [f"Ngưỡng cảnh báo: {threshold} sản phẩm"])
+
+def build_stock_movement_report(db_manager):
+    """Build the stock movement report placeholder"""
+    # This would require a stock_movements table to track all inventory changes
+    section = ReportSection(lines=[
+        "Báo cáo xuất nhập tồn chi tiết sẽ được phát triển khi có bảng theo dõi",
+        "chuyển động kho hàng (stock_movements).",
+        "",
+        "Sẽ bao gồm:",
+        "- Nhập kho theo ngày",
+        "- Xuất kho (bán hàng, sửa chữa)",
+        "- Chuyển kho",
+        "- Kiểm kê kho",
+        "- Điều chỉnh tồn kho",
+    ])
+    return ReportResult('inventory_stock_movement', "BÁO CÁO XUẤT NHẬP TỒN", {}, [section])
+
+def build_profit_loss_report(db_manager, from_date, to_date):
+    """Build the profit and loss report"""
+    totals = get_rollup_totals(db_manager, from_date, to_date)
+    
+    # Cost of goods is only known per sale item, and the previous period is
+    # a second range over the same columns, so both come from the snapshot
+    snapshot = AnalyticsSnapshot.for_manager(db_manager)
+    snapshot.refresh()
+    _, goods_revenue = snapshot.total('sale_items', 'amount', from_date, to_date)
+    _, goods_cost = snapshot.total('sale_items', 'cost', from_date, to_date)
+    gross_profit = goods_revenue - goods_cost
+    
+    current, previous = (from_date, to_date), _previous_period(from_date, to_date)
+    income = snapshot.compare_periods('transactions', 'income', current, previous)
+    expense = snapshot.compare_periods('transactions', 'expense', current, previous)
+    previous_profit = income['previous'] - expense['previous']
+    
+    expense_breakdown = db_manager.fetch_all(
+        """SELECT description, SUM(amount) as amount
+           FROM transactions
+           WHERE transaction_type = 'expense' AND transaction_day BETWEEN ? AND ?
+           GROUP BY description
+           ORDER BY amount DESC""",
+        _day_range(db_manager, from_date, to_date)
+    )
+    
+    total_revenue = totals['income']
+    total_expenses = totals['expense']
+    net_profit = total_revenue - total_expenses
+    profit_margin = (net_profit / total_revenue * 100) if total_revenue > 0 else 0
+    
+    if net_profit > 0:
+        verdict = "   ✅ Kinh doanh có lãi"
+    elif net_profit == 0:
+        verdict = "   ⚠️ Hòa vốn"
+    else:
+        verdict = "   ❌ Kinh doanh thua lỗ"
+    
+    sections = [
+        ReportSection("1. DOANH THU:", [f"   Tổng doanh thu: {total_revenue:>20,.0f} VNĐ",
+                                         f"   Doanh thu hàng bán: {goods_revenue:>16,.0f} VNĐ",
+                                         f"   Giá vốn hàng bán: {goods_cost:>18,.0f} VNĐ",
+                                         f"   Lãi gộp: {gross_profit:>27,.0f} VNĐ"]),
+        ReportSection("2. CHI PHÍ:", [f"   Tổng chi phí: {total_expenses:>22,.0f} VNĐ", "", "   Chi tiết chi phí:"],
+                      ReportTable(["Khoản chi", "Số tiền"],
+                                  [[expense['description'] or 'N/A', expense['amount']] for expense in expense_breakdown],
+                                  [31, 20], money_columns=(1,))),
+        ReportSection("3. KẾT QUẢ KINH DOANH:", [f"   Lợi nhuận ròng: {net_profit:>19,.0f} VNĐ",
+                                                  f"   Tỷ suất lợi nhuận: {profit_margin:>17.1f}%"]),
+        ReportSection("4. SO VỚI KỲ TRƯỚC:", [f"   Kỳ trước: {previous[0]} đến {previous[1]}"],
+                      ReportTable(["Khoản", "Kỳ này", "Kỳ trước", "Chênh lệch", "Tăng trưởng"],
+                                  [["Doanh thu", income['current'], income['previous'], income['change'],
+                                    _growth(income['growth'])],
+                                   ["Chi phí", expense['current'], expense['previous'], expense['change'],
+                                    _growth(expense['growth'])],
+                                   ["Lợi nhuận ròng", net_profit, previous_profit, net_profit - previous_profit,
+                                    _growth((net_profit - previous_profit) / abs(previous_profit)
+                                            if previous_profit else None)]],
+                                  [16, 15, 15, 15, 12], money_columns=(1, 2, 3))),
+        ReportSection("5. ĐÁNH GIÁ:", [verdict]),
+    ]
+    return ReportResult('financial_profit_loss', "BÁO CÁO LÃI LỖ", {'from_date': from_date, 'to_date': to_date},
+                        sections, _date_range(from_date, to_date))
+
+def build_cash_flow_report(db_manager, from_date, to_date):
+    """Build the cash flow report"""
+    days = [day for day in get_daily_rollup(db_manager, from_date, to_date) if day['income'] or day['expense']]
+    
+    rows = [[day['date'], day['income'], day['expense'], day['income'] - day['expense']] for day in days]
+    total_inflow = sum(day['income'] for day in days)
+    total_outflow = sum(day['expense'] for day in days)
+    
+    table = ReportTable(["Ngày", "Tiền vào", "Tiền ra", "Dòng tiền ròng"], rows, [12, 15, 15, 15],
+                        money_columns=(1, 2, 3),
+                        totals=["TỔNG CỘNG", total_inflow, total_outflow, total_inflow - total_outflow])
+    return ReportResult('financial_cash_flow', "BÁO CÁO DÒNG TIỀN", {'from_date': from_date, 'to_date': to_date},
+                        [ReportSection(table=table)], _date_range(from_date, to_date))
+
+def build_revenue_analysis_report(db_manager, from_date, to_date):
+    """Build the revenue by source report"""
+    revenue_sources = db_manager.fetch_all(
+        """SELECT reference_type, SUM(amount) as amount
+           FROM transactions
+           WHERE transaction_type = 'income' AND transaction_day BETWEEN ? AND ?
+           GROUP BY reference_type
+           ORDER BY amount DESC""",
+        _day_range(db_manager, from_date, to_date)
+    )
+    
+    total_revenue = sum(source['amount'] for source in revenue_sources)
+    rows = [[REVENUE_SOURCE_NAMES.get(source['reference_type'], source['reference_type'] or 'Không xác định'),
+             source['amount'], f"{(source['amount'] / total_revenue * 100) if total_revenue > 0 else 0:.1f}%"]
+            for source in revenue_sources]
+    
+    table = ReportTable(["Nguồn", "Doanh thu", "Tỷ lệ"], rows, [21, 20, 8], money_columns=(1,),
+                        totals=["Tổng doanh thu", total_revenue, ""])
+    return ReportResult('financial_revenue_analysis', "PHÂN TÍCH DOANH THU",
+                        {'from_date': from_date, 'to_date': to_date},
+                        [ReportSection("1. DOANH THU THEO NGUỒN:", table=table)], _date_range(from_date, to_date))
+
+def build_customer_list_report(db_manager):
+    """Build the customer list report"""
+    customers = db_manager.fetch_all(
+        """SELECT c.*,
+                  COUNT(s.id) as total_orders,
+                  COALESCE(SUM(s.total_amount), 0) as total_spent
+           FROM customers c
+           LEFT JOIN sales s ON c.id = s.customer_id
+           GROUP BY c.id
+           ORDER BY total_spent DESC"""
+    )
+    
+    rows = [[customer['name'], customer['phone'] or 'N/A', customer['total_orders'], customer['total_spent']]
+            for customer in customers]
+    
+    table = ReportTable(["Tên khách hàng", "Điện thoại", "Số đơn", "Tổng mua"], rows, [25, 15, 10, 15],
+                        money_columns=(3,))
+    return ReportResult('customer_list', "DANH SÁCH KHÁCH HÀNG", {}, [ReportSection(table=table)],
+                        [f"Tổng số khách hàng: {len(customers)}"])
+
+def build_top_customers_report(db_manager, from_date, to_date):
+    """Build the top customers report"""
+    top_customers = db_manager.fetch_all(
+        """SELECT c.name, c.phone,
+                  COUNT(s.id) as orders,
+                  SUM(s.total_amount) as total_spent,
+                  AVG(s.total_amount) as avg_order
+           FROM customers c
+           JOIN sales s ON c.id = s.customer_id
+           WHERE s.sale_day BETWEEN ? AND ?
+           GROUP BY c.id, c.name, c.phone
+           ORDER BY total_spent DESC
+           LIMIT 20""",
+        _day_range(db_manager, from_date, to_date)
+    )
+    
+    rows = [[i, customer['name'], customer['orders'], customer['total_spent'], customer['avg_order']]
+            for i, customer in enumerate(top_customers, 1)]
+    
+    table = ReportTable(["#", "Tên khách hàng", "Số đơn", "Tổng mua", "ĐH trung bình"], rows, [3, 25, 10, 15, 15],
+                        money_columns=(3, 4))
+    return ReportResult('customer_top', "TOP 20 KHÁCH HÀNG VIP", {'from_date': from_date, 'to_date': to_date},
+                        [ReportSection(table=table)], _date_range(from_date, to_date))
+
+def build_debt_customers_report(db_manager):
+    """Build the customers with debt report"""
+    debt_customers = db_manager.fetch_all(
+        """SELECT c.name, c.phone, SUM(d.amount) as total_debt
+           FROM customers c
+           JOIN debts d ON c.id = d.debtor_id
+           WHERE d.debtor_type = 'customer' AND d.status = 'outstanding'
+           GROUP BY c.id, c.name, c.phone
+           ORDER BY total_debt DESC"""
+    )
+    
+    rows = [[customer['name'], customer['phone'] or 'N/A', customer['total_debt']] for customer in debt_customers]
+    total_debt = sum(customer['total_debt'] for customer in debt_customers)
+    
+    table = ReportTable(["Tên khách hàng", "Điện thoại", "Số nợ"], rows, [25, 15, 15], money_columns=(2,),
+                        totals=["TỔNG CÔNG NỢ", "", total_debt])
+    notes = [] if debt_customers else ["", "✅ Không có khách hàng nào đang nợ!"]
+    return ReportResult('customer_debt', "KHÁCH HÀNG CÓ CÔNG NỢ", {}, [ReportSection(table=table, notes=notes)])
+
+def build_overall_performance_report(db_manager, from_date, to_date):
+    """Build the overall performance report"""
+    totals = get_rollup_totals(db_manager, from_date, to_date)
+    orders, revenue = totals['sale_count'], totals['revenue']
+    
+    repairs_metrics = db_manager.fetch_one(
+        """SELECT COUNT(*) as repairs, SUM(total_cost) as repair_revenue
+           FROM repairs WHERE created_day BETWEEN ? AND ?""",
+        _day_range(db_manager, from_date, to_date)
+    )
+    repair_revenue = repairs_metrics['repair_revenue'] or 0
+    
+    sections = [
+        ReportSection("1. HIỆU SUẤT BÁN HÀNG:", [
+            f"   - Số đơn hàng: {orders:,}",
+            f"   - Doanh thu: {revenue:,.0f} VNĐ",
+            f"   - Đơn hàng trung bình: {(revenue / orders if orders > 0 else 0):,.0f} VNĐ",
+        ]),
+        ReportSection("2. HIỆU SUẤT SỬA CHỮA:", [
+            f"   - Số lượng sửa chữa: {repairs_metrics['repairs']:,}",
+            f"   - Doanh thu sửa chữa: {repair_revenue:,.0f} VNĐ",
+        ]),
+        ReportSection("3. TỔNG KẾT:", [
+            f"   - Tổng doanh thu: {revenue + repair_revenue:,.0f} VNĐ",
+            "   - Hiệu suất tổng thể: Đạt mục tiêu (cần thiết lập KPI)",
+        ]),
+    ]
+    return ReportResult('performance_overall', "BÁO CÁO HIỆU SUẤT TỔNG QUAN",
+                        {'from_date': from_date, 'to_date': to_date}, sections, _date_range(from_date, to_date))
+
+def build_sales_performance_report(db_manager, from_date, to_date):
+    """Build the sales performance report"""
+    days = [day for day in get_daily_rollup(db_manager, from_date, to_date) if day['sale_count'] > 0]
+    
+    total_orders = sum(day['sale_count'] for day in days)
+    total_revenue = sum(day['revenue'] for day in days)
+    avg_daily_revenue = total_revenue / len(days) if days else 0
+    
+    rows = [[day['date'], day['sale_count'], day['revenue'],
+             "Tốt" if day['revenue'] >= avg_daily_revenue else "Trung bình"]
+            for day in days]
+    
+    table = ReportTable(["Ngày", "Đơn hàng", "Doanh thu", "Hiệu suất"], rows, [12, 10, 15, 12], money_columns=(2,))
+    section = ReportSection("HIỆU SUẤT THEO NGÀY:", table=table,
+                            notes=["", f"Tổng kết: {total_orders} đơn hàng, {total_revenue:,.0f} VNĐ"])
+    return ReportResult('performance_sales', "BÁO CÁO HIỆU SUẤT BÁN HÀNG",
+                        {'from_date': from_date, 'to_date': to_date}, [section], _date_range(from_date, to_date))
+
+def build_staff_performance_report(db_manager, from_date, to_date):
+    """Build the staff performance report"""
+    staff_performance = get_staff_performance(db_manager, from_date, to_date)
+    
+    rows = [[staff['full_name'], staff['sales_count'], staff['sales_revenue'], staff['commission'],
+             staff['repairs_count'], format_on_time_ratio(staff['on_time_ratio']), f"#{i}"]
+            for i, staff in enumerate(staff_performance, 1)]
+    
+    table = ReportTable(["Nhân viên", "Bán hàng", "Doanh thu", "Hoa hồng", "Sửa chữa", "Đúng hạn", "Xếp hạng"],
+                        rows, [20, 10, 15, 15, 10, 10, 10], money_columns=(2, 3))
+    return ReportResult('performance_staff', "BÁO CÁO HIỆU SUẤT NHÂN VIÊN",
+                        {'from_date': from_date, 'to_date': to_date},
+                        [ReportSection(table=table)], _date_range(from_date, to_date))
+
+# Report name -> builder taking the DatabaseManager and the report parameters
+REPORTS = {
+    'sales_summary': build_sales_summary_report,
+    'sales_daily': build_daily_sales_report,
+    'sales_monthly': build_monthly_sales_report,
+    'sales_by_product': build_product_sales_report,
+    'sales_by_staff': build_staff_sales_report,
+    'sales_by_customer': build_customer_sales_report,
+    'inventory_current_stock': build_current_stock_report,
+    'inventory_low_stock': build_low_stock_report,
+    'inventory_stock_movement': build_stock_movement_report,
+    'financial_profit_loss': build_profit_loss_report,
+    'financial_cash_flow': build_cash_flow_report,
+    'financial_revenue_analysis': build_revenue_analysis_report,
+    'customer_list': build_customer_list_report,
+    'customer_top': build_top_customers_report,
+    'customer_debt': build_debt_customers_report,
+    'performance_overall': build_overall_performance_report,
+    'performance_sales': build_sales_performance_report,
+    'performance_staff': build_staff_performance_report,
+}
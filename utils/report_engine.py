@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Report engine for ChViet Mobile Store Management System
+
+A report is built once into a ReportResult (sections of text lines and
+tables) and cached by (report, parameters, data version). Renderers turn
+the same result into Text widget content, a plain text file, CSV or XLSX,
+so changing the output format never runs the report's queries again.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, List, Tuple
+
+from utils.excel_utils import export_to_csv, export_to_xlsx
+from utils.print_utils import save_report_to_file
+
+@dataclass
+class ReportTable:
+    headers: List[str]
+    rows: List[list]
+    widths: List[int]  # Column widths in the text rendering
+    money_columns: Tuple[int, ...] = ()
+    totals: Optional[list] = None  # Closing row below the rule, e.g. TỔNG CỘNG
+
+@dataclass
+class ReportSection:
+    title: str = ""
+    lines: List[str] = field(default_factory=list)
+    table: Optional[ReportTable] = None
+    notes: List[str] = field(default_factory=list)  # Lines after the table
+
+@dataclass
+class ReportResult:
+    name: str
+    title: str
+    params: dict
+    sections: List[ReportSection]
+    subtitle: List[str] = field(default_factory=list)  # Lines under the title, e.g. the date range
+    generated_at: datetime = field(default_factory=datetime.now)
+    
+    def tables(self):
+        """Get (section title, table) of every section with a table"""
+        return [(section.title, section.table) for section in self.sections if section.table]
+
+class ReportEngine:
+    """Report results cached by report name, parameters and data version
+    
+    DatabaseManager.data_version() moves on every commit, ours or another
+    process's, so a cached result is reused exactly while the data it was
+    built from is unchanged. The version is read before the report's
+    queries run; a commit landing during the build leaves the result under
+    the old version, where it is never hit again.
+    """
+    
+    def __init__(self, db_manager, reports=None, max_results=32):
+        if reports is None:
+            from utils.report_builders import REPORTS
+            reports = REPORTS
+        self.db_manager = db_manager
+        self.reports = reports
+        self.max_results = max_results
+        
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+    
+    @classmethod
+    def for_manager(cls, db_manager):
+        """Get the engine shared by every tab using db_manager"""
+        engine = getattr(db_manager, 'report_engine', None)
+        if engine is None:
+            engine = cls(db_manager)
+            db_manager.report_engine = engine
+        return engine
+    
+    def get(self, name, **params):
+        """
+        Get a report result, building it only if not cached
+        
+        Args:
+            name: Report name, a key of REPORTS
+            **params: Report parameters, e.g. from_date and to_date
+        
+        Returns:
+            ReportResult: The report
+        """
+        key = (name, tuple(sorted(params.items())), self.db_manager.data_version())
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                return result
+        
+        result = self.reports[name](self.db_manager, **params)
+        
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return result
+    
+    def clear(self):
+        """Forget every cached result"""
+        with self._lock:
+            self._results.clear()
+
+def _format_cell(value, width, money):
+    """Format one table cell for the text rendering"""
+    if value is None:
+        value = 'N/A'
+    if money and isinstance(value, (int, float)):
+        return f"{value:>{width},.0f}"
+    return f"{str(value)[:width - 1]:<{width}}"
+
+def _table_rows(table):
+    """Get the rows of a table followed by its totals row"""
+    return table.rows + ([table.totals] if table.totals else [])
+
+def render_text(result, header=True):
+    """
+    Render a report as plain text, as shown in the report Text widgets
+    
+    Args:
+        result: ReportResult
+        header: Start with the title, subtitle and generation time
+    
+    Returns:
+        str: Report text
+    """
+    lines = []
+    if header:
+        lines.append(f"=== {result.title} ===")
+        lines.extend(result.subtitle)
+        lines.append(f"Thời gian tạo: {result.generated_at.strftime('%d/%m/%Y %H:%M:%S')}")
+        lines.append("")
+    
+    for section in result.sections:
+        if section.title:
+            lines.append(section.title)
+        lines.extend(section.lines)
+        
+        table = section.table
+        if table:
+            rule = "-" * (sum(table.widths) + len(table.widths) - 1)
+            lines.append(" ".join(f"{str(header)[:width - 1]:<{width}}"
+                                  for header, width in zip(table.headers, table.widths)))
+            lines.append(rule)
+            for row in _table_rows(table):
+                if row is table.totals:
+                    lines.append(rule)
+                lines.append(" ".join(_format_cell(value, width, index in table.money_columns)
+                                      for index, (value, width) in enumerate(zip(row, table.widths))).rstrip())
+        
+        lines.extend(section.notes)
+        lines.append("")
+    
+    return "\n".join(lines).rstrip() + "\n"
+
+def render_text_widget(result, text_widget):
+    """Show a report in a tk.Text widget, replacing its content"""
+    text_widget.delete('1.0', 'end')
+    text_widget.insert('1.0', render_text(result))
+
+def render_treeview(result, tree):
+    """Show the first table of a report in a ttk.Treeview, replacing its content"""
+    tree.delete(*tree.get_children())
+    tables = result.tables()
+    if not tables:
+        tree['columns'] = ()
+        return
+    
+    _, table = tables[0]
+    columns = [f"col{index}" for index in range(len(table.headers))]
+    tree['columns'] = columns
+    for index, (column, header) in enumerate(zip(columns, table.headers)):
+        tree.heading(column, text=header)
+        tree.column(column, width=table.widths[index] * 8,
+                    anchor='e' if index in table.money_columns else 'w')
+    
+    for row in _table_rows(table):
+        tree.insert('', 'end', values=[
+            f"{value:,.0f}" if index in table.money_columns and isinstance(value, (int, float))
+            else ('N/A' if value is None else value)
+            for index, value in enumerate(row)
+        ])
+
+def render_file(result, filename):
+    """
+    Save a report as a plain text file in the reports folder
+    
+    Args:
+        result: ReportResult
+        filename: Output filename
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    # save_report_to_file writes the title and date itself
+    content = "\n".join(result.subtitle + [""]) + render_text(result, header=False)
+    return save_report_to_file(content, filename, title=result.title)
+
+def render_csv(result, filename, compress=False):
+    """
+    Save a report as CSV, one block per section
+    
+    Args:
+        result: ReportResult
+        filename: Output filename
+        compress: Write gzip-compressed CSV
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    def rows():
+        yield [result.title]
+        for line in result.subtitle:
+            yield [line]
+        for section in result.sections:
+            yield []
+            if section.title:
+                yield [section.title.strip()]
+            for line in section.lines + section.notes:
+                yield [line.strip()]
+            if section.table:
+                yield section.table.headers
+                yield from _table_rows(section.table)
+    
+    return export_to_csv(rows(), filename, compress=compress)
+
+def render_xlsx(result, filename, extra_sheets=()):
+    """
+    Save a report as an XLSX workbook
+    
+    The text lines of every section go to a first overview sheet and each
+    table gets a sheet of its own, with money columns kept as numbers.
+    
+    Args:
+        result: ReportResult
+        filename: Output filename
+        extra_sheets: More (name, rows, headers, money_columns) sheets to append
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    overview = [[result.title]] + [[line] for line in result.subtitle]
+    for section in result.sections:
+        if section.lines or section.notes:
+            overview.append([])
+            if section.title:
+                overview.append([section.title.strip()])
+            overview.extend([line.strip()] for line in section.lines + section.notes)
+    
+    sheets = [("Tổng quan", overview, None, ())]
+    for title, table in result.tables():
+        sheets.append((title.strip().rstrip(':') or result.title, _table_rows(table),
+                       table.headers, table.money_columns))
+    sheets.extend(extra_sheets)
+    
+    # Excel refuses a workbook with two sheets of the same name
+    names = set()
+    unique = []
+    for name, rows, headers, money_columns in sheets:
+        name = base = name[:28]
+        number = 2
+        while name.lower() in names:
+            name = f"{base} {number}"
+            number += 1
+        names.add(name.lower())
+        unique.append((name, rows, headers, money_columns))
+    
+    return export_to_xlsx(unique, filename)
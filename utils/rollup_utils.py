@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Daily rollup utility functions for ChViet Mobile Store Management System
+"""
+
+def _running_totals(db_manager, comparison, day):
+    """Get the cum_* columns of the last rollup day matching `day <comparison> ?`"""
+    columns = db_manager.daily_rollup_columns
+    row = db_manager.fetch_one(
+        f"""SELECT {', '.join(f'cum_{column}' for column in columns)}
+            FROM daily_rollup
+            WHERE day {comparison} ?
+            ORDER BY day DESC
+            LIMIT 1""",
+        (day,)
+    )
+    return dict((column, row[f'cum_{column}'] if row else 0) for column in columns)
+
+def get_rollup_totals(db_manager, from_date, to_date):
+    """
+    Get sales and cash totals for a date range from the prefix sums
+    
+    Args:
+        db_manager: DatabaseManager instance
+        from_date: Start date (date or 'YYYY-MM-DD')
+        to_date: End date, inclusive
+    
+    Returns:
+        dict: sale_count, revenue, paid, tax, discount, income and expense
+    """
+    # Two primary key lookups whatever the length of the range
+    upper = _running_totals(db_manager, '<=', db_manager.day_key(to_date))
+    lower = _running_totals(db_manager, '<', db_manager.day_key(from_date))
+    return dict((column, upper[column] - lower[column]) for column in upper)
+
+def get_daily_rollup(db_manager, from_date, to_date):
+    """
+    Get per-day sales and cash totals for a date range
+    
+    Args:
+        db_manager: DatabaseManager instance
+        from_date: Start date (date or 'YYYY-MM-DD')
+        to_date: End date, inclusive
+    
+    Returns:
+        list: Rows with date ('YYYY-MM-DD'), day and the daily total columns,
+              oldest first; days without activity are skipped
+    """
+    columns = db_manager.daily_rollup_columns
+    query = f"""
+    SELECT printf('%04d-%02d-%02d', day / 10000, day / 100 % 100, day % 100) as date,
+           day, {', '.join(columns)}
+    FROM daily_rollup
+    WHERE day BETWEEN ? AND ?
+    AND ({' OR '.join(f'{column} <> 0' for column in columns)})
+    ORDER BY day
+    """
+    return db_manager.fetch_all(query, (db_manager.day_key(from_date), db_manager.day_key(to_date)))
+
+def get_payment_method_totals(db_manager, from_date, to_date):
+    """
+    Get sales count and revenue per payment method for a date range
+    
+    Args:
+        db_manager: DatabaseManager instance
+        from_date: Start date (date or 'YYYY-MM-DD')
+        to_date: End date, inclusive
+    
+    Returns:
+        list: Rows with payment_method (None when unset), count and amount,
+              largest amount first
+    """
+    query = """
+    SELECT NULLIF(payment_method, '') as payment_method, SUM(sale_count) as count, SUM(revenue) as amount
+    FROM daily_payment_rollup
+    WHERE day BETWEEN ? AND ?
+    GROUP BY payment_method
+    HAVING SUM(sale_count) > 0
+    ORDER BY amount DESC
+    """
+    return db_manager.fetch_all(query, (db_manager.day_key(from_date), db_manager.day_key(to_date)))
+
+# Dimensions of get_sales_cube(): name -> SQL expression over sales_cube sc,
+# products p and categories c. day rolls up to month and year; product
+# attributes and category come from the product of each cube row.
+SALES_CUBE_DIMENSIONS = {
+    'day': "sc.day",
+    'month': "sc.day / 100",
+    'year': "sc.day / 10000",
+    'product_id': "sc.product_id",
+    'product_name': "p.name",
+    'brand': "p.brand",
+    'category_id': "p.category_id",
+    'category': "c.name",
+    'staff_id': "sc.staff_id",
+    'payment_method': "sc.payment_method",
+}
+
+def get_sales_cube(db_manager, dimensions, from_date, to_date, filters=None, order_by='revenue', limit=None):
+    """
+    Slice and roll up sale item totals by any combination of dimensions
+    
+    Args:
+        db_manager: DatabaseManager instance
+        dimensions: SALES_CUBE_DIMENSIONS names to group by, e.g. ['category'] or
+                    ['month', 'staff_id']; empty for the grand total
+        from_date: Start date (date or 'YYYY-MM-DD')
+        to_date: End date, inclusive
+        filters: Optional dimension -> value, or list of values, to keep
+        order_by: Measure or dimension to sort by; measures sort largest first
+        limit: Optional number of rows to return
+    
+    Returns:
+        list: Rows with the dimensions, item_count, quantity and revenue;
+              groups without items are skipped
+    """
+    filters = filters or {}
+    used = set(dimensions) | set(filters)
+    unknown = used - set(SALES_CUBE_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown sales cube dimensions: {', '.join(sorted(unknown))}")
+    measures = db_manager.SALES_CUBE_MEASURES
+    if order_by and order_by not in measures and order_by not in dimensions:
+        raise ValueError(f"Cannot order sales cube rows by {order_by}")
+    
+    # Rows of deleted products drop out like in the reports joining products
+    joins = ""
+    if used & {'product_name', 'brand', 'category_id', 'category'}:
+        joins += " JOIN products p ON sc.product_id = p.id"
+    if 'category' in used:
+        joins += " LEFT JOIN categories c ON p.category_id = c.id"
+    
+    conditions = ["sc.day BETWEEN ? AND ?"]
+    params = [db_manager.day_key(from_date), db_manager.day_key(to_date)]
+    for name, value in filters.items():
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        conditions.append(f"{SALES_CUBE_DIMENSIONS[name]} IN ({', '.join('?' for _ in values)})")
+        params.extend(values)
+    
+    columns = [f"{SALES_CUBE_DIMENSIONS[name]} as {name}" for name in dimensions]
+    columns += [f"SUM(sc.{measure}) as {measure}" for measure in measures]
+    
+    query = f"SELECT {', '.join(columns)} FROM sales_cube sc{joins} WHERE {' AND '.join(conditions)}"
+    if dimensions:
+        query += f" GROUP BY {', '.join(SALES_CUBE_DIMENSIONS[name] for name in dimensions)}"
+        query += " HAVING SUM(sc.item_count) > 0"
+    if order_by:
+        query += f" ORDER BY {order_by} DESC" if order_by in measures else f" ORDER BY {order_by}"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    
+    return db_manager.fetch_all(query, params)
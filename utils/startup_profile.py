@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup profiling for ChViet Mobile Store Management System
+
+Records how long each startup phase takes (imports, database connect,
+schema check, login, main window, each tab build, first frame) and checks
+the timings against APP_CONFIG['STARTUP_BUDGET_MS']. The benchmark starts
+the app on a temporary copy of the database, since opening it applies
+pending migrations.
+
+Usage:
+    python main.py --profile-startup                        # save the profile of a real start
+    python -m utils.startup_profile [database] [--runs N]   # benchmark the phases before Tk on a copy
+    python -m utils.startup_profile --check [profile.json]  # check a saved profile
+"""
+
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import APP_CONFIG
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so the imports are measured cold
+COLD_START_SCRIPT = """
+import json
+import sys
+import time
+started = time.perf_counter()
+import main
+from utils.startup_profile import StartupProfile
+profile = StartupProfile()
+profile.record('imports', started)
+app = main.ChVietApp(profile)
+app.initialize_database(sys.argv[1])
+app.db_manager.close_connection()
+print(json.dumps(profile.phases))
+"""
+
+class StartupProfile:
+    """Phase timings of one application start
+    
+    Phases are kept in the order they finish. The app always records them;
+    save() only writes a file when the profile was given a path, which
+    main.py does for --profile-startup.
+    """
+    
+    def __init__(self, path=None):
+        self.path = path
+        self.phases = []
+    
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as one phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+    
+    def record(self, name, started):
+        """Add a phase that began at the time.perf_counter() value started"""
+        self.phases.append({'name': name, 'ms': round((time.perf_counter() - started) * 1000, 1)})
+    
+    def save(self):
+        """Write the phases recorded so far to the profile file"""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({'phases': self.phases}, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"Error saving startup profile: {e}")
+
+def check_budget(phases, budget=None):
+    """
+    Compare phase timings with their budget
+    
+    Args:
+        phases: List of {'name', 'ms'} phases
+        budget: Phase name -> ms; 'tab' covers every 'tab.<name>' phase.
+                Defaults to APP_CONFIG['STARTUP_BUDGET_MS']
+    
+    Returns:
+        list: (name, ms, limit) of phases over budget
+    """
+    budget = budget or APP_CONFIG['STARTUP_BUDGET_MS']
+    overruns = []
+    for phase in phases:
+        limit = budget.get(phase['name'], budget.get(phase['name'].split('.')[0]))
+        if limit is not None and phase['ms'] > limit:
+            overruns.append((phase['name'], phase['ms'], limit))
+    return overruns
+
+def copy_database(source, target):
+    """
+    Copy a database through SQLite's backup API, opening the source read-only
+    
+    Unlike copying the file, this includes commits still in the -wal file
+    and is consistent while the app has the database open.
+    
+    Args:
+        source: Database to copy
+        target: New database file
+    """
+    if not os.path.exists(source):
+        raise FileNotFoundError(source)
+    reader = sqlite3.connect(f"{Path(source).resolve().as_uri()}?mode=ro", uri=True)
+    writer = sqlite3.connect(target)
+    try:
+        reader.backup(writer)
+    finally:
+        writer.close()
+        reader.close()
+
+def measure_cold_start(db_path, runs=5):
+    """
+    Time the phases before the Tk window in fresh interpreters
+    
+    Args:
+        db_path: Database to open
+        runs: Number of interpreter starts
+    
+    Returns:
+        list: Median {'name', 'ms'} of each phase
+    """
+    samples = {}
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT, db_path],
+                                cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+        for phase in json.loads(result.stdout.strip().splitlines()[-1]):
+            samples.setdefault(phase['name'], []).append(phase['ms'])
+    return [{'name': name, 'ms': round(statistics.median(values), 1)} for name, values in samples.items()]
+
+def format_budget_report(phases, budget=None):
+    """
+    Format phase timings and their budget as plain text
+    
+    Args:
+        phases: List of {'name', 'ms'} phases
+        budget: Budget passed to check_budget()
+    
+    Returns:
+        str: Report text
+    """
+    budget = budget or APP_CONFIG['STARTUP_BUDGET_MS']
+    overruns = dict((name, limit) for name, _, limit in check_budget(phases, budget))
+    
+    lines = []
+    for phase in phases:
+        limit = budget.get(phase['name'], budget.get(phase['name'].split('.')[0]))
+        status = '' if limit is None else f" / {limit} ms"
+        if phase['name'] in overruns:
+            status += "  OVER BUDGET"
+        lines.append(f"{phase['name']:<20} {phase['ms']:>8.1f} ms{status}")
+    
+    lines.append("")
+    lines.append(f"{len(overruns)} phase(s) over budget." if overruns else "All phases within budget.")
+    return "\n".join(lines)
+
+def main(argv=None):
+    """Command line entry point"""
+    argv = sys.argv[1:] if argv is None else argv
+    
+    if '--check' in argv:
+        args = [arg for arg in argv if arg != '--check']
+        path = args[0] if args else APP_CONFIG['STARTUP_PROFILE_FILE']
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                phases = json.load(f)['phases']
+        except FileNotFoundError:
+            print("No startup profile found. Run 'python main.py --profile-startup' first.")
+            return 1
+    else:
+        runs = 5
+        if '--runs' in argv:
+            index = argv.index('--runs')
+            runs = int(argv[index + 1])
+            argv = argv[:index] + argv[index + 2:]
+        source = argv[0] if argv else APP_CONFIG['DATABASE_NAME']
+        with tempfile.TemporaryDirectory(prefix='chviet_startup_') as directory:
+            db_path = os.path.join(directory, os.path.basename(source))
+            try:
+                copy_database(source, db_path)
+            except (FileNotFoundError, sqlite3.Error) as e:
+                print(f"Cannot copy database {source}: {e}")
+                return 1
+            phases = measure_cold_start(db_path, runs)
+    
+    print(format_budget_report(phases))
+    return 1 if check_budget(phases) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
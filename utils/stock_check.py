@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stock counter check for ChViet Mobile Store Management System
+
+Compares the trigger-maintained product_stock counters with a fresh count
+of the inventory table and optionally rebuilds them.
+
+Usage:
+    python -m utils.stock_check [database]             # report drift
+    python -m utils.stock_check [database] --rebuild   # report and repair
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from config import APP_CONFIG
+
+def format_stock_mismatches(mismatches):
+    """
+    Format product_stock drift as plain text
+    
+    Args:
+        mismatches: Result of DatabaseManager.verify_product_stock()
+    
+    Returns:
+        str: Report text
+    """
+    if not mismatches:
+        return "product_stock matches inventory."
+    
+    lines = [f"{len(mismatches)} drifted counter(s):"]
+    for product_id, column, stored, expected in mismatches:
+        lines.append(f"    product {product_id}: {column} = {stored}, expected {expected}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    """Command line entry point"""
+    argv = sys.argv[1:] if argv is None else argv
+    rebuild = '--rebuild' in argv
+    args = [arg for arg in argv if arg != '--rebuild']
+    db_path = args[0] if args else APP_CONFIG['DATABASE_NAME']
+    
+    db_manager = DatabaseManager(db_path)
+    db_manager.initialize_database()
+    try:
+        mismatches = db_manager.verify_product_stock()
+        print(format_stock_mismatches(mismatches))
+        
+        if rebuild and mismatches:
+            db_manager.rebuild_product_stock()
+            print("product_stock rebuilt from inventory.")
+    finally:
+        db_manager.close_connection()
+    return 1 if mismatches and not rebuild else 0
+
+if __name__ == "__main__":
+    sys.exit(main())